@@ -1,8 +1,19 @@
+import os
 import re
 import unicodedata
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 
+EVIDENCE_THRESHOLD = 0.4 # 40% (Umbral para mostrar evidencia)
+
+# Limpieza por lotes: procesos para construir índices grandes (1 = sin pool)
+PROCESOS_LIMPIEZA = int(os.environ.get("PROCESOS_LIMPIEZA", 1))
+# Por debajo de esta cantidad de textos no compensa arrancar el pool
+MIN_TEXTOS_POOL = 2000
+TAM_BLOQUE_LIMPIEZA = 500
+
 def limpiar_texto(texto: str) -> str:
     """
     Limpia el texto de caracteres especiales, tildes y espacios innecesarios.
@@ -17,6 +28,62 @@ def limpiar_texto(texto: str) -> str:
     return texto
 
 
+# Tabla de traducción precalculada (bytes ASCII): mayúsculas -> minúsculas,
+# letras y dígitos se conservan y todo lo demás pasa a ser un espacio.
+_TABLA_LIMPIEZA = bytes(
+    c if (0x61 <= c <= 0x7A or 0x30 <= c <= 0x39) else c + 32 if 0x41 <= c <= 0x5A else 0x20
+    for c in range(256)
+)
+
+
+def limpiar_texto_rapido(texto: str) -> str:
+    """
+    Igual que 'limpiar_texto' (misma salida), pero en una sola pasada:
+    NFKD + ascii (se omite si el texto ya es ASCII), bytes.translate con la
+    tabla precalculada y colapso de espacios; sin expresiones regulares.
+    """
+    if not isinstance(texto, str):
+        return ""
+    if texto.isascii():
+        datos = texto.encode('ascii')
+    else:
+        datos = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore')
+    return b' '.join(datos.translate(_TABLA_LIMPIEZA).split()).decode('ascii')
+
+
+def _limpiar_bloque(textos: list) -> list:
+    return [limpiar_texto_rapido(t) for t in textos]
+
+
+def _bloques(textos, tam_bloque: int):
+    iterador = iter(textos)
+    while True:
+        bloque = list(islice(iterador, tam_bloque))
+        if not bloque:
+            return
+        yield bloque
+
+
+def limpiar_textos(textos, procesos: int = None, tam_bloque: int = TAM_BLOQUE_LIMPIEZA) -> list:
+    """
+    Limpia muchos textos a la vez (lista o generador) y devuelve la lista
+    en el mismo orden. Con 'procesos' > 1 (y suficientes textos) reparte
+    los bloques en un pool de procesos: pensado para construir índices.
+    """
+    procesos = PROCESOS_LIMPIEZA if procesos is None else procesos
+    if procesos > 1 and not isinstance(textos, (list, tuple)):
+        textos = list(textos)
+
+    if procesos <= 1 or len(textos) < MIN_TEXTOS_POOL:
+        return [limpiar_texto_rapido(t) for t in textos]
+
+    limpios = []
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        for bloque in pool.map(_limpiar_bloque, _bloques(textos, tam_bloque)):
+            limpios.extend(bloque)
+    return limpios
+
+
 def similitud_coseno(v1, v2):
     """
     Calcula la similitud del coseno entre dos vectores TF-IDF.
@@ -39,7 +106,6 @@ def formatear_respuesta(texto_usuario, best_match_article, similitud):
     """
     
     resultado = {}
-    EVIDENCE_THRESHOLD = 0.4 # 40% (Umbral para mostrar evidencia)
 
     # --- 1. Definir Veredicto y Color (para Bootstrap) ---
     if similitud > 0.5: # Más del 50% es VERDADERO
@@ -60,6 +126,11 @@ def formatear_respuesta(texto_usuario, best_match_article, similitud):
     if best_match_article and similitud >= EVIDENCE_THRESHOLD:
         
         fuente = best_match_article.get('fuente', 'Fuente Desconocida')
+        # Nota publicada por varios medios (duplicados colapsados)
+        otras_fuentes = [f.get('fuente') for f in best_match_article.get('fuentes') or [] if f.get('fuente')]
+        otras_fuentes = [f for f in dict.fromkeys(otras_fuentes) if f != fuente]
+        if otras_fuentes:
+            fuente = f"{fuente}; también en {', '.join(otras_fuentes)}"
         titulo = best_match_article.get('title', best_match_article.get('titulo', 'Sin Título'))
         url = best_match_article.get('url', '#') # Usar '#' como fallback
 
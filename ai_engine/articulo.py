@@ -0,0 +1,293 @@
+"""
+articulo.py — Modelo único de artículo (compartido por scrapers y motor de IA)
+Antes cada scraper armaba a mano el diccionario anidado de la API de
+La República (data.__typename, tags, categories, multimedia, metadata_seo...)
+aunque el motor solo lee título, teaser, contenido, URL, fuente y fecha.
+
+'Articulo' guarda SOLO esos campos en __slots__ (sin __dict__ por objeto).
+Todo lo demás va a 'extra', un blob JSON comprimido que se decodifica solo
+si alguien lo pide; el motor lo descarta al cargar (conservar_extra=False).
+El 'contenido' también puede ser perezoso: los artículos leídos del almacén
+sin cuerpo (con_contenido=False) lo piden por _id al leerlo (ver body_store);
+textos() los pide todos juntos para un bloque (ej. al construir el índice).
+
+En el JSON se guarda la forma compacta de a_dict(); desde_dict() entiende
+también la forma anidada antigua, así que no hace falta migrar el archivo.
+"""
+
+import json
+import zlib
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Claves de la forma anidada (La República) que el modelo ya representa
+_CLAVES_CONOCIDAS = {"_id", "title", "titulo", "url", "slug", "fuente", "update_date", "teaser",
+                     "contenido_full", "fuentes", "duplicado_de", "metadata", "extra"}
+
+
+def _resolver_fuente(n: dict) -> str:
+    """ Devuelve la fuente del artículo (metadatos o, en su defecto, la URL). """
+    if 'metadata' in n and isinstance(n['metadata'], list):
+        for meta in n['metadata']:
+            if isinstance(meta, dict) and meta.get('key') == 'source':
+                return meta.get('value', 'Desconocida')
+    if 'fuente' in n:
+        return n['fuente']
+
+    # Fallback para artículos que no tengan metadata (ej. La República v1)
+    url = n.get('url', '') or ''
+    if 'larepublica.pe' in url:
+        return 'La República'
+    elif 'rpp.pe' in url:
+        return 'RPP'
+    elif 'canaln.pe' in url:
+        return 'Canal N'
+    elif 'elperuano.pe' in url:
+        return 'El Peruano'
+    elif 'tvperu.gob.pe' in url:
+        return 'TV Perú'
+    return 'Desconocida'
+
+
+def _url_canonica(n: dict, fuente: str) -> str:
+    """ URL del artículo (La República solo trae el 'slug'). """
+    url = n.get('url')
+    if not url and fuente == 'La República' and n.get('slug'):
+        url = f"https://larepublica.pe/{n.get('slug')}"
+    return url or ''
+
+
+# Parámetros de seguimiento que no cambian el artículo
+_PARAMETROS_SEGUIMIENTO = {"fbclid", "gclid", "ref", "ocid", "outputtype"}
+
+
+def normalizar_url(url: str) -> str:
+    """
+    URL canónica (clave del índice por URL): https, host en minúsculas y sin
+    'www.', sin fragmento, sin parámetros de seguimiento y sin '/' final.
+    Así 'http://www.rpp.pe/x/?utm_source=fb' y 'https://rpp.pe/x' coinciden.
+    """
+    url = (url or '').strip()
+    if not url:
+        return ''
+    partes = urlsplit(url)
+    if not partes.netloc:
+        return url
+    host = partes.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    consulta = urlencode([(k, v) for k, v in parse_qsl(partes.query, keep_blank_values=True)
+                          if not (k.lower().startswith('utm_') or k.lower() in _PARAMETROS_SEGUIMIENTO)])
+    return urlunsplit(('https', host, partes.path.rstrip('/') or '/', consulta, ''))
+
+
+# Fuentes sin un ID propio confiable: su _id se deriva de la URL (ver id_estable)
+PREFIJOS_ID_URL = {"Canal N": "canaln", "RPP": "rpp", "TV Peru": "tvperu", "TV Perú": "tvperu"}
+
+
+def id_estable(url: str, prefijo: str) -> str:
+    """
+    _id determinista a partir de la URL canónica: '<prefijo>_<sha1[:16]>'.
+    La misma nota recibe el mismo _id en cada corrida (hash() de Python
+    cambia por proceso), así un re-scrapeo actualiza en vez de duplicar.
+    """
+    return f"{prefijo}_{hashlib.sha1(normalizar_url(url).encode('utf-8')).hexdigest()[:16]}"
+
+
+class Articulo:
+    """ Registro compacto de una noticia. """
+
+    __slots__ = ("id", "titulo", "teaser", "_contenido", "url", "slug", "fuente", "fecha",
+                 "fuentes", "duplicado_de", "_extra")
+
+    def __init__(self, id=None, titulo="", teaser="", contenido="", url="", slug="",
+                 fuente="Desconocida", fecha=None, fuentes=None, duplicado_de=None, extra=None):
+        self.id = id
+        self.titulo = titulo or ""
+        self.teaser = teaser or ""
+        self.contenido = contenido or ""
+        self.url = url or ""
+        self.slug = slug or ""
+        self.fuente = fuente or "Desconocida"
+        self.fecha = fecha  # 'YYYY-MM-DD HH:MM:SS' (update_date)
+        self.fuentes = fuentes  # [{'fuente', 'url', '_id'}, ...] si la nota salió en varios medios
+        self.duplicado_de = duplicado_de
+        self._extra = zlib.compress(json.dumps(extra, ensure_ascii=False).encode('utf-8')) if extra else None
+
+    # --- Cuerpo: None = no cargado (se pide al almacén por _id, sin guardarlo) ---
+    @property
+    def contenido(self) -> str:
+        if self._contenido is None:
+            from ai_engine.news_store import obtener_store
+            return obtener_store().contenido(self.id) if self.id else ""
+        return self._contenido
+
+    @contenido.setter
+    def contenido(self, valor):
+        self._contenido = valor or ""
+
+    # --- Blob perezoso con los campos que el motor no usa ---
+    @property
+    def extra(self) -> dict:
+        return json.loads(zlib.decompress(self._extra)) if self._extra else {}
+
+    # --- Pickle (la caché de Flask serializa la lista de artículos) ---
+    def __getstate__(self):
+        return tuple(getattr(self, campo) for campo in self.__slots__)
+
+    def __setstate__(self, estado):
+        for campo, valor in zip(self.__slots__, estado):
+            setattr(self, campo, valor)
+
+    def __repr__(self):
+        return f"Articulo({self.id!r}, {self.fuente!r}, {self.titulo[:40]!r})"
+
+    # --- Derivados que usa el motor ---
+    def texto(self) -> str:
+        """ Título + teaser + contenido completo (lo que se limpia y vectoriza). """
+        return self.titulo + " " + self.teaser + " " + self.contenido
+
+    def a_dict(self) -> dict:
+        """ Forma compacta para guardar en noticias_partidos.json. """
+        registro = {"_id": self.id, "title": self.titulo, "url": self.url, "fuente": self.fuente,
+                    "update_date": self.fecha}
+        for clave, valor in (("slug", self.slug), ("teaser", self.teaser), ("contenido_full", self.contenido),
+                             ("fuentes", self.fuentes), ("duplicado_de", self.duplicado_de)):
+            if valor:
+                registro[clave] = valor
+        if self._extra:
+            registro["extra"] = self.extra
+        return registro
+
+    @classmethod
+    def desde_dict(cls, n: dict, conservar_extra: bool = False):
+        """
+        Convierte un registro del JSON (forma compacta o anidada antigua).
+        Con 'conservar_extra' los campos desconocidos se guardan en el blob.
+        """
+        data = n.get('data')
+        if not isinstance(data, dict):
+            data = {}
+        fuente = _resolver_fuente(n)
+
+        extra = None
+        if conservar_extra:
+            extra = dict(n.get('extra') or {})
+            extra.update((k, v) for k, v in n.items() if k not in _CLAVES_CONOCIDAS)
+            if 'data' in extra:
+                extra['data'] = {k: v for k, v in data.items() if k != 'teaser'}
+            extra = {k: v for k, v in extra.items() if v not in (None, {}, [])}
+
+        return cls(
+            id=n.get('_id'),
+            titulo=n.get('title') or n.get('titulo') or '',
+            teaser=n.get('teaser') or data.get('teaser') or '',
+            contenido=n.get('contenido_full') or '',
+            url=_url_canonica(n, fuente),
+            slug=n.get('slug') or '',
+            fuente=fuente,
+            fecha=n.get('update_date'),
+            fuentes=n.get('fuentes'),
+            duplicado_de=n.get('duplicado_de'),
+            extra=extra,
+        )
+
+
+def textos(articulos) -> list:
+    """
+    articulo.texto() de cada uno, pero los cuerpos perezosos se piden al
+    almacén en UNA consulta para todos (no una por artículo). No se guardan
+    en los Articulo: la lista en caché sigue sin cuerpos.
+    """
+    pendientes = [a.id for a in articulos if a._contenido is None and a.id]
+    cuerpos = {}
+    if pendientes:
+        from ai_engine.news_store import obtener_store
+        cuerpos = obtener_store().contenidos(pendientes)
+    return [a.titulo + " " + a.teaser + " " + (a._contenido if a._contenido is not None else cuerpos.get(a.id, ""))
+            for a in articulos]
+
+
+def como_articulo(n):
+    """ Acepta Articulo o diccionario (JSON); devuelve None para items corruptos. """
+    if isinstance(n, Articulo):
+        return n
+    if isinstance(n, dict):
+        return Articulo.desde_dict(n)
+    return None
+
+
+def cargar_articulos(datos, conservar_extra: bool = False) -> list:
+    """
+    Convierte el contenido de noticias_partidos.json (dict o lista) en una
+    lista de Articulo. Los registros de duplicados colapsados se omiten.
+    """
+    registros = datos.values() if isinstance(datos, dict) else datos
+    return [Articulo.desde_dict(n, conservar_extra) for n in registros
+            if isinstance(n, dict) and not n.get('duplicado_de')]
+
+
+def normalizar_registros(datos: dict) -> dict:
+    """
+    Reescribe EN SITIO un diccionario {id: noticia} a la forma compacta
+    (los registros antiguos anidados pasan a la nueva forma sin perder datos).
+    """
+    for clave, n in list(datos.items()):
+        if isinstance(n, dict):
+            datos[clave] = Articulo.desde_dict(n, conservar_extra=True).a_dict()
+    return datos
+
+
+# ==============================
+# Conversores por fuente
+# ==============================
+
+def desde_larepublica(item: dict) -> Articulo:
+    """ Artículo de la API de búsqueda de La República. """
+    data = item.get('data') or {}
+    extra = {k: v for k, v in item.items() if k not in _CLAVES_CONOCIDAS}
+    extra['data'] = {k: v for k, v in data.items() if k != 'teaser'}
+    extra = {k: v for k, v in extra.items() if v not in (None, {}, [])}
+    slug = item.get('slug') or ''
+    return Articulo(
+        id=item.get('_id'), titulo=item.get('title'), teaser=data.get('teaser'),
+        url=_url_canonica(item, 'La República'), slug=slug,
+        fuente='La República', fecha=item.get('update_date'), extra=extra,
+    )
+
+
+def desde_elperuano(item: dict, termino: str, base_url: str, fecha: str) -> Articulo:
+    """ Artículo de la API '_SearchNews' de El Peruano ('fecha' ya normalizada). """
+    slug = (item.get("URLFriendLy") or "").lstrip('/')
+    return Articulo(
+        id=f"elperuano_{item.get('intNoticiaId')}", titulo=item.get("vchTitulo"),
+        teaser=item.get("vchBajada") or item.get("vchDescripcion"),
+        url=base_url + slug, slug=slug, fuente='El Peruano', fecha=fecha,
+        extra={k: v for k, v in (("termino_busqueda", termino), ("seccion", item.get('Seccion')),
+                                 ("imagen", item.get("vchRutaCompletaFotografia"))) if v},
+    )
+
+
+def _desde_pagina_web(fuente, id, titulo, url, base_url, teaser, contenido, termino, fecha, **extra):
+    extra = {k: v for k, v in extra.items() if v}
+    extra["termino_busqueda"] = termino
+    return Articulo(id=id, titulo=titulo, teaser=teaser, contenido=contenido, url=url,
+                    slug=url.replace(base_url, "").lstrip('/'), fuente=fuente, fecha=fecha, extra=extra)
+
+
+def desde_canaln(tarjeta: dict, contenido: dict, termino: str, base_url: str, fecha: str) -> Articulo:
+    """ Tarjeta del buscador de Canal N + contenido extraído de la nota. """
+    return _desde_pagina_web('Canal N', tarjeta["_id"], tarjeta.get("title", ""), tarjeta["url"], base_url,
+                             contenido.get("primer_parrafo", ""), contenido.get("contenido", ""), termino, fecha,
+                             categoria=tarjeta.get("categoria"), fecha_hora=tarjeta.get("fecha_hora"))
+
+
+def desde_rpp(id, titulo, url, base_url, teaser, contenido, termino, fecha) -> Articulo:
+    """ Nota de RPP ya parseada. """
+    return _desde_pagina_web('RPP', id, titulo, url, base_url, teaser, contenido, termino, fecha)
+
+
+def desde_tvperu(id, titulo, url, base_url, teaser, contenido, termino, fecha, fecha_publicacion=None) -> Articulo:
+    """ Nota de TV Perú ya parseada. """
+    return _desde_pagina_web('TV Peru', id, titulo, url, base_url, teaser, contenido, termino, fecha,
+                             fecha_publicacion=fecha_publicacion)
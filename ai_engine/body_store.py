@@ -0,0 +1,249 @@
+"""
+body_store.py — Cuerpos de las noticias comprimidos (zlib + diccionario por fuente)
+'contenido_full' (sobre todo el de RPP, TV Perú y Canal N) es la mayor parte
+de los bytes del corpus, pero solo se usa para construir el índice y, a
+veces, para mostrar una evidencia. Por eso vive aparte de los metadatos:
+
+    cuerpos(id, diccionario, largo, datos)   -> texto comprimido con zlib
+    diccionarios(id, fuente, datos)          -> diccionario zlib (zdict) por fuente
+
+  - Las notas de un mismo medio repiten mucho (firmas, "Lee también",
+    nombres, giros): un diccionario entrenado con muestras de la fuente
+    hace que incluso las notas cortas compriman bien.
+  - Cada cuerpo recuerda con qué diccionario se comprimió, así entrenar uno
+    nuevo no obliga a recomprimir todo (recomprimir() lo hace a pedido).
+  - Se lee por _id y de forma perezosa: la lista de metadatos que Flask
+    guarda en caché (get_cached_db_news) no trae los cuerpos; el Articulo
+    los pide al almacén solo si alguien lee 'contenido' (o, para muchos
+    artículos a la vez, articulo.textos(): una consulta por bloque).
+
+Las tablas viven en la misma base SQLite que news_store (misma transacción
+al guardar). Reporte de compresión y velocidad de descompresión:
+    python -m ai_engine.body_store [--recomprimir]
+"""
+
+import sys
+import time
+import zlib
+import random
+from collections import Counter
+
+NIVEL_ZLIB = 6
+TAM_DICCIONARIO = 32 * 1024  # Ventana de zlib: un diccionario más grande no sirve
+MIN_MUESTRAS_DICCIONARIO = 100  # Cuerpos de una fuente antes de entrenar su diccionario
+MAX_MUESTRAS_DICCIONARIO = 2000
+SIN_DICCIONARIO = 0
+MAX_PARAMETROS = 900  # Parámetros por consulta (SQLite viejo admite hasta 999)
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS cuerpos (
+    id           TEXT PRIMARY KEY,
+    diccionario  INTEGER NOT NULL DEFAULT 0,  -- 0: zlib sin diccionario
+    largo        INTEGER NOT NULL,            -- bytes UTF-8 sin comprimir
+    datos        BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS diccionarios (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    fuente     TEXT NOT NULL,
+    datos      BLOB NOT NULL,
+    creado_en  REAL NOT NULL
+);
+"""
+
+
+def entrenar_diccionario(textos, tamano: int = TAM_DICCIONARIO) -> bytes:
+    """
+    Diccionario zlib a partir de muestras de una fuente: las líneas que se
+    repiten entre notas (pies, firmas, avisos) y las palabras frecuentes,
+    ordenadas de menos a más útiles (zlib encuentra antes lo del final).
+    """
+    textos = list(textos)
+    lineas, palabras = Counter(), Counter()
+    for texto in textos:
+        lineas.update({l.strip() for l in texto.split("\n") if 20 <= len(l.strip()) <= 300})
+        palabras.update(p for p in texto.split() if len(p) >= 4)
+
+    min_repeticiones = max(2, len(textos) // 50)
+    piezas = [(c * len(l), l) for l, c in lineas.items() if c >= min_repeticiones]
+    piezas += [(c * len(p), p) for p, c in palabras.most_common(4000) if c >= min_repeticiones]
+    piezas.sort(reverse=True)
+
+    elegidas, total = [], 0
+    for _, pieza in piezas:
+        codificada = (pieza + " ").encode("utf-8")
+        if total + len(codificada) > tamano:
+            break
+        elegidas.append(codificada)
+        total += len(codificada)
+    return b"".join(reversed(elegidas))
+
+
+def comprimir(texto: str, diccionario: bytes = None) -> bytes:
+    compresor = zlib.compressobj(NIVEL_ZLIB, zdict=diccionario) if diccionario else zlib.compressobj(NIVEL_ZLIB)
+    return compresor.compress(texto.encode("utf-8")) + compresor.flush()
+
+
+def descomprimir(datos: bytes, diccionario: bytes = None) -> str:
+    descompresor = zlib.decompressobj(zdict=diccionario) if diccionario else zlib.decompressobj()
+    return (descompresor.decompress(datos) + descompresor.flush()).decode("utf-8")
+
+
+class AlmacenCuerpos:
+    """
+    Cuerpos comprimidos dentro de la base de news_store. Recibe la función
+    que da la conexión del hilo (NewsStore._conexion); escribir se hace
+    dentro de la transacción de quien llama.
+    """
+
+    def __init__(self, conexion):
+        self._conexion = conexion
+        self._diccionarios = {}  # id -> bytes
+        self._vigente = {}  # fuente -> id del diccionario más nuevo
+        self._conexion().executescript(_ESQUEMA)
+        self._cargar_diccionarios()
+
+    def _cargar_diccionarios(self):
+        for id_, fuente, datos in self._conexion().execute("SELECT id, fuente, datos FROM diccionarios ORDER BY id"):
+            self._diccionarios[id_] = datos
+            self._vigente[fuente] = id_
+
+    def _diccionario(self, id_: int):
+        if id_ == SIN_DICCIONARIO:
+            return None
+        if id_ not in self._diccionarios:
+            self._cargar_diccionarios()  # (otro proceso entrenó uno nuevo)
+        return self._diccionarios[id_]
+
+    # -----------------------------
+    # Escritura (dentro de la transacción de quien llama)
+    # -----------------------------
+    def guardar(self, conexion, id_: str, fuente: str, texto: str):
+        """ Comprime y guarda el cuerpo de 'id_' (un texto vacío lo borra). """
+        if not texto:
+            conexion.execute("DELETE FROM cuerpos WHERE id = ?", (id_,))
+            return
+        diccionario = self._vigente.get(fuente, SIN_DICCIONARIO)
+        codificado = texto.encode("utf-8")
+        conexion.execute("INSERT OR REPLACE INTO cuerpos (id, diccionario, largo, datos) VALUES (?, ?, ?, ?)",
+                         (id_, diccionario, len(codificado), comprimir(texto, self._diccionario(diccionario))))
+
+    def borrar(self, conexion, id_: str):
+        conexion.execute("DELETE FROM cuerpos WHERE id = ?", (id_,))
+
+    # -----------------------------
+    # Lectura
+    # -----------------------------
+    def texto(self, diccionario: int, datos) -> str:
+        """ Descomprime un cuerpo ya leído (ej. en un JOIN con articulos). """
+        return descomprimir(datos, self._diccionario(diccionario)) if datos is not None else ""
+
+    def obtener(self, id_: str) -> str:
+        fila = self._conexion().execute("SELECT diccionario, datos FROM cuerpos WHERE id = ?", (str(id_),)).fetchone()
+        return self.texto(*fila) if fila else ""
+
+    def obtener_varios(self, ids) -> dict:
+        """ {_id: cuerpo} de muchos artículos (consultas de hasta MAX_PARAMETROS ids). """
+        ids, cuerpos = [str(i) for i in ids], {}
+        for inicio in range(0, len(ids), MAX_PARAMETROS):
+            parte = ids[inicio:inicio + MAX_PARAMETROS]
+            for id_, diccionario, datos in self._conexion().execute(
+                    f"SELECT id, diccionario, datos FROM cuerpos WHERE id IN ({', '.join('?' * len(parte))})", parte):
+                cuerpos[id_] = self.texto(diccionario, datos)
+        return cuerpos
+
+    # -----------------------------
+    # Diccionarios
+    # -----------------------------
+    def sin_diccionario(self, conexion, fuentes) -> list:
+        """ Fuentes (de 'fuentes') sin diccionario y con muestras suficientes para entrenarlo. """
+        pendientes = []
+        if not set(fuentes) <= set(self._vigente):
+            self._cargar_diccionarios()  # (quizás otro proceso ya lo entrenó)
+        for fuente in set(fuentes) - set(self._vigente):
+            n = conexion.execute("SELECT COUNT(*) FROM cuerpos c JOIN articulos a ON a.id = c.id "
+                                 "WHERE a.fuente = ?", (fuente,)).fetchone()[0]
+            if n >= MIN_MUESTRAS_DICCIONARIO:
+                pendientes.append(fuente)
+        return pendientes
+
+    def entrenar(self, conexion, fuente: str, muestras=None) -> int:
+        """
+        Entrena y registra un diccionario para 'fuente' con 'muestras' (textos)
+        o, si no se pasan, con una muestra de sus cuerpos ya guardados.
+        """
+        if muestras is None:
+            filas = conexion.execute("SELECT c.diccionario, c.datos FROM cuerpos c JOIN articulos a ON a.id = c.id "
+                                     "WHERE a.fuente = ? ORDER BY random() LIMIT ?",
+                                     (fuente, MAX_MUESTRAS_DICCIONARIO)).fetchall()
+            muestras = (self.texto(d, datos) for d, datos in filas)
+        diccionario = entrenar_diccionario(muestras)
+        if not diccionario:
+            return SIN_DICCIONARIO
+        id_ = conexion.execute("INSERT INTO diccionarios (fuente, datos, creado_en) VALUES (?, ?, ?)",
+                               (fuente, diccionario, time.time())).lastrowid
+        self._diccionarios[id_], self._vigente[fuente] = diccionario, id_
+        return id_
+
+    def recomprimir(self, conexion, fuente: str = None) -> int:
+        """ Recomprime con el diccionario vigente los cuerpos de 'fuente' (o de todas) que usan otro. """
+        consulta = "SELECT c.id, a.fuente, c.diccionario, c.datos FROM cuerpos c JOIN articulos a ON a.id = c.id"
+        filas = conexion.execute(consulta + (" WHERE a.fuente = ?" if fuente else ""),
+                                 (fuente,) if fuente else ()).fetchall()
+        cambios = 0
+        for id_, fuente_fila, diccionario, datos in filas:
+            vigente = self._vigente.get(fuente_fila, SIN_DICCIONARIO)
+            if diccionario != vigente:
+                conexion.execute("UPDATE cuerpos SET diccionario = ?, datos = ? WHERE id = ?",
+                                 (vigente, comprimir(self.texto(diccionario, datos), self._diccionario(vigente)), id_))
+                cambios += 1
+        return cambios
+
+    # -----------------------------
+    # Reporte
+    # -----------------------------
+    def estadisticas(self, muestra: int = 2000) -> dict:
+        """
+        Por fuente: cuerpos, bytes originales y comprimidos, tasa de
+        compresión, tasa que daría zlib sin diccionario y velocidad de
+        descompresión (MB/s de texto, medida sobre una muestra).
+        """
+        conexion = self._conexion()
+        reporte = {}
+        for fuente, n, originales, comprimidos in conexion.execute(
+                "SELECT a.fuente, COUNT(*), SUM(c.largo), SUM(length(c.datos)) "
+                "FROM cuerpos c JOIN articulos a ON a.id = c.id GROUP BY a.fuente"):
+            filas = conexion.execute("SELECT c.diccionario, c.datos FROM cuerpos c JOIN articulos a ON a.id = c.id "
+                                     "WHERE a.fuente = ?", (fuente,)).fetchall()
+            filas = random.Random(0).sample(filas, min(muestra, len(filas)))
+            t0 = time.perf_counter()
+            textos = [self.texto(d, datos) for d, datos in filas]
+            segundos = time.perf_counter() - t0
+            bytes_muestra = sum(len(t.encode("utf-8")) for t in textos)
+            sin_dic = sum(len(comprimir(t)) for t in textos)
+            reporte[fuente] = {
+                "cuerpos": n,
+                "bytes_originales": originales,
+                "bytes_comprimidos": comprimidos,
+                "tasa": round(originales / comprimidos, 2) if comprimidos else None,
+                "tasa_sin_diccionario": round(bytes_muestra / sin_dic, 2) if sin_dic else None,
+                "diccionario": self._vigente.get(fuente, SIN_DICCIONARIO),
+                "mb_por_segundo": round(bytes_muestra / 2 ** 20 / segundos, 1) if segundos > 0 else None,
+            }
+        return reporte
+
+
+if __name__ == "__main__":
+    from ai_engine.news_store import obtener_store
+
+    store = obtener_store()
+    cuerpos = getattr(store, "cuerpos", None)
+    if cuerpos is None:
+        sys.exit("ℹ️  El almacén actual (NEWS_BACKEND) no usa el almacén de cuerpos comprimidos.")
+    if "--recomprimir" in sys.argv[1:]:
+        print(f"🗜️  Cuerpos recomprimidos: {store.recomprimir_cuerpos()}")
+
+    print(f"{'fuente':<14} {'cuerpos':>8} {'original':>10} {'comprimido':>11} {'tasa':>6} {'sin dic.':>9} {'descompr.':>11}")
+    for fuente, e in sorted(cuerpos.estadisticas().items()):
+        print(f"{fuente:<14} {e['cuerpos']:>8} {e['bytes_originales'] / 2 ** 20:>8.1f}MB "
+              f"{e['bytes_comprimidos'] / 2 ** 20:>9.1f}MB {e['tasa'] or 0:>5.1f}x {e['tasa_sin_diccionario'] or 0:>8.1f}x "
+              f"{e['mb_por_segundo'] or 0:>7.0f}MB/s")
@@ -0,0 +1,130 @@
+"""
+catalogo.py — Catálogo columnar de artículos (metadatos de evidencia)
+El índice no guarda los diccionarios de noticias: al construirlo se resuelve
+UNA vez la fuente, la URL canónica, el título y la fecha de cada artículo y
+se guardan en columnas compactas:
+  - fuente  -> código entero pequeño (uint8) + tabla de nombres internados
+  - _id, título, URL -> un solo buffer UTF-8 por columna + tabla de offsets
+  - fecha   -> numpy datetime64[s] (NaT si falta o no se entiende)
+Solo el artículo ganador se materializa como diccionario para la respuesta.
+Así no se recorren ni se modifican los diccionarios cacheados en cada
+petición y el índice no mantiene vivo el JSON completo en memoria.
+"""
+
+import numpy as np
+
+from ai_engine.articulo import como_articulo
+
+# Fuentes conocidas: códigos estables (las nuevas se agregan al final)
+FUENTES_CONOCIDAS = ("Desconocida", "La República", "El Peruano", "Canal N", "RPP", "TV Perú")
+
+
+def _fecha(valor):
+    """ 'YYYY-MM-DD HH:MM:SS' (o ISO) -> datetime64[s]; NaT si no se entiende. """
+    if not valor or not isinstance(valor, str):
+        return np.datetime64('NaT', 's')
+    try:
+        return np.datetime64(valor.strip().replace(' ', 'T')[:19], 's')
+    except ValueError:
+        return np.datetime64('NaT', 's')
+
+
+class ColumnaTexto:
+    """ Columna de strings: un buffer UTF-8 contiguo + offsets (n + 1). """
+
+    __slots__ = ("buffer", "offsets")
+
+    def __init__(self, buffer, offsets):
+        self.buffer = buffer  # bytes o np.memmap(uint8)
+        self.offsets = offsets  # np.int64
+
+    @classmethod
+    def desde_lista(cls, valores: list):
+        codificados = [(v or '').encode('utf-8') for v in valores]
+        offsets = np.zeros(len(codificados) + 1, dtype=np.int64)
+        np.cumsum([len(c) for c in codificados], out=offsets[1:])
+        return cls(b''.join(codificados), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.buffer[int(self.offsets[i]):int(self.offsets[i + 1])]).decode('utf-8')
+
+
+class CatalogoArticulos:
+    """
+    Secuencia de artículos guardada por columnas. catalogo[i] devuelve el
+    diccionario de evidencia (_id, title, url, fuente, update_date y, si la
+    nota salió en varios medios, 'fuentes').
+    """
+
+    __slots__ = ("ids", "titulos", "urls", "codigos_fuente", "nombres_fuente", "fechas", "fuentes_extra")
+
+    def __init__(self, ids, titulos, urls, codigos_fuente, nombres_fuente, fechas, fuentes_extra=None):
+        self.ids = ids
+        self.titulos = titulos
+        self.urls = urls
+        self.codigos_fuente = codigos_fuente  # np.uint8
+        self.nombres_fuente = list(nombres_fuente)
+        self.fechas = fechas  # np.datetime64[s]
+        self.fuentes_extra = fuentes_extra or {}  # fila -> [{'fuente', 'url', '_id'}, ...]
+
+    @classmethod
+    def construir(cls, noticias, fuentes_por_posicion: dict = None):
+        """
+        Arma el catálogo a partir de Articulo (o diccionarios), sin modificarlos.
+        'fuentes_por_posicion' agrega la lista de medios de las notas duplicadas.
+        """
+        nombres = list(FUENTES_CONOCIDAS)
+        codigo_de = {nombre: i for i, nombre in enumerate(nombres)}
+        ids, titulos, urls, codigos, fechas = [], [], [], [], []
+
+        for a in map(como_articulo, noticias):
+            if a.fuente not in codigo_de:
+                codigo_de[a.fuente] = len(nombres)
+                nombres.append(a.fuente)
+            ids.append(str(a.id or ''))
+            titulos.append(a.titulo)
+            urls.append(a.url)
+            codigos.append(codigo_de[a.fuente])
+            fechas.append(_fecha(a.fecha))
+
+        if len(nombres) > 256:
+            raise ValueError("Demasiadas fuentes distintas para el catálogo (máx. 256).")
+        return cls(ColumnaTexto.desde_lista(ids), ColumnaTexto.desde_lista(titulos),
+                   ColumnaTexto.desde_lista(urls), np.array(codigos, dtype=np.uint8), nombres,
+                   np.array(fechas, dtype='datetime64[s]'), dict(fuentes_por_posicion or {}))
+
+    @classmethod
+    def unir(cls, partes):
+        """ Catálogo con las filas (catalogo, filas) de cada parte, en orden (para compactar). """
+        articulos, extras = [], {}
+        for catalogo, filas in partes:
+            for f in filas:
+                if int(f) in catalogo.fuentes_extra:
+                    extras[len(articulos)] = catalogo.fuentes_extra[int(f)]
+                articulos.append(catalogo[f])
+        return cls.construir(articulos, extras)
+
+    def __len__(self):
+        return len(self.codigos_fuente)
+
+    def fuente(self, i) -> str:
+        return self.nombres_fuente[int(self.codigos_fuente[i])]
+
+    def __getitem__(self, i):
+        i = int(i)
+        if i < 0:
+            i += len(self)
+        fecha = self.fechas[i]
+        articulo = {
+            "_id": self.ids[i] or None,
+            "title": self.titulos[i],
+            "url": self.urls[i],
+            "fuente": self.fuente(i),
+            "update_date": None if np.isnat(fecha) else str(fecha).replace('T', ' '),
+        }
+        if i in self.fuentes_extra:
+            articulo["fuentes"] = self.fuentes_extra[i]
+        return articulo
@@ -0,0 +1,544 @@
+"""
+corpus_index.py — Índice precalculado del corpus de noticias
+Limpia y vectoriza TODAS las noticias una sola vez en matrices dispersas
+(CSR) normalizadas L2, para que cada consulta sea un producto
+matriz-vector + top-k en lugar de un bucle Python por artículo.
+
+El índice está formado por SEGMENTOS inmutables (como Lucene):
+  - Un artículo nuevo se limpia, vectoriza y se agrega en un segmento nuevo.
+  - Un artículo borrado se marca como "muerto" (lápida) en su segmento.
+  - Un artículo actualizado = lápida + agregado.
+Así, actualizar el índice cuesta lo proporcional al delta, no al corpus.
+Cuando hay demasiados segmentos o lápidas, se compacta.
+
+Escalonado por antigüedad (caliente / frío):
+  - Los artículos de los últimos DIAS_CALIENTES días van a segmentos
+    "calientes"; los más viejos, a un segmento "frío" comprimido (pesos en
+    float32: la mitad de memoria que float64).
+  - Una consulta puntúa primero solo los calientes; el frío se consulta
+    únicamente si ningún artículo caliente llega a EVIDENCE_THRESHOLD.
+    Así la latencia típica no crece con el archivo histórico.
+  - Los artículos pasan de caliente a frío al compactar (o reconstruir).
+Los metadatos de evidencia de cada segmento viven en un catálogo columnar
+(ver catalogo.py), no en los diccionarios originales.
+"""
+
+import os
+import hashlib
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+from sklearn.preprocessing import normalize
+
+from ai_engine.ai_utils import limpiar_textos, EVIDENCE_THRESHOLD
+from ai_engine.retrieval import IndiceInvertido, seleccionar_top_k
+from ai_engine.duplicados import AgrupadorDuplicados, fusionar_fuentes
+from ai_engine.catalogo import CatalogoArticulos
+from ai_engine.articulo import Articulo, como_articulo, textos
+from ai_engine.corpus_reader import en_bloques, actualizar_huella, TAM_BLOQUE_CORPUS
+
+# Límites para compactar el índice (fusionar segmentos y purgar lápidas)
+MAX_SEGMENTOS = 8
+MAX_FRACCION_BORRADOS = 0.25
+
+# Antigüedad (en días) del nivel caliente; 0 desactiva el escalonado
+DIAS_CALIENTES = int(os.environ.get("DIAS_CALIENTES", 90))
+
+
+def _texto_articulo(a: Articulo) -> str:
+    """ Combina título, teaser y contenido completo. """
+    return a.texto()
+
+
+def _clave_articulo(a: Articulo) -> str:
+    """ Identificador del artículo dentro del índice (_id, URL, slug o hash del texto). """
+    clave = a.id or a.url or a.slug
+    if clave:
+        return str(clave)
+    return "texto:" + hashlib.sha1(_texto_articulo(a).encode('utf-8', 'ignore')).hexdigest()[:16]
+
+
+def _firma_articulo(a: Articulo) -> tuple:
+    """
+    Firma barata del contenido: si cambia, el artículo se reindexa. No mira
+    el cuerpo (se cargaría del almacén): una nota editada cambia su fecha.
+    """
+    return (a.fecha, a.titulo or None, len(a.teaser))
+
+
+def _articulos(noticias) -> list:
+    """ Articulo (o diccionarios del JSON) -> lista de Articulo, sin items corruptos. """
+    return [a for a in map(como_articulo, noticias or []) if a is not None]
+
+
+def huella_db(db_news: list) -> str:
+    """
+    Huella de la lista de noticias (IDs + fecha de actualización). Sirve para
+    saber si el índice en memoria sigue correspondiendo a la DB. Un Corpus
+    (corpus_reader.cargar_corpus) ya la trae: solo se recorre una lista suelta.
+    """
+    huella = getattr(db_news, "huella", None)
+    if huella is not None:
+        return huella
+    h = hashlib.sha1()
+    for a in _articulos(db_news):
+        actualizar_huella(h, a)
+    return f"{len(db_news)}-{h.hexdigest()}"
+
+
+def limite_caliente():
+    """ Fecha (datetime64[s]) desde la que un artículo es "caliente"; None si no hay escalonado. """
+    if DIAS_CALIENTES <= 0:
+        return None
+    return np.datetime64(datetime.now() - timedelta(days=DIAS_CALIENTES), 's')
+
+
+class SegmentoIndice:
+    """
+    Porción inmutable del índice: artículos, su matriz normalizada L2,
+    su índice invertido y la máscara de filas vivas (lápidas).
+    Un segmento 'frio' guarda la matriz en float32 y solo se consulta si
+    los calientes no alcanzan el umbral de evidencia.
+    """
+
+    __slots__ = ("articulos", "claves", "matriz", "invertido", "vivos", "frio")
+
+    def __init__(self, articulos, claves: list, matriz, vivos=None, invertido=None, frio: bool = False):
+        if frio and matriz.dtype != np.float32:
+            matriz = matriz.astype(np.float32)
+        self.articulos = articulos  # CatalogoArticulos (en memoria o mapeado desde disco)
+        self.claves = claves
+        self.matriz = matriz  # scipy.sparse.csr_matrix (n_articulos x n_terminos)
+        self.invertido = invertido if invertido is not None else IndiceInvertido(matriz)
+        self.vivos = vivos if vivos is not None else np.ones(len(articulos), dtype=bool)
+        self.frio = frio
+
+    def __len__(self):
+        return len(self.articulos)
+
+    @classmethod
+    def construir(cls, vectorizer, noticias, tam_bloque: int = TAM_BLOQUE_CORPUS):
+        """
+        Limpia y vectoriza los artículos por bloques de 'tam_bloque' (acepta
+        un generador: solo el bloque en curso guarda el texto completo) y
+        guarda sus metadatos en un catálogo columnar. No modifica los
+        artículos recibidos. Si una clave se repite (ej. el JSON antiguo en
+        forma de lista) gana la última aparición: la fila anterior queda
+        como lápida (ver separar_por_antiguedad, que la descarta).
+        """
+        articulos = (a for a in map(como_articulo, noticias or []) if a is not None)
+
+        # Casi duplicados (la misma nota en varios medios): se indexa solo el
+        # primero, con las fuentes de todos
+        agrupador = AgrupadorDuplicados()
+        fila_de = {}  # posición entre los candidatos -> fila del canónico
+        canonico_de = {}  # fila -> su posición entre los candidatos
+        fila_de_clave = {}  # clave -> fila de su última aparición
+        reemplazadas = []  # Filas de una clave que volvió a aparecer
+        metadatos, claves, matrices = [], [], []
+
+        for bloque in en_bloques(articulos, tam_bloque):
+            # Los cuerpos perezosos del bloque se piden juntos (ver articulo.textos)
+            pares = [(n, t) for n, t in zip(bloque, textos(bloque)) if t.strip()]
+            limpios = limpiar_textos([t for _, t in pares])
+            textos_limpios = []
+            for (n, _), texto_limpio in zip(pares, limpios):
+                clave = _clave_articulo(n)
+                anterior = fila_de_clave.pop(clave, None)
+                if anterior is not None:
+                    reemplazadas.append(anterior)
+                i = len(agrupador.canonicos)
+                c = agrupador.agregar(texto_limpio)
+                # (Parecerse a su versión anterior no lo hace duplicado: la reemplaza)
+                if c != i and not (c in fila_de and fila_de[c] == anterior):
+                    destino = fila_de.get(c)
+                    if destino is not None:
+                        fusionar_fuentes(metadatos[destino], n)
+                elif texto_limpio:
+                    destino = fila_de[i] = fila_de_clave[clave] = len(metadatos)
+                    canonico_de[destino] = i
+                    # Solo lo que va al catálogo (sin el texto)
+                    metadatos.append(Articulo(id=n.id, titulo=n.titulo, url=n.url, fuente=n.fuente, fecha=n.fecha,
+                                              fuentes=list(n.fuentes) if n.fuentes else None))
+                    claves.append(clave)
+                    textos_limpios.append(texto_limpio)
+                else:
+                    destino = None
+                if anterior is not None:
+                    # Lo que se había fusionado con la versión anterior (y lo que
+                    # aún llegue parecido a ella) pasa a donde quedó la nueva
+                    fila_de[canonico_de.pop(anterior)] = destino
+                    if destino is not None and metadatos[anterior].fuentes:
+                        fusionar_fuentes(metadatos[destino], metadatos[anterior])
+            if textos_limpios:
+                matrices.append(normalize(vectorizer.transform(textos_limpios), norm='l2', copy=False).tocsr())
+
+        if not matrices:
+            return None
+        from scipy.sparse import vstack
+        matriz = matrices[0] if len(matrices) == 1 else vstack(matrices, format='csr')
+        fuentes_por_fila = {fila: a.fuentes for fila, a in enumerate(metadatos) if a.fuentes}
+        vivos = np.ones(len(metadatos), dtype=bool)
+        vivos[reemplazadas] = False
+        return cls(CatalogoArticulos.construir(metadatos, fuentes_por_fila), claves, matriz, vivos=vivos)
+
+    @classmethod
+    def desde_filas(cls, partes, frio: bool = False):
+        """ Segmento nuevo con las filas [(segmento, filas), ...] indicadas, en orden. """
+        from scipy.sparse import vstack
+
+        partes = [(seg, filas) for seg, filas in partes if len(filas)]
+        if not partes:
+            return None
+        if len(partes) == 1 and len(partes[0][1]) == len(partes[0][0]):
+            seg = partes[0][0]  # Segmento completo: se reutilizan catálogo y claves
+            return cls(seg.articulos, seg.claves, seg.matriz, frio=frio,
+                       invertido=seg.invertido if seg.frio == frio else None)
+        claves = [seg.claves[f] for seg, filas in partes for f in filas]
+        matriz = vstack([seg.matriz[filas] for seg, filas in partes], format='csr')
+        return cls(CatalogoArticulos.unir([(seg.articulos, filas) for seg, filas in partes]), claves, matriz,
+                   frio=frio)
+
+    def con_lapidas(self, filas):
+        """ Copia del segmento con las 'filas' marcadas como borradas (comparte la matriz). """
+        vivos = self.vivos.copy()
+        vivos[list(filas)] = False
+        segmento = object.__new__(SegmentoIndice)
+        segmento.articulos, segmento.claves = self.articulos, self.claves
+        segmento.matriz, segmento.invertido = self.matriz, self.invertido
+        segmento.vivos, segmento.frio = vivos, self.frio
+        return segmento
+
+
+def separar_por_antiguedad(partes, limite=None) -> list:
+    """
+    Reparte las filas vivas [(segmento, filas), ...] en un segmento caliente
+    (fecha >= límite o desconocida) y uno frío (más viejo). Devuelve la
+    lista de segmentos no vacíos: [caliente, frío].
+    """
+    limite = limite_caliente() if limite is None else limite
+    partes = [(seg, np.asarray(filas, dtype=np.int64)) for seg, filas in partes]
+    if limite is None:
+        return [s for s in [SegmentoIndice.desde_filas(partes)] if s is not None]
+
+    calientes, frias = [], []
+    for seg, filas in partes:
+        viejas = seg.articulos.fechas[filas] < limite  # (NaT nunca es menor: queda caliente)
+        calientes.append((seg, filas[~viejas]))
+        frias.append((seg, filas[viejas]))
+    segmentos = [SegmentoIndice.desde_filas(calientes), SegmentoIndice.desde_filas(frias, frio=True)]
+    return [s for s in segmentos if s is not None]
+
+
+class IndiceCorpus:
+    """
+    Índice del corpus completo: lista de segmentos + mapa clave -> (segmento, fila).
+    Es inmutable hacia afuera: cada actualización devuelve un índice nuevo
+    que comparte los segmentos no modificados, y se publica con un simple
+    cambio de referencia (las consultas en curso no se bloquean).
+    """
+
+    def __init__(self, vectorizer, segmentos: list, huella: str, firmas: dict = None, ubicacion: dict = None):
+        self.vectorizer = vectorizer
+        self.segmentos = [s for s in segmentos if s is not None]
+        self.huella = huella
+        self.firmas = firmas if firmas is not None else {}
+
+        if ubicacion is None:
+            ubicacion = {}
+            for i, seg in enumerate(self.segmentos):
+                for fila in np.flatnonzero(seg.vivos):
+                    ubicacion[seg.claves[fila]] = (i, int(fila))
+        self.ubicacion = ubicacion
+
+        # Desplazamiento global de cada segmento (orden del corpus)
+        tamanos = [len(s) for s in self.segmentos]
+        self._inicios = np.concatenate(([0], np.cumsum(tamanos))).astype(np.int64)
+        self._calientes = [i for i, s in enumerate(self.segmentos) if not s.frio]
+        self._frios = [i for i, s in enumerate(self.segmentos) if s.frio]
+
+    def __len__(self):
+        return len(self.ubicacion)
+
+    @property
+    def articulos(self):
+        """ Artículos vivos, en orden del corpus. """
+        return [seg.articulos[f] for seg in self.segmentos for f in np.flatnonzero(seg.vivos)]
+
+    @property
+    def n_borrados(self):
+        return int(sum(len(s) - int(s.vivos.sum()) for s in self.segmentos))
+
+    @property
+    def n_frios(self):
+        """ Artículos vivos en el nivel frío. """
+        return int(sum(int(self.segmentos[i].vivos.sum()) for i in self._frios))
+
+    def esta_compactado(self) -> bool:
+        """ Sin lápidas y con a lo sumo un segmento por nivel (como queda tras compactar). """
+        return self.n_borrados == 0 and len(self._calientes) <= 1 and len(self._frios) <= 1
+
+    # -----------------------------
+    # Construcción completa
+    # -----------------------------
+    @classmethod
+    def construir(cls, vectorizer, db_news, huella: str = None):
+        """
+        Normaliza, limpia y vectoriza el corpus completo (un segmento
+        caliente y, si hay artículos viejos, uno frío).
+        'db_news' puede ser una lista o un generador (ej. corpus_reader.iterar_articulos):
+        se recorre UNA sola vez, calculando firmas y huella en la misma pasada.
+        """
+        firmas, h, total = {}, hashlib.sha1(), 0
+
+        def recorrer():
+            nonlocal total
+            for n in db_news or []:
+                total += 1
+                a = como_articulo(n)
+                if a is None:
+                    continue
+                firmas[_clave_articulo(a)] = _firma_articulo(a)
+                actualizar_huella(h, a)
+                yield a
+
+        segmento = SegmentoIndice.construir(vectorizer, recorrer())
+        segmentos = separar_por_antiguedad([(segmento, np.flatnonzero(segmento.vivos))]) if segmento is not None else []
+        return cls(vectorizer, segmentos, huella or f"{total}-{h.hexdigest()}", firmas)
+
+    # -----------------------------
+    # Actualización incremental
+    # -----------------------------
+    def aplicar_cambios(self, nuevos: list = (), eliminados=(), huella: str = None):
+        """
+        Devuelve un índice NUEVO con los artículos 'nuevos' (o actualizados)
+        agregados en un segmento propio (o dos, si el delta trae artículos
+        viejos: uno caliente y uno frío) y los 'eliminados' (claves) marcados
+        con lápida. Solo se limpia y vectoriza el delta.
+        """
+        nuevos = _articulos(nuevos)
+        claves_nuevas = [_clave_articulo(n) for n in nuevos]
+        a_borrar = set(eliminados) | set(claves_nuevas)
+
+        ubicacion = dict(self.ubicacion)
+        firmas = dict(self.firmas)
+
+        # --- 1. Lápidas (por segmento) ---
+        filas_por_segmento = {}
+        for clave in a_borrar:
+            pos = ubicacion.pop(clave, None)
+            if pos is not None:
+                filas_por_segmento.setdefault(pos[0], []).append(pos[1])
+            firmas.pop(clave, None)
+        segmentos = [seg.con_lapidas(filas_por_segmento[i]) if i in filas_por_segmento else seg
+                     for i, seg in enumerate(self.segmentos)]
+
+        # --- 2. Segmento nuevo con el delta ---
+        segmento_nuevo = SegmentoIndice.construir(self.vectorizer, nuevos) if nuevos else None
+        if segmento_nuevo is not None:
+            segmentos.extend(separar_por_antiguedad([(segmento_nuevo, np.flatnonzero(segmento_nuevo.vivos))]))
+        for clave, n in zip(claves_nuevas, nuevos):
+            firmas[clave] = _firma_articulo(n)
+
+        for idx in range(len(self.segmentos), len(segmentos)):
+            for fila, clave in enumerate(segmentos[idx].claves):
+                ubicacion[clave] = (idx, fila)
+
+        indice = IndiceCorpus(self.vectorizer, segmentos, huella or self.huella, firmas, ubicacion)
+        if indice.necesita_compactar():
+            indice = indice.compactar()
+        return indice
+
+    def sincronizar(self, db_news: list, huella: str = None):
+        """
+        Compara la DB con el índice (por clave y firma) y aplica solo el delta:
+        artículos nuevos, actualizados y borrados.
+        """
+        actuales = {}
+        for a in _articulos(db_news):
+            actuales[_clave_articulo(a)] = a
+
+        eliminados = [clave for clave in self.firmas if clave not in actuales]
+        nuevos = [n for clave, n in actuales.items() if self.firmas.get(clave) != _firma_articulo(n)]
+
+        if not nuevos and not eliminados:
+            self.huella = huella or self.huella
+            return self
+
+        print(f"⚙️  Actualización incremental del índice: +{len(nuevos)} / -{len(eliminados)} artículos")
+        return self.aplicar_cambios(nuevos, eliminados, huella=huella)
+
+    def necesita_compactar(self) -> bool:
+        total = int(self._inicios[-1])
+        return (len(self.segmentos) > MAX_SEGMENTOS
+                or (total > 0 and self.n_borrados / total > MAX_FRACCION_BORRADOS))
+
+    def compactar(self):
+        """
+        Fusiona los segmentos descartando las filas borradas: queda un
+        segmento caliente y uno frío (los artículos que ya pasaron los
+        DIAS_CALIENTES bajan al frío aquí).
+        """
+        partes = [(seg, np.flatnonzero(seg.vivos)) for seg in self.segmentos]
+        return IndiceCorpus(self.vectorizer, separar_por_antiguedad(partes), self.huella, dict(self.firmas))
+
+    # -----------------------------
+    # Consultas
+    # -----------------------------
+    def _articulo_global(self, posicion: int):
+        s = int(np.searchsorted(self._inicios, posicion, side='right')) - 1
+        return self.segmentos[s].articulos[posicion - self._inicios[s]]
+
+    def _combinar(self, por_segmento: dict):
+        """
+        Une los (candidatos, puntajes) de cada segmento {i: (cand, punt)} en
+        posiciones globales ascendentes, sin lápidas.
+        """
+        candidatos, puntajes = [], []
+        for i, (cand, punt) in sorted(por_segmento.items(), key=lambda x: x[0]):
+            if cand.size == 0:
+                continue
+            vivos = self.segmentos[i].vivos[cand]
+            candidatos.append(cand[vivos] + self._inicios[i])
+            puntajes.append(punt[vivos])
+        if not candidatos:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        return np.concatenate(candidatos), np.concatenate(puntajes)
+
+    @staticmethod
+    def _hay_evidencia(puntajes) -> bool:
+        """ ¿Algún puntaje alcanza el umbral de evidencia? (si no, se consulta el nivel frío) """
+        return puntajes.size > 0 and float(puntajes.max()) >= EVIDENCE_THRESHOLD
+
+    def buscar(self, vector_usuario, top_k: int = 1):
+        """
+        Devuelve [(articulo, similitud), ...] con los top_k mejores artículos,
+        puntuando solo los que comparten algún término con la consulta.
+        Los segmentos fríos solo se puntúan si ningún caliente llega a
+        EVIDENCE_THRESHOLD.
+        """
+        q = normalize(vector_usuario, norm='l2', copy=True)
+        por_segmento = {i: self.segmentos[i].invertido.puntuar_candidatos(q) for i in self._calientes}
+        candidatos, puntajes = self._combinar(por_segmento)
+        if self._frios and not self._hay_evidencia(puntajes):
+            por_segmento.update((i, self.segmentos[i].invertido.puntuar_candidatos(q)) for i in self._frios)
+            candidatos, puntajes = self._combinar(por_segmento)
+        return [(self._articulo_global(pos), sim) for pos, sim in seleccionar_top_k(candidatos, puntajes, top_k)]
+
+    def buscar_lote(self, matriz_consultas, top_k: int = 1):
+        """
+        Puntúa VARIAS consultas (una fila por consulta) con un producto
+        matriz-matriz disperso por segmento. Devuelve una lista de resultados
+        como buscar(). Los segmentos fríos se multiplican solo por las
+        consultas que no encontraron evidencia en los calientes.
+        """
+        n_consultas = matriz_consultas.shape[0]
+        q = normalize(matriz_consultas, norm='l2', copy=True)
+
+        def puntuar(indices_segmento, consultas):
+            por_segmento = {}
+            for i in indices_segmento:
+                puntajes = (self.segmentos[i].matriz @ consultas.T).tocsc()  # (n_articulos x n_consultas)
+                puntajes.sort_indices()
+                por_segmento[i] = puntajes
+            return por_segmento
+
+        def columna(p, j):
+            return p.indices[p.indptr[j]:p.indptr[j + 1]], p.data[p.indptr[j]:p.indptr[j + 1]]
+
+        calientes = puntuar(self._calientes, q)
+        combinados = [self._combinar({i: columna(p, j) for i, p in calientes.items()}) for j in range(n_consultas)]
+
+        sin_evidencia = [j for j, (_, puntajes) in enumerate(combinados) if not self._hay_evidencia(puntajes)]
+        if self._frios and sin_evidencia:
+            frios = puntuar(self._frios, q[sin_evidencia])
+            for k, j in enumerate(sin_evidencia):
+                por_segmento = {i: columna(p, j) for i, p in calientes.items()}
+                por_segmento.update((i, columna(p, k)) for i, p in frios.items())
+                combinados[j] = self._combinar(por_segmento)
+
+        resultados = []
+        for candidatos, puntajes in combinados:
+            top = seleccionar_top_k(candidatos, puntajes, top_k)
+            resultados.append([(self._articulo_global(pos), sim) for pos, sim in top])
+        return resultados
+
+    def mejor_coincidencia(self, vector_usuario):
+        """ Devuelve (articulo, similitud) del mejor match, o (None, 0.0). """
+        resultados = self.buscar(vector_usuario, top_k=1)
+        if not resultados:
+            return None, 0.0
+        return resultados[0]
+
+
+# --- Índice vigente en memoria (uno por proceso) ---
+_indice_actual = None
+_generacion = 0  # Se incrementa cada vez que se publica un índice distinto
+_lock_actualizacion = threading.Lock()
+
+
+def _publicar(indice):
+    """ Publica 'indice' como vigente (cambio de referencia) y sube la generación. """
+    global _indice_actual, _generacion
+    if indice is not _indice_actual:
+        _indice_actual = indice
+        _generacion += 1
+
+
+def generacion_indice() -> int:
+    """ Generación del índice vigente (sirve para sellar cachés de resultados). """
+    return _generacion
+
+
+def obtener_indice(vectorizer, db_news: list) -> IndiceCorpus:
+    """
+    Devuelve el índice del corpus. Si cambió el vectorizador se reconstruye
+    completo; si solo cambiaron las noticias, se aplica el delta.
+    """
+    db_news = db_news or []
+    huella = huella_db(db_news)
+    indice = _indice_actual
+    if indice is not None and indice.huella == huella and indice.vectorizer is vectorizer:
+        return indice
+
+    with _lock_actualizacion:
+        indice = _indice_actual
+        if indice is not None and indice.huella == huella and indice.vectorizer is vectorizer:
+            return indice
+
+        # (El registro de modelos entrega siempre el MISMO objeto por versión)
+        if indice is None or indice.vectorizer is not vectorizer:
+            # 1º: el índice en disco (memmap, compartido entre procesos) + delta
+            from ai_engine.index_store import abrir_indice
+            indice = abrir_indice(vectorizer)
+            if indice is not None and indice.huella != huella:
+                indice = indice.sincronizar(db_news, huella=huella)
+        if indice is None or indice.vectorizer is not vectorizer:
+            print("⚙️  Construyendo índice del corpus (matriz TF-IDF precalculada)...")
+            indice = IndiceCorpus.construir(vectorizer, db_news, huella=huella)
+        elif indice.huella != huella:
+            indice = indice.sincronizar(db_news, huella=huella)
+        _publicar(indice)
+        print(f"✅ Índice listo con {len(indice)} artículos ({len(indice.segmentos)} segmento/s, "
+              f"{indice.n_frios} en el nivel frío).")
+    return indice
+
+
+def ingerir_articulos(nuevos: list = (), eliminados=()):
+    """
+    Ruta de ingesta incremental: agrega/actualiza 'nuevos' y borra las
+    claves 'eliminados' en el índice vivo, vectorizando solo el delta con el
+    modelo actual. No hace nada si aún no hay índice construido.
+    """
+    with _lock_actualizacion:
+        if _indice_actual is None:
+            return None
+        _publicar(_indice_actual.aplicar_cambios(nuevos, eliminados))
+        return _indice_actual
+
+
+def instalar_indice(indice: IndiceCorpus):
+    """ Sustituye atómicamente el índice en memoria (ej. tras un reentrenamiento). """
+    with _lock_actualizacion:
+        _publicar(indice)
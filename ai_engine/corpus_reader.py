@@ -0,0 +1,200 @@
+"""
+corpus_reader.py — Lector único (en streaming) del corpus de noticias
+Antes había dos '_load_json_database' (web_app/app.py y model_loader.py) que
+hacían json.load del archivo completo y luego list(data.values()): el pico
+de memoria era varias veces el tamaño del JSON.
+
+iterar_articulos() entrega los artículos de a uno, como Articulo con SOLO
+los campos que usa el motor (sin 'extra' ni duplicados colapsados):
+  - del snapshot binario (corpus_snapshot) si corresponde a la versión
+    actual del almacén: es lo más rápido para el arranque en frío;
+  - del almacén de noticias (news_store: SQLite o segmentos JSONL), que ya
+    se recorre con un cursor / línea por línea;
+  - o, si el almacén no se puede abrir, del JSON antiguo leído por bloques
+    (iterar_registros_json) sin cargar el archivo entero.
+El corpus de entrenamiento y el índice lo consumen por bloques, así su
+memoria no depende del tamaño del corpus (solo del bloque en curso).
+Con con_contenido=False (la caché de Flask) salen solo los metadatos (de un
+snapshot vigente, sin decodificar los cuerpos, o del almacén, grabando de
+paso el snapshot de metadatos): el cuerpo de cada artículo se pide al
+almacén por _id si alguien lo lee (el índice los pide por bloques, ver
+articulo.textos).
+cargar_corpus() devuelve un Corpus: la lista + su huella, calculada en la
+misma pasada para que el índice no tenga que recorrerla en cada consulta.
+"""
+
+import json
+import hashlib
+import sqlite3
+from itertools import islice
+
+from ai_engine.articulo import Articulo
+from ai_engine.news_store import obtener_store, JSON_PATH
+from ai_engine import corpus_snapshot
+from ai_engine.corpus_snapshot import iterar_snapshot, EscritorSnapshot, SnapshotInvalido
+
+TAM_LECTURA = 1 << 20  # Caracteres leídos del JSON por vez
+TAM_BLOQUE_CORPUS = 2000  # Artículos que se limpian/vectorizan juntos
+
+_ESPACIOS = " \t\r\n"
+
+
+def iterar_registros_json(ruta: str, tam_lectura: int = TAM_LECTURA):
+    """
+    Genera los registros de un JSON {id: noticia} o [noticia, ...] sin
+    cargarlo completo: se decodifica un valor a la vez sobre un buffer que
+    solo guarda el registro en curso.
+    """
+    decodificador = json.JSONDecoder()
+    with open(ruta, "r", encoding="utf-8") as f:
+        buffer, pos, fin_archivo = "", 0, False
+
+        def siguiente_caracter():
+            """ Salta espacios (y comas) y devuelve el siguiente carácter ('' si se acabó). """
+            nonlocal buffer, pos, fin_archivo
+            while True:
+                while pos < len(buffer) and buffer[pos] in _ESPACIOS + ",":
+                    pos += 1
+                if pos < len(buffer) or fin_archivo:
+                    return buffer[pos] if pos < len(buffer) else ""
+                buffer, pos = f.read(tam_lectura), 0
+                fin_archivo = not buffer
+
+        def decodificar():
+            """ Decodifica el valor que empieza en 'pos' (leyendo más si está incompleto). """
+            nonlocal buffer, pos, fin_archivo
+            while True:
+                try:
+                    valor, fin = decodificador.raw_decode(buffer, pos)
+                    if fin < len(buffer) or fin_archivo:
+                        pos = fin
+                        return valor
+                except json.JSONDecodeError:
+                    if fin_archivo:
+                        raise
+                mas = f.read(tam_lectura)
+                fin_archivo = not mas
+                buffer, pos = buffer[pos:] + mas, 0
+
+        apertura = siguiente_caracter()
+        if apertura not in ("{", "["):
+            raise ValueError(f"{ruta} no contiene un objeto ni una lista JSON.")
+        pos += 1
+        cierre = "}" if apertura == "{" else "]"
+
+        while True:
+            c = siguiente_caracter()
+            if c in (cierre, ""):
+                return
+            if apertura == "{":
+                decodificar()  # La clave (_id): el registro ya la trae
+                if siguiente_caracter() != ":":
+                    raise ValueError(f"{ruta}: se esperaba ':' en la posición {pos}.")
+                pos += 1
+                siguiente_caracter()
+            registro = decodificar()
+            if isinstance(registro, dict):
+                yield registro
+
+
+def _iterar_json(archivo: str):
+    try:
+        for n in iterar_registros_json(archivo):
+            if not n.get('duplicado_de'):
+                yield Articulo.desde_dict(n)
+    except FileNotFoundError:
+        print(f"Advertencia: No se encontró el archivo de base de datos {archivo}")
+    except (ValueError, OSError) as e:  # (json.JSONDecodeError es un ValueError)
+        print(f"Error: El archivo {archivo} está corrupto o no se pudo leer: {e}")
+
+
+def iterar_articulos(archivo: str = JSON_PATH, usar_snapshot: bool = True, con_contenido: bool = True):
+    """
+    Genera los Articulo del corpus (sin duplicados ni campos extra). Orden de
+    preferencia: snapshot binario vigente (corpus_snapshot) -> almacén de
+    noticias (y, de paso, se regenera el snapshot) -> JSON 'archivo'.
+    Sin 'con_contenido' salen sin los cuerpos: del snapshot completo o del
+    de metadatos si alguno está vigente; si no, del almacén (y se regenera
+    el de metadatos).
+    """
+    try:
+        store = obtener_store()
+        version = store.version()  # Abre el almacén aquí (para poder caer al JSON)
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ No se pudo leer el almacén de noticias ({e}). Usando {archivo}.")
+        yield from _iterar_json(archivo)
+        return
+
+    # El completo sirve para los dos casos; el de metadatos, solo sin cuerpos
+    rutas = [corpus_snapshot.SNAPSHOT_PATH] if con_contenido else [corpus_snapshot.SNAPSHOT_PATH,
+                                                                   corpus_snapshot.SNAPSHOT_METADATOS_PATH]
+    emitidos = 0
+    for ruta in rutas if usar_snapshot else ():
+        try:
+            for a in iterar_snapshot(version, ruta, con_contenido=con_contenido):
+                yield a
+                emitidos += 1
+            return
+        except SnapshotInvalido as e:
+            if emitidos:
+                print(f"⚠️ Snapshot del corpus dañado a mitad de lectura ({e}). Se sigue desde el almacén.")
+                break
+
+    # Snapshot ausente, viejo o dañado: se lee el almacén y se graba uno nuevo
+    # (se publica solo si el recorrido termina completo)
+    escritor = None
+    if usar_snapshot:
+        try:
+            escritor = EscritorSnapshot(version, rutas[-1], con_contenido=con_contenido)
+        except OSError as e:
+            print(f"⚠️ No se pudo crear el snapshot del corpus: {e}")
+    completo = False
+    try:
+        for i, a in enumerate(store.articulos(con_contenido=con_contenido)):
+            if escritor is not None:
+                escritor.agregar(a)
+            if i >= emitidos:  # (los ya entregados desde un snapshot dañado no se repiten)
+                yield a
+        completo = True
+    finally:
+        if escritor is not None:
+            if completo:
+                escritor.confirmar()
+            else:
+                escritor.descartar()
+
+
+def actualizar_huella(h, a: Articulo):
+    """ Suma el artículo (ID + fecha de actualización) a la huella 'h' (sha1). """
+    h.update(str(a.id or a.url or '').encode('utf-8', 'ignore'))
+    h.update(b'\x00')
+    h.update(str(a.fecha or '').encode('utf-8', 'ignore'))
+    h.update(b'\x01')
+
+
+class Corpus(list):
+    """
+    Lista de Articulo + 'huella' (ver corpus_index.huella_db) calculada al
+    cargarla. Viaja con la lista aunque la caché de Flask la serialice.
+    """
+    huella = None
+
+
+def en_bloques(articulos, tam_bloque: int = TAM_BLOQUE_CORPUS):
+    """ Agrupa un iterable de artículos en listas de hasta 'tam_bloque'. """
+    articulos = iter(articulos)
+    while True:
+        bloque = list(islice(articulos, tam_bloque))
+        if not bloque:
+            return
+        yield bloque
+
+
+def cargar_corpus(archivo: str = JSON_PATH, con_contenido: bool = True) -> Corpus:
+    """ Corpus (lista de Articulo) para quien lo necesita en memoria, ej. la caché de Flask. """
+    corpus, h = Corpus(), hashlib.sha1()
+    for a in iterar_articulos(archivo, con_contenido=con_contenido):
+        actualizar_huella(h, a)
+        corpus.append(a)
+    corpus.huella = f"{len(corpus)}-{h.hexdigest()}"
+    return corpus
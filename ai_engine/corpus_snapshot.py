@@ -0,0 +1,251 @@
+"""
+corpus_snapshot.py — Snapshot binario del corpus normalizado (arranque en frío)
+Leer el corpus desde el almacén (o, peor, del JSON con indent=4 / indent=2)
+obliga a decodificar JSON o filas SQL artículo por artículo. El snapshot
+guarda los mismos artículos (solo los campos del motor) por COLUMNAS:
+
+    models/corpus_snapshot.bin
+      b"CORPUS01"
+      bloque 0 .. bloque k       -> pickle (protocolo 5) + buffers fuera de banda
+      pie JSON                   -> versión del almacén, offsets, hash de cada bloque
+      longitud del pie (uint64) + b"CORPUS01"
+
+Cada bloque (TAM_BLOQUE_SNAPSHOT artículos) lleva cada campo como UN solo
+buffer UTF-8 (valores separados por '\\x1f'), pasado fuera de banda: cargar
+es leer el bloque con readinto, verificar su hash (sha256) y hacer un
+decode + split por columna, sin copias intermedias.
+
+El snapshot se regenera solo cuando cambia la versión del almacén
+(NewsStore.version / RegistroSegmentos.version); si no coincide o un hash
+falla, se ignora y se vuelve a leer el almacén.
+
+Quien lee solo metadatos (la caché de Flask) tiene su propio snapshot sin
+cuerpos (SNAPSHOT_METADATOS_PATH, con_contenido=False en el pie): lo graba
+él mismo al leer el almacén, así su arranque en frío no depende de que un
+reentrenamiento regenere el completo.
+"""
+
+import os
+import json
+import pickle
+import struct
+import hashlib
+
+from ai_engine.articulo import Articulo
+
+SNAPSHOT_PATH = os.environ.get("CORPUS_SNAPSHOT_PATH", "models/corpus_snapshot.bin")
+SNAPSHOT_METADATOS_PATH = os.environ.get("CORPUS_SNAPSHOT_METADATOS_PATH", "models/corpus_snapshot_metadatos.bin")
+FORMATO = 1
+MAGIA = b"CORPUS01"
+TAM_BLOQUE_SNAPSHOT = 20000  # Artículos por bloque (acota la memoria al recorrerlo)
+SEPARADOR = "\x1f"
+
+# Campos del Articulo que van al snapshot (en este orden)
+CAMPOS = ("id", "titulo", "teaser", "contenido", "url", "slug", "fuente", "fecha")
+
+
+class SnapshotInvalido(Exception):
+    """ El snapshot no existe, es de otra versión del almacén o está dañado. """
+
+
+def _hash(datos) -> str:
+    # sha256 (con instrucciones SHA del CPU) es aquí más rápido que blake2b
+    return hashlib.sha256(datos).hexdigest()
+
+
+def _columna(valores):
+    """ (buffer, codificación): latin-1 si alcanza (decodificarlo es casi una copia), si no UTF-8. """
+    texto = SEPARADOR.join(str(v or "").replace(SEPARADOR, " ") for v in valores)
+    try:
+        return texto.encode("latin-1"), "latin-1"
+    except UnicodeEncodeError:
+        return texto.encode("utf-8"), "utf-8"
+
+
+class EscritorSnapshot:
+    """
+    Escribe el snapshot por bloques a medida que llegan los artículos
+    (sirve para "grabar" mientras se recorre el almacén en streaming). Se
+    publica con os.replace solo al llamar a confirmar(). Sin 'con_contenido'
+    la columna de cuerpos va vacía (y no se lee 'contenido' de los artículos).
+    """
+
+    def __init__(self, version_fuente: str, ruta: str = SNAPSHOT_PATH, tam_bloque: int = TAM_BLOQUE_SNAPSHOT,
+                 con_contenido: bool = True):
+        self.ruta = ruta
+        self.version_fuente = version_fuente
+        self.tam_bloque = tam_bloque
+        self.con_contenido = con_contenido
+        self.bloques = []
+        self.total = 0
+        self._pendientes = []
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self._temporal = f"{ruta}.tmp-{os.getpid()}-{id(self)}"
+        self._f = open(self._temporal, "wb")
+        self._f.write(MAGIA)
+
+    def agregar(self, a: Articulo):
+        self._pendientes.append(a)
+        if len(self._pendientes) >= self.tam_bloque:
+            self._escribir_bloque()
+
+    def _escribir_bloque(self):
+        articulos, self._pendientes = self._pendientes, []
+        if not articulos:
+            return
+        columnas = {campo: _columna(getattr(a, campo) if self.con_contenido or campo != "contenido" else ""
+                                    for a in articulos)
+                    for campo in CAMPOS}
+        contenido = {
+            "n": len(articulos),
+            "columnas": {campo: pickle.PickleBuffer(buffer) for campo, (buffer, _) in columnas.items()},
+            "codificaciones": {campo: codificacion for campo, (_, codificacion) in columnas.items()},
+            "fuentes": {i: a.fuentes for i, a in enumerate(articulos) if a.fuentes},
+        }
+        buffers = []
+        datos = pickle.dumps(contenido, protocol=5, buffer_callback=buffers.append)
+        partes = [datos] + [b.raw() for b in buffers]
+
+        h = hashlib.sha256()
+        for parte in partes:
+            h.update(parte)
+        self.bloques.append({"offset": self._f.tell(), "longitudes": [len(p) for p in partes],
+                             "n": len(articulos), "hash": h.hexdigest()})
+        for parte in partes:
+            self._f.write(parte)
+        self.total += len(articulos)
+
+    def confirmar(self) -> str:
+        """ Cierra el archivo y lo publica atómicamente. Devuelve la ruta. """
+        self._escribir_bloque()
+        pie = json.dumps({"formato": FORMATO, "version_fuente": self.version_fuente, "total": self.total,
+                          "con_contenido": self.con_contenido, "bloques": self.bloques}).encode("utf-8")
+        self._f.write(pie)
+        self._f.write(struct.pack("<Q", len(pie)))
+        self._f.write(MAGIA)
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._f.close()
+        os.replace(self._temporal, self.ruta)
+        return self.ruta
+
+    def descartar(self):
+        """ Borra el temporal (ej. si la lectura del almacén se cortó a medias). """
+        if not self._f.closed:
+            self._f.close()
+        try:
+            os.remove(self._temporal)
+        except FileNotFoundError:
+            pass
+
+
+def escribir_snapshot(articulos, version_fuente: str, ruta: str = SNAPSHOT_PATH) -> str:
+    """ Escribe (y publica) el snapshot de 'articulos'. """
+    escritor = EscritorSnapshot(version_fuente, ruta)
+    try:
+        for a in articulos:
+            escritor.agregar(a)
+        return escritor.confirmar()
+    except BaseException:
+        escritor.descartar()
+        raise
+
+
+def _leer_pie(f) -> dict:
+    f.seek(0, os.SEEK_END)
+    tamano = f.tell()
+    if tamano < 2 * len(MAGIA) + 8:
+        raise SnapshotInvalido("archivo truncado")
+    f.seek(tamano - len(MAGIA) - 8)
+    longitud, magia = struct.unpack("<Q", f.read(8))[0], f.read(len(MAGIA))
+    if magia != MAGIA or longitud > tamano:
+        raise SnapshotInvalido("pie inválido")
+    f.seek(tamano - len(MAGIA) - 8 - longitud)
+    pie = json.loads(f.read(longitud))
+    if pie.get("formato") != FORMATO:
+        raise SnapshotInvalido(f"formato {pie.get('formato')} != {FORMATO}")
+    return pie
+
+
+def _leer_bloque(f, bloque: dict, con_contenido: bool = True) -> list:
+    """
+    Lee, verifica y decodifica un bloque -> lista de Articulo. Sin
+    'con_contenido' la columna de cuerpos (la más grande) no se decodifica:
+    cada Articulo lo pide al almacén por _id si alguien lo lee.
+    """
+    longitudes = bloque["longitudes"]
+    datos = bytearray(sum(longitudes))
+    f.seek(bloque["offset"])
+    if f.readinto(datos) != len(datos):
+        raise SnapshotInvalido("bloque truncado")
+    if _hash(datos) != bloque["hash"]:
+        raise SnapshotInvalido("hash de bloque distinto")
+
+    vista, partes, inicio = memoryview(datos), [], 0
+    for longitud in longitudes:
+        partes.append(vista[inicio:inicio + longitud])
+        inicio += longitud
+    contenido = pickle.loads(partes[0], buffers=partes[1:])
+
+    n = contenido["n"]
+    columnas = [str(contenido["columnas"][campo], contenido["codificaciones"][campo]).split(SEPARADOR)
+                if con_contenido or campo != "contenido" else [""] * n
+                for campo in CAMPOS]
+    if any(len(c) != n for c in columnas):
+        raise SnapshotInvalido("columnas de distinto largo")
+    ids, fechas = columnas[0], columnas[-1]
+    for columna in (ids, fechas):  # '' -> None (como en el almacén); es raro, se revisa antes
+        if "" in columna:
+            columna[:] = [v or None for v in columna]
+
+    articulos = list(map(Articulo, *columnas))
+    for i, fuentes in contenido["fuentes"].items():
+        articulos[i].fuentes = fuentes
+    if not con_contenido:
+        for a in articulos:
+            a._contenido = None
+    return articulos
+
+
+def iterar_snapshot(version_fuente: str, ruta: str = SNAPSHOT_PATH, con_contenido: bool = True):
+    """
+    Genera los artículos del snapshot bloque a bloque (sin 'con_contenido',
+    con los cuerpos perezosos). Lanza SnapshotInvalido ANTES del primer
+    artículo si no existe o es de otra versión del almacén.
+    """
+    try:
+        f = open(ruta, "rb")
+    except FileNotFoundError:
+        raise SnapshotInvalido("no existe")
+    try:
+        pie = _leer_pie(f)
+    except (ValueError, struct.error):  # (json.JSONDecodeError es un ValueError)
+        f.close()
+        raise SnapshotInvalido("pie ilegible")
+    except SnapshotInvalido:
+        f.close()
+        raise
+    if pie.get("version_fuente") != version_fuente:
+        f.close()
+        raise SnapshotInvalido("desactualizado")
+    if con_contenido and not pie.get("con_contenido", True):
+        f.close()
+        raise SnapshotInvalido("no tiene los cuerpos")
+
+    def recorrer():
+        with f:
+            for bloque in pie["bloques"]:
+                yield from _leer_bloque(f, bloque, con_contenido)
+    return recorrer()
+
+
+def cargar_snapshot(version_fuente: str, ruta: str = SNAPSHOT_PATH) -> list:
+    """ Lista completa de Articulo del snapshot (lanza SnapshotInvalido si no sirve). """
+    return list(iterar_snapshot(version_fuente, ruta))
+
+
+if __name__ == "__main__":
+    from ai_engine.news_store import obtener_store
+
+    store = obtener_store()
+    print(f"✅ Snapshot escrito: {escribir_snapshot(store.articulos(), store.version())}")
@@ -0,0 +1,163 @@
+"""
+duplicados.py — Detección de noticias casi duplicadas (MinHash + LSH)
+La misma nota de agencia aparece en La República, RPP, Canal N y TV Perú.
+Cada artículo se resume en una firma MinHash de sus 'shingles' (grupos de
+3 palabras consecutivas del texto limpio) y el LSH por bandas solo compara
+los pares que comparten alguna banda: el costo es casi lineal, no N².
+
+Los duplicados se colapsan en UN artículo canónico (el primero visto) con
+la lista de todas sus fuentes en 'fuentes'. En la base de datos los demás
+quedan como registros mínimos con 'duplicado_de' (sin texto, así no se
+indexan, pero los scrapers siguen reconociendo su URL/ID y no los
+vuelven a descargar).
+"""
+
+import zlib
+
+import numpy as np
+
+from ai_engine.ai_utils import limpiar_textos
+from ai_engine.articulo import Articulo
+
+NUM_PERMUTACIONES = 128
+BANDAS_LSH = 16  # 16 bandas x 8 filas -> umbral implícito ~0.7
+TAM_SHINGLE = 3
+# Similitud de Jaccard estimada a partir de la cual dos textos son "el mismo"
+UMBRAL_DUPLICADO = 0.8
+# Con menos palabras no hay evidencia suficiente para llamar duplicado a algo
+MIN_PALABRAS = 12
+
+_generador = np.random.default_rng(20251026)  # semilla fija: firmas reproducibles
+_A = _generador.integers(1, 2 ** 63, size=NUM_PERMUTACIONES, dtype=np.uint64) | np.uint64(1)
+_B = _generador.integers(0, 2 ** 63, size=NUM_PERMUTACIONES, dtype=np.uint64)
+_MEZCLA = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9], dtype=np.uint64)
+_MEZCLA_BANDAS = _generador.integers(1, 2 ** 63, size=NUM_PERMUTACIONES // BANDAS_LSH, dtype=np.uint64) | np.uint64(1)
+
+
+def firma_minhash(texto_limpio: str):
+    """
+    Firma MinHash (NUM_PERMUTACIONES enteros) de un texto YA limpio.
+    Devuelve None si el texto es demasiado corto para compararlo.
+    """
+    palabras = texto_limpio.split()
+    if len(palabras) < MIN_PALABRAS:
+        return None
+
+    # crc32 (y no hash()) para que la firma sea la misma en cada ejecución
+    h = np.fromiter((zlib.crc32(p.encode('ascii')) for p in palabras), dtype=np.uint64, count=len(palabras))
+    n = len(h) - TAM_SHINGLE + 1
+    shingles = h[:n] * _MEZCLA[0]
+    for i in range(1, TAM_SHINGLE):
+        shingles ^= h[i:i + n] * _MEZCLA[i]
+    shingles = np.unique(shingles)
+
+    # Hash universal multiplicativo (aritmética módulo 2^64) y mínimo por fila
+    return ((_A[:, None] * shingles[None, :] + _B[:, None]) >> np.uint64(32)).min(axis=1)
+
+
+def bandas_lsh(firma) -> list:
+    """ Claves de las BANDAS_LSH cubetas de la firma: [(banda, bytes), ...]. """
+    filas = NUM_PERMUTACIONES // BANDAS_LSH
+    return [(b, firma[b * filas:(b + 1) * filas].tobytes()) for b in range(BANDAS_LSH)]
+
+
+def claves_bandas(firma):
+    """
+    Cada banda de la firma resumida en un entero (BANDAS_LSH uint64): así el
+    LSH cabe en un arreglo que se guarda en disco. Bandas iguales dan la
+    misma clave; una colisión solo agrega un candidato (ver es_duplicado).
+    """
+    return (firma.reshape(BANDAS_LSH, -1) * _MEZCLA_BANDAS).sum(axis=1, dtype=np.uint64)
+
+
+def es_duplicado(firma_a, firma_b) -> bool:
+    """ Jaccard estimada (fracción de mínimos iguales) >= UMBRAL_DUPLICADO. """
+    return float(np.mean(firma_a == firma_b)) >= UMBRAL_DUPLICADO
+
+
+class AgrupadorDuplicados:
+    """
+    Versión incremental de agrupar_duplicados: los textos llegan de a uno
+    (ej. leyendo el corpus en streaming) y cada uno se compara solo con los
+    anteriores que comparten alguna banda LSH.
+    """
+
+    def __init__(self):
+        self.firmas = []
+        self.canonicos = []
+        self._cubetas = {}
+
+    def agregar(self, texto_limpio: str) -> int:
+        """ Devuelve la posición del canónico del texto (la suya si no es duplicado). """
+        return self.agregar_firma(firma_minhash(texto_limpio))
+
+    def agregar_firma(self, firma) -> int:
+        """ Igual que agregar, con la firma ya calculada (None: no se compara). """
+        i = len(self.firmas)
+        self.firmas.append(firma)
+        canonico = i
+        if firma is not None:
+            vistos = set()
+            for clave in bandas_lsh(firma):
+                cubeta = self._cubetas.setdefault(clave, [])
+                for j in cubeta:
+                    if j in vistos:
+                        continue
+                    vistos.add(j)
+                    if es_duplicado(self.firmas[j], firma):
+                        canonico = min(canonico, self.canonicos[j])  # el canónico es el más antiguo
+                cubeta.append(i)
+        self.canonicos.append(canonico)
+        return canonico
+
+
+def agrupar_duplicados(textos_limpios) -> list:
+    """
+    Para cada texto devuelve la posición de su canónico: la suya propia si
+    no es duplicado de ninguno anterior, o la del primero de su grupo.
+    """
+    agrupador = AgrupadorDuplicados()
+    return [agrupador.agregar(t) for t in textos_limpios]
+
+
+def _referencia_fuente(a: Articulo) -> dict:
+    return {"fuente": a.fuente, "url": a.url or None, "_id": a.id}
+
+
+def fusionar_fuentes(canonico: Articulo, duplicado: Articulo):
+    """ Agrega al canónico las fuentes del duplicado (sin repetir URLs/IDs). """
+    if not canonico.fuentes:
+        canonico.fuentes = [_referencia_fuente(canonico)]
+    conocidas = {(f.get('url'), f.get('_id')) for f in canonico.fuentes}
+    for ref in duplicado.fuentes or [_referencia_fuente(duplicado)]:
+        if (ref.get('url'), ref.get('_id')) not in conocidas:
+            canonico.fuentes.append(ref)
+            conocidas.add((ref.get('url'), ref.get('_id')))
+
+
+def colapsar_duplicados(noticias: dict) -> int:
+    """
+    Colapsa EN SITIO los casi duplicados de un diccionario {id: noticia}
+    (el formato de noticias_partidos.json). El canónico es el primero en el
+    orden del diccionario (las noticias ya guardadas van antes que las
+    nuevas). Devuelve cuántas noticias se colapsaron.
+    """
+    claves = [k for k, n in noticias.items() if isinstance(n, dict) and not n.get('duplicado_de')]
+    articulos = [Articulo.desde_dict(noticias[k], conservar_extra=True) for k in claves]
+    canonicos = agrupar_duplicados(limpiar_textos(a.texto() for a in articulos))
+
+    colapsadas = 0
+    for i, c in enumerate(canonicos):
+        if c == i:
+            continue
+        canonico, duplicado = articulos[c], articulos[i]
+        fusionar_fuentes(canonico, duplicado)
+        noticias[claves[c]] = canonico.a_dict()
+        noticias[claves[i]] = Articulo(id=duplicado.id, url=duplicado.url, slug=duplicado.slug,
+                                       fuente=duplicado.fuente, fecha=duplicado.fecha,
+                                       duplicado_de=claves[c]).a_dict()
+        colapsadas += 1
+
+    if colapsadas:
+        print(f"🧬 Duplicados colapsados: {colapsadas} noticias casi idénticas unidas a su original.")
+    return colapsadas
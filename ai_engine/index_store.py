@@ -0,0 +1,223 @@
+"""
+index_store.py — Formato en disco del índice del corpus (mapeado en memoria)
+Guarda el índice ya construido como arreglos binarios planos que se abren con
+numpy.memmap: el arranque es casi instantáneo y varios procesos de Flask
+comparten UNA sola copia en el page cache del sistema operativo.
+
+Estructura (una carpeta por versión + puntero atómico):
+    models/indice_corpus/ACTUAL            -> nombre de la versión vigente
+    models/indice_corpus/<version>/
+        meta.json                          -> tamaños, dtypes, huellas
+        idf.bin                            -> pesos IDF del modelo
+        vocabulario.json                   -> términos en orden de columna
+        firmas.json                        -> firmas por clave (para la sincronización)
+        caliente/ y frio/                  -> un segmento por nivel (ver corpus_index):
+            csr_data.bin / csr_indices.bin / csr_indptr.bin   (matriz L2, por artículo)
+            csc_data.bin / csc_indices.bin / csc_indptr.bin   (postings, por término)
+            cat_<columna>.bin / cat_<columna>_offsets.bin  -> catálogo columnar
+                                                  (_id, título, URL: UTF-8 + offsets)
+            cat_fuentes.bin / cat_fechas.bin   -> código de fuente (uint8) y fecha
+            catalogo.json                      -> nombres de fuente + notas con varias fuentes
+            claves.json                        -> clave de cada fila
+El segmento frío (pesos float32) solo se lee del disco cuando una consulta
+llega a él: mapeado en memoria, no ocupa page cache mientras no se usa.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+from datetime import datetime
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from ai_engine.retrieval import IndiceInvertido
+from ai_engine.corpus_index import IndiceCorpus, SegmentoIndice
+from ai_engine.catalogo import CatalogoArticulos, ColumnaTexto
+
+INDEX_DIR = "models/indice_corpus"
+FORMATO = 3
+# Columnas de texto del catálogo (nombre en disco -> atributo)
+COLUMNAS_TEXTO = {"ids": "ids", "titulos": "titulos", "urls": "urls"}
+# Versiones anteriores que se conservan (otros procesos pueden tenerlas mapeadas)
+VERSIONES_A_CONSERVAR = 2
+
+
+def huella_idf(idf) -> str:
+    """ Huella de los pesos IDF: liga el índice a un modelo concreto. """
+    return hashlib.sha1(np.ascontiguousarray(idf, dtype=np.float64).tobytes()).hexdigest()
+
+
+def _memmap(carpeta: str, nombre: str, dtype, tamano: int):
+    if tamano == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(os.path.join(carpeta, nombre), dtype=dtype, mode="r", shape=(tamano,))
+
+
+def _abrir_catalogo(carpeta: str, n: int, d: dict) -> CatalogoArticulos:
+    columnas = {}
+    for nombre, atributo in COLUMNAS_TEXTO.items():
+        offsets = _memmap(carpeta, f"cat_{nombre}_offsets.bin", d[f"cat_{nombre}_offsets"], n + 1)
+        buffer = _memmap(carpeta, f"cat_{nombre}.bin", np.uint8, int(offsets[-1]) if n else 0)
+        columnas[atributo] = ColumnaTexto(buffer, offsets)
+    with open(os.path.join(carpeta, "catalogo.json"), "r", encoding="utf-8") as f:
+        extra = json.load(f)
+    return CatalogoArticulos(
+        codigos_fuente=_memmap(carpeta, "cat_fuentes.bin", d["cat_fuentes"], n),
+        nombres_fuente=extra["nombres_fuente"],
+        fechas=_memmap(carpeta, "cat_fechas.bin", np.int64, n).view("datetime64[s]"),
+        fuentes_extra={int(k): v for k, v in extra["fuentes_extra"].items()},
+        **columnas,
+    )
+
+
+def _escribir_arreglo(carpeta: str, nombre: str, arreglo):
+    np.ascontiguousarray(arreglo).tofile(os.path.join(carpeta, nombre))
+    return str(np.asarray(arreglo).dtype)
+
+
+def _escribir_segmento(carpeta: str, segmento: SegmentoIndice) -> dict:
+    """ Escribe matriz, postings, catálogo y claves del segmento; devuelve su entrada de meta.json. """
+    os.makedirs(carpeta, exist_ok=True)
+    csr = segmento.matriz
+    inv = segmento.invertido
+    dtypes = {
+        "csr_data": _escribir_arreglo(carpeta, "csr_data.bin", csr.data),
+        "csr_indices": _escribir_arreglo(carpeta, "csr_indices.bin", csr.indices),
+        "csr_indptr": _escribir_arreglo(carpeta, "csr_indptr.bin", csr.indptr),
+        "csc_data": _escribir_arreglo(carpeta, "csc_data.bin", inv.pesos),
+        "csc_indices": _escribir_arreglo(carpeta, "csc_indices.bin", inv.documentos),
+        "csc_indptr": _escribir_arreglo(carpeta, "csc_indptr.bin", inv.punteros),
+    }
+
+    # Catálogo de artículos (columnas)
+    catalogo = segmento.articulos
+    for nombre, atributo in COLUMNAS_TEXTO.items():
+        columna = getattr(catalogo, atributo)
+        dtypes[f"cat_{nombre}"] = _escribir_arreglo(carpeta, f"cat_{nombre}.bin", np.frombuffer(columna.buffer, dtype=np.uint8))
+        dtypes[f"cat_{nombre}_offsets"] = _escribir_arreglo(carpeta, f"cat_{nombre}_offsets.bin", columna.offsets)
+    dtypes["cat_fuentes"] = _escribir_arreglo(carpeta, "cat_fuentes.bin", catalogo.codigos_fuente)
+    _escribir_arreglo(carpeta, "cat_fechas.bin", catalogo.fechas.astype(np.int64))
+    with open(os.path.join(carpeta, "catalogo.json"), "w", encoding="utf-8") as f:
+        json.dump({"nombres_fuente": catalogo.nombres_fuente,
+                   "fuentes_extra": {str(k): v for k, v in catalogo.fuentes_extra.items()}}, f, ensure_ascii=False)
+
+    with open(os.path.join(carpeta, "claves.json"), "w", encoding="utf-8") as f:
+        json.dump(list(segmento.claves), f, ensure_ascii=False)
+
+    return {"carpeta": os.path.basename(carpeta), "frio": segmento.frio, "n_articulos": len(segmento),
+            "nnz": int(csr.nnz), "dtypes": dtypes}
+
+
+def escribir_indice(indice: IndiceCorpus, base: str = INDEX_DIR) -> str:
+    """
+    Escribe el índice (compactado: un segmento caliente y uno frío) en una
+    carpeta nueva y la publica reemplazando atómicamente el puntero ACTUAL.
+    Devuelve la carpeta escrita.
+    """
+    if not indice.esta_compactado():
+        indice = indice.compactar()
+    if not indice.segmentos:
+        raise ValueError("No se puede guardar un índice vacío.")
+    vectorizer = indice.vectorizer
+
+    version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    carpeta = os.path.join(base, version)
+    os.makedirs(carpeta, exist_ok=True)
+
+    segmentos = [_escribir_segmento(os.path.join(carpeta, "frio" if seg.frio else "caliente"), seg)
+                 for seg in indice.segmentos]
+    _escribir_arreglo(carpeta, "idf.bin", np.asarray(vectorizer.idf_, dtype=np.float64))
+
+    # Vocabulario en orden de columna
+    vocabulario = [None] * len(vectorizer.vocabulary_)
+    for termino, col in vectorizer.vocabulary_.items():
+        vocabulario[col] = termino
+    with open(os.path.join(carpeta, "vocabulario.json"), "w", encoding="utf-8") as f:
+        json.dump(vocabulario, f, ensure_ascii=False)
+
+    with open(os.path.join(carpeta, "firmas.json"), "w", encoding="utf-8") as f:
+        json.dump({k: list(v) for k, v in indice.firmas.items()}, f, ensure_ascii=False)
+
+    meta = {
+        "formato": FORMATO,
+        "n_articulos": len(indice),
+        "n_terminos": int(indice.segmentos[0].matriz.shape[1]),
+        "segmentos": segmentos,
+        "huella_db": indice.huella,
+        "huella_idf": huella_idf(vectorizer.idf_),
+        "creado_en": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    with open(os.path.join(carpeta, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    # Publicación atómica del puntero
+    temporal = os.path.join(base, f"ACTUAL.tmp-{os.getpid()}")
+    with open(temporal, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(temporal, os.path.join(base, "ACTUAL"))
+
+    _limpiar_versiones_antiguas(base, version)
+    print(f"💾 Índice en disco escrito: {carpeta} ({meta['n_articulos']} artículos, "
+          f"{sum(s['nnz'] for s in segmentos)} no-ceros, {indice.n_frios} en el nivel frío)")
+    return carpeta
+
+
+def _limpiar_versiones_antiguas(base: str, vigente: str):
+    versiones = sorted(d for d in os.listdir(base)
+                       if os.path.isdir(os.path.join(base, d)) and d != vigente)
+    for vieja in versiones[:-VERSIONES_A_CONSERVAR] if VERSIONES_A_CONSERVAR > 0 else versiones:
+        shutil.rmtree(os.path.join(base, vieja), ignore_errors=True)
+
+
+def _abrir_segmento(carpeta: str, meta: dict, t: int) -> SegmentoIndice:
+    n, nnz, d = meta["n_articulos"], meta["nnz"], meta["dtypes"]
+    datos = _memmap(carpeta, "csr_data.bin", d["csr_data"], nnz)
+    indices = _memmap(carpeta, "csr_indices.bin", d["csr_indices"], nnz)
+    indptr = _memmap(carpeta, "csr_indptr.bin", d["csr_indptr"], n + 1)
+    matriz = csr_matrix((datos, indices, indptr), shape=(n, t), copy=False)
+
+    invertido = IndiceInvertido(
+        punteros=_memmap(carpeta, "csc_indptr.bin", d["csc_indptr"], t + 1),
+        documentos=_memmap(carpeta, "csc_indices.bin", d["csc_indices"], nnz),
+        pesos=_memmap(carpeta, "csc_data.bin", d["csc_data"], nnz),
+        n_documentos=n,
+    )
+    with open(os.path.join(carpeta, "claves.json"), "r", encoding="utf-8") as f:
+        claves = json.load(f)
+    return SegmentoIndice(_abrir_catalogo(carpeta, n, d), claves, matriz, invertido=invertido, frio=meta["frio"])
+
+
+def abrir_indice(vectorizer, base: str = INDEX_DIR):
+    """
+    Abre la versión vigente del índice en disco mapeándola en memoria.
+    Devuelve None si no existe o si fue construido con OTRO modelo
+    (IDF distinto al del vectorizador actual).
+    """
+    puntero = os.path.join(base, "ACTUAL")
+    if not os.path.exists(puntero):
+        return None
+    try:
+        with open(puntero, "r", encoding="utf-8") as f:
+            carpeta = os.path.join(base, f.read().strip())
+        with open(os.path.join(carpeta, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        if meta.get("formato") != FORMATO:
+            return None
+        if meta["huella_idf"] != huella_idf(vectorizer.idf_):
+            print("ℹ️  El índice en disco es de otro modelo. Se ignorará.")
+            return None
+
+        segmentos = [_abrir_segmento(os.path.join(carpeta, m["carpeta"]), m, meta["n_terminos"])
+                     for m in meta["segmentos"]]
+        with open(os.path.join(carpeta, "firmas.json"), "r", encoding="utf-8") as f:
+            firmas = {k: tuple(v) for k, v in json.load(f).items()}
+
+        print(f"✅ Índice en disco mapeado en memoria: {carpeta} ({meta['n_articulos']} artículos)")
+        return IndiceCorpus(vectorizer, segmentos, meta["huella_db"], firmas)
+
+    except Exception as e:
+        print(f"⚠️ No se pudo abrir el índice en disco ({base}): {e}")
+        return None
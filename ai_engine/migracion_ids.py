@@ -0,0 +1,136 @@
+"""
+migracion_ids.py — Migración a _id estables + limpieza de duplicados por URL
+Canal N, RPP y TV Perú armaban el _id con hash(url) como respaldo, y hash()
+de Python cambia en cada proceso: la misma nota recibía un _id nuevo en cada
+corrida y el corpus acumulaba copias (más texto que limpiar y vectorizar,
+más filas en el índice). Los scrapers ya usan articulo.id_estable; esta
+herramienta pone al día lo que ya está guardado:
+
+  - Re-clavea los artículos de esas fuentes a id_estable(url).
+  - Une los registros con la misma URL canónica en uno solo (el primero
+    guardado) y le suma las fuentes de los demás.
+  - Reapunta 'duplicado_de' y las referencias de 'fuentes' a los _id nuevos.
+  - Aplica todo en una sola operación del almacén (NewsStore o
+    RegistroSegmentos), libera el espacio y reporta lo recuperado.
+
+Uso manual:
+    python -m ai_engine.migracion_ids            # migrar
+    python -m ai_engine.migracion_ids --simular  # solo reportar
+"""
+
+import sys
+
+from ai_engine.articulo import PREFIJOS_ID_URL, id_estable, normalizar_url
+from ai_engine.duplicados import fusionar_fuentes
+from ai_engine.news_store import obtener_store
+
+
+def _id_final(a) -> str:
+    """ _id que le corresponde al artículo: el estable si su fuente no tiene ID propio. """
+    prefijo = PREFIJOS_ID_URL.get(a.fuente)
+    if prefijo and normalizar_url(a.url):
+        return id_estable(a.url, prefijo)
+    return str(a.id)
+
+
+def planificar(articulos) -> tuple:
+    """
+    Recorre los artículos (en orden de guardado, con duplicados) y devuelve
+    (finales, renombres, cambiados):
+      - finales:   {_id final: Articulo} que deben quedar en el almacén
+      - renombres: {_id viejo: _id final} de todo registro re-clavado o unido
+      - cambiados: _id finales cuyo registro hay que reescribir
+    """
+    finales, renombres, cambiados = {}, {}, set()
+    por_url = {}  # URL canónica -> _id final
+
+    for a in articulos:
+        id_viejo, id_nuevo = str(a.id), _id_final(a)
+        canonica = normalizar_url(a.url)
+        destino = por_url.get(canonica) if canonica else None
+        if destino is None and id_nuevo in finales:
+            destino = id_nuevo
+
+        if destino is None:
+            a.id = id_nuevo
+            finales[id_nuevo] = a
+            if canonica:
+                por_url[canonica] = id_nuevo
+            if id_nuevo != id_viejo:
+                renombres[id_viejo] = id_nuevo
+                cambiados.add(id_nuevo)
+            continue
+
+        # Misma nota ya vista: se une al registro que queda (el primero guardado)
+        superviviente = finales[destino]
+        if id_viejo != destino:
+            renombres[id_viejo] = destino
+        if a.fuentes and not superviviente.duplicado_de:
+            fusionar_fuentes(superviviente, a)
+        cambiados.add(destino)
+
+    # Referencias a los _id viejos (duplicado_de y fuentes)
+    for id_, a in finales.items():
+        if a.duplicado_de and a.duplicado_de in renombres:
+            nuevo = renombres[a.duplicado_de]
+            a.duplicado_de = nuevo if nuevo != id_ else None
+            cambiados.add(id_)
+        if a.fuentes and any(ref.get("_id") in renombres for ref in a.fuentes):
+            vistas, fuentes = set(), []
+            for ref in a.fuentes:
+                ref = dict(ref, _id=renombres.get(ref.get("_id"), ref.get("_id")))
+                if (normalizar_url(ref.get("url")), ref["_id"]) not in vistas:
+                    vistas.add((normalizar_url(ref.get("url")), ref["_id"]))
+                    fuentes.append(ref)
+            a.fuentes = fuentes
+            cambiados.add(id_)
+    return finales, renombres, cambiados
+
+
+def _medir(store) -> dict:
+    return {"registros": store.contar(), "indexables": store.contar(incluir_duplicados=False),
+            "bytes": store.tamano_en_disco()}
+
+
+def migrar(store=None, simular: bool = False) -> dict:
+    """
+    Re-clavea y une los duplicados del almacén. Devuelve el reporte:
+    registros, artículos indexables (filas del índice) y bytes, antes y después.
+    """
+    store = store or obtener_store()
+    antes = _medir(store)
+
+    finales, renombres, cambiados = planificar(store.articulos(incluir_duplicados=True, conservar_extra=True))
+    eliminados = [id_viejo for id_viejo in renombres if id_viejo not in finales]
+    reporte = {"antes": antes, "renombres": len(renombres), "eliminados": len(eliminados),
+               "reescritos": len(cambiados)}
+
+    if simular or not cambiados:
+        reporte["despues"] = {"registros": len(finales),
+                              "indexables": sum(1 for a in finales.values() if not a.duplicado_de),
+                              "bytes": None}
+    else:
+        store.reemplazar(eliminados, [a for id_, a in finales.items() if id_ in cambiados])
+        store.liberar_espacio()
+        reporte["despues"] = _medir(store)
+
+    despues = reporte["despues"]
+    reporte["recuperado"] = {
+        "registros": antes["registros"] - despues["registros"],
+        "filas_indice": antes["indexables"] - despues["indexables"],
+        "bytes": antes["bytes"] - despues["bytes"] if despues["bytes"] is not None else None,
+    }
+    return reporte
+
+
+if __name__ == "__main__":
+    simular = "--simular" in sys.argv[1:]
+    reporte = migrar(simular=simular)
+    antes, despues, recuperado = reporte["antes"], reporte["despues"], reporte["recuperado"]
+    print(f"{'🔎 Simulación' if simular else '✅ Migración de IDs completa'}: "
+          f"{reporte['renombres']} _id re-clavados/unidos, {reporte['eliminados']} registros eliminados.")
+    print(f"   Registros:        {antes['registros']} -> {despues['registros']} (-{recuperado['registros']})")
+    print(f"   Filas del índice: {antes['indexables']} -> {despues['indexables']} (-{recuperado['filas_indice']})")
+    if recuperado["bytes"] is not None:
+        print(f"   Espacio en disco: {antes['bytes'] / 2 ** 20:.1f}MB -> {despues['bytes'] / 2 ** 20:.1f}MB "
+              f"(-{recuperado['bytes'] / 2 ** 20:.1f}MB)")
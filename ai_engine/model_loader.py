@@ -1,108 +1,76 @@
 # ai_engine/model_loader.py
 import os
+import io
+import time
+import hashlib
+import threading
 import joblib
 import json
+from datetime import datetime
 from sklearn.feature_extraction.text import TfidfVectorizer
 
 # ¡Importante! Necesitamos la misma función de limpieza para entrenar
 # que la que usamos para las consultas.
-from ai_engine.ai_utils import limpiar_texto 
+from ai_engine.ai_utils import limpiar_textos
+from ai_engine.articulo import como_articulo
+from ai_engine.corpus_reader import iterar_articulos, cargar_corpus, en_bloques
 
 MODEL_PATH = "models/vectorizer_es.joblib"
 # --- ¡CAMBIO! Apuntar al archivo JSON principal y correcto ---
 DATABASE_PATH = "news_scrapers/noticias_partidos.json"
+# Cada cuántos segundos se revisa si el archivo del modelo cambió
+INTERVALO_VERIFICACION_MODELO = float(os.environ.get("INTERVALO_VERIFICACION_MODELO", 5))
 
 
 def _load_json_database(archivo=DATABASE_PATH):
     """
-    Carga la base de datos de noticias desde el archivo JSON principal.
+    Lista de Articulo del corpus (sin los campos que el motor no usa), vía
+    el lector compartido ai_engine.corpus_reader (almacén o, si falla, el JSON).
     """
-    if not os.path.exists(archivo):
-        print(f"Advertencia: No se encontró {archivo} para entrenar el vectorizador.")
-        return []
-    
-    try:
-        with open(archivo, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Asegurarse de que los datos sean una lista de artículos (los valores del dict)
-        if isinstance(data, dict):
-            return list(data.values())
-        elif isinstance(data, list):
-            # Si por alguna razón se guardó como lista, usarla directamente
-            return data
-        else:
-            print(f"Error: {archivo} tiene un formato desconocido.")
-            return []
-            
-    except json.JSONDecodeError:
-        print(f"Error: El archivo {archivo} está corrupto o vacío.")
-        return []
-    except Exception as e:
-        print(f"Error cargando {archivo}: {e}")
-        return []
+    return cargar_corpus(archivo)
 
-def _crear_corpus_entrenamiento():
+def _crear_corpus_entrenamiento(noticias_db=None):
     """
-    Lee todas las noticias de la base de datos JSON y las convierte en
-    un gran corpus de texto para entrenar el modelo TF-IDF.
+    Recorre las noticias (las recibidas en 'noticias_db' o, si no, el corpus
+    en streaming) y las convierte en un gran corpus de texto para entrenar
+    el modelo TF-IDF. Se limpia por bloques: nunca se guarda el texto
+    original de todo el corpus a la vez.
     """
-    print("⚙️  Creando corpus de entrenamiento desde la base de datos JSON...")
-    noticias_db = _load_json_database()
-
-    if not noticias_db:
-        print("⚠️  El JSON está vacío. El vectorizador no puede ser entrenado.")
-        # Devolver lista vacía. load_vectorizer manejará esto.
-        return []
+    print("⚙️  Creando corpus de entrenamiento desde la base de datos de noticias...")
+    if noticias_db is None:
+        noticias_db = iterar_articulos(DATABASE_PATH)
 
     corpus_base = []
     
-    for n in noticias_db:
-        if not isinstance(n, dict):
-            continue # Omitir items que no sean diccionarios
-            
-        # --- ¡INICIO DE LA CORRECCIÓN! ---
-        # Forzar que 'titulo', 'teaser' y 'contenido_full' sean strings, no None.
-        
-        titulo = n.get('title') or '' 
-        
-        data = n.get('data', {})
-        if data is None: # Comprobar si 'data' es null
-            data = {}
-            
-        teaser = data.get('teaser') or ''
-        
-        # Incluir el contenido completo de los otros scrapers (RPP, TV Peru, etc.)
-        contenido_full = n.get('contenido_full', '') or ''
-        
-        # Combinar todo el texto disponible
-        texto_a_limpiar = titulo + " " + teaser + " " + contenido_full
-        # --- FIN DE LA CORRECCIÓN! ---
+    for bloque in en_bloques(a for a in map(como_articulo, noticias_db) if a is not None):
+        # Combinar todo el texto disponible (título + teaser + contenido completo)
+        textos_a_limpiar = [t for t in (a.texto() for a in bloque) if t.strip()]
+
+        # Limpieza por lotes (una sola pasada por texto; pool opcional)
+        corpus_base.extend(limpiar_textos(textos_a_limpiar))
+
+    if not corpus_base:
+        print("⚠️  La base de datos de noticias está vacía. El vectorizador no puede ser entrenado.")
+        # Devolver lista vacía. load_vectorizer manejará esto.
+        return []
 
-        if texto_a_limpiar.strip():
-            corpus_base.append(limpiar_texto(texto_a_limpiar))
-            
     print(f"✅ Corpus creado con {len(corpus_base)} artículos.")
     return corpus_base
 
-def load_vectorizer():
+def _nuevo_vectorizer():
+    """ Vectorizador TF-IDF en español (sin entrenar), con la configuración del proyecto. """
+    return TfidfVectorizer(
+        lowercase=True,     # Ya está en minúsculas por 'limpiar_texto'
+        analyzer="word",
+        stop_words=None,    # Podríamos añadir 'stop_words' en español en el futuro
+        max_features=5000   # Limitar vocabulario
+    )
+
+def _entrenar_vectorizer(ruta=MODEL_PATH):
     """
-    Carga (o crea si no existe) un vectorizador TF-IDF entrenado con
-    TODAS las noticias de la base de datos JSON.
+    Crea un vectorizador TF-IDF entrenado con TODAS las noticias de la base
+    de datos JSON y lo guarda en 'ruta'.
     """
-    os.makedirs("models", exist_ok=True)
-
-    if os.path.exists(MODEL_PATH):
-        try:
-            vectorizer = joblib.load(MODEL_PATH)
-            print("✅ Vectorizer cargado correctamente desde models/vectorizer_es.joblib")
-            return vectorizer
-        except Exception as e:
-            print(f"Error cargando vectorizer: {e}")
-            print("⚙️  Se creará uno nuevo desde cero.")
-
-    # --- Creación del Nuevo Vectorizador ---
-    
     # 1. Crear el corpus desde el JSON
     corpus_base = _crear_corpus_entrenamiento()
     
@@ -113,12 +81,7 @@ def load_vectorizer():
         raise ValueError("Corpus de entrenamiento vacío. Ejecuta los scrapers primero.")
 
     # 2. Vectorizador en español
-    vectorizer = TfidfVectorizer(
-        lowercase=True,     # Ya está en minúsculas por 'limpiar_texto'
-        analyzer="word",
-        stop_words=None,    # Podríamos añadir 'stop_words' en español en el futuro
-        max_features=5000   # Limitar vocabulario
-    )
+    vectorizer = _nuevo_vectorizer()
 
     try:
         # 3. Entrenar el vectorizador
@@ -126,14 +89,227 @@ def load_vectorizer():
         vectorizer.fit(corpus_base)
         
         # 4. Guardar el modelo entrenado
-        joblib.dump(vectorizer, MODEL_PATH)
+        joblib.dump(vectorizer, ruta)
         print("✅ Nuevo vectorizer TF-IDF inteligente creado y guardado.")
     except Exception as e:
         print(f"Error fatal al entrenar el vectorizer: {e}")
         return None
 
+    # 5. Índice del corpus en disco (mapeable por todos los procesos)
+    construir_indice_en_disco(vectorizer)
+
     return vectorizer
 
+
+def construir_indice_en_disco(vectorizer, noticias_db=None):
+    """
+    Construye el índice del corpus con 'vectorizer' y lo escribe en disco
+    (formato memmap de ai_engine.index_store). Devuelve el IndiceCorpus,
+    o None si no se pudo.
+    """
+    from ai_engine.corpus_index import IndiceCorpus
+    from ai_engine.index_store import escribir_indice
+
+    if noticias_db is None:
+        noticias_db = iterar_articulos(DATABASE_PATH)  # En streaming (memoria acotada)
+    try:
+        indice = IndiceCorpus.construir(vectorizer, noticias_db)
+        if len(indice) == 0:
+            print("⚠️  Corpus vacío: no se escribe índice en disco.")
+            return None
+        escribir_indice(indice)
+        return indice
+    except Exception as e:
+        print(f"⚠️ No se pudo escribir el índice en disco: {e}")
+        return None
+
+
+# ==============================
+# 🗃️ Registro de modelos (uno por proceso)
+# ==============================
+
+class ModeloCargado:
+    """ Versión inmutable de un modelo ya cargado en memoria. """
+    __slots__ = ("vectorizer", "version", "ruta", "firma_archivo", "cargado_en", "segundos_carga")
+
+    def __init__(self, vectorizer, version, ruta, firma_archivo, cargado_en, segundos_carga):
+        self.vectorizer = vectorizer
+        self.version = version
+        self.ruta = ruta
+        self.firma_archivo = firma_archivo  # (mtime_ns, tamaño) del archivo al cargarlo
+        self.cargado_en = cargado_en
+        self.segundos_carga = segundos_carga
+
+
+def _firma_archivo(ruta):
+    """ (mtime_ns, tamaño) del archivo, o None si no existe. """
+    try:
+        st = os.stat(ruta)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+class RegistroModelos:
+    """
+    Registro singleton del vectorizador TF-IDF.
+    - Carga el modelo UNA vez por proceso (joblib.load solo al arrancar).
+    - Cada 'intervalo_verificacion' segundos revisa el mtime/tamaño del
+      archivo; si cambió (y su checksum también), carga la nueva versión en
+      un hilo aparte y la intercambia atómicamente. Las peticiones en curso
+      siguen usando la referencia que ya tenían.
+    """
+
+    def __init__(self, ruta=MODEL_PATH, intervalo_verificacion=INTERVALO_VERIFICACION_MODELO):
+        self.ruta = ruta
+        self.intervalo_verificacion = intervalo_verificacion
+        self._actual = None
+        self._lock_carga = threading.Lock()
+        self._ultima_verificacion = 0.0
+        self.cargas_desde_disco = 0
+        self.recargas = 0
+
+    # -----------------------------
+    # Carga desde disco (o entrenamiento)
+    # -----------------------------
+    def _cargar(self, entrenar_si_falla=True):
+        os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+        t0 = time.perf_counter()
+        vectorizer = None
+
+        if os.path.exists(self.ruta):
+            try:
+                with open(self.ruta, "rb") as f:
+                    contenido = f.read()
+                vectorizer = joblib.load(io.BytesIO(contenido))
+                print(f"✅ Vectorizer cargado correctamente desde {self.ruta}")
+            except Exception as e:
+                print(f"Error cargando vectorizer: {e}")
+                print("⚙️  Se creará uno nuevo desde cero.")
+                vectorizer = None
+
+        if vectorizer is None:
+            if not entrenar_si_falla:
+                return None
+            vectorizer = _entrenar_vectorizer(self.ruta)
+            if vectorizer is None:
+                return None
+            with open(self.ruta, "rb") as f:
+                contenido = f.read()
+
+        self.cargas_desde_disco += 1
+        return ModeloCargado(
+            vectorizer=vectorizer,
+            version=hashlib.sha1(contenido).hexdigest()[:12],
+            ruta=self.ruta,
+            firma_archivo=_firma_archivo(self.ruta),
+            cargado_en=datetime.now(),
+            segundos_carga=time.perf_counter() - t0,
+        )
+
+    def _recargar_en_segundo_plano(self, actual):
+        """ Carga la nueva versión fuera del camino de la petición. """
+        try:
+            firma = _firma_archivo(self.ruta)
+            with open(self.ruta, "rb") as f:
+                version = hashlib.sha1(f.read()).hexdigest()[:12]
+            if version == actual.version:
+                # Mismo contenido (ej. 'touch'): solo actualizar la firma, sin deserializar
+                self._actual = ModeloCargado(actual.vectorizer, actual.version, actual.ruta,
+                                             firma, actual.cargado_en, actual.segundos_carga)
+                return
+            # (Si el archivo está a medio escribir se reintenta en la próxima verificación)
+            nuevo = self._cargar(entrenar_si_falla=False)
+            if nuevo is None:
+                return
+            self.recargas += 1
+            print(f"🔄 Modelo actualizado: {actual.version} -> {nuevo.version} "
+                  f"({nuevo.segundos_carga:.3f}s de carga)")
+            self._actual = nuevo  # Intercambio atómico de la referencia
+        except Exception as e:
+            print(f"⚠️ Error recargando el modelo: {e}")
+        finally:
+            self._lock_carga.release()
+
+    # -----------------------------
+    # API pública
+    # -----------------------------
+    def obtener(self):
+        """ Devuelve el ModeloCargado vigente (o None si no se pudo crear). """
+        actual = self._actual
+        if actual is None:
+            # Primera carga: no hay nada que servir mientras tanto
+            with self._lock_carga:
+                if self._actual is None:
+                    self._actual = self._cargar()
+                    self._ultima_verificacion = time.monotonic()
+            return self._actual
+
+        ahora = time.monotonic()
+        if ahora - self._ultima_verificacion >= self.intervalo_verificacion:
+            self._ultima_verificacion = ahora
+            if _firma_archivo(self.ruta) not in (None, actual.firma_archivo):
+                if self._lock_carga.acquire(blocking=False):
+                    threading.Thread(target=self._recargar_en_segundo_plano,
+                                     args=(actual,), daemon=True).start()
+        return actual
+
+    def publicar(self, vectorizer, contenido: bytes, segundos_carga: float = 0.0):
+        """
+        Intercambia atómicamente el modelo en memoria por uno ya entrenado
+        (ej. por el reentrenamiento en segundo plano). 'contenido' son los
+        bytes exactos escritos en disco, para que la versión coincida con la
+        que verán los demás procesos.
+        """
+        nuevo = ModeloCargado(
+            vectorizer=vectorizer,
+            version=hashlib.sha1(contenido).hexdigest()[:12],
+            ruta=self.ruta,
+            firma_archivo=_firma_archivo(self.ruta),
+            cargado_en=datetime.now(),
+            segundos_carga=segundos_carga,
+        )
+        anterior = self._actual
+        self._actual = nuevo
+        if anterior is not None and anterior.version != nuevo.version:
+            self.recargas += 1
+        return nuevo
+
+    def estado(self):
+        """ Versión y métricas de carga, para comprobarlas en producción. """
+        actual = self._actual
+        return {
+            "ruta": self.ruta,
+            "version": actual.version if actual else None,
+            "cargado_en": actual.cargado_en.strftime("%Y-%m-%d %H:%M:%S") if actual else None,
+            "segundos_carga": round(actual.segundos_carga, 4) if actual else None,
+            "cargas_desde_disco": self.cargas_desde_disco,
+            "recargas": self.recargas,
+        }
+
+
+_registro = None
+_lock_registro = threading.Lock()
+
+
+def obtener_registro():
+    """ Devuelve el RegistroModelos único del proceso. """
+    global _registro
+    if _registro is None:
+        with _lock_registro:
+            if _registro is None:
+                _registro = RegistroModelos()
+    return _registro
+
+
+def load_vectorizer():
+    """
+    Devuelve el vectorizador TF-IDF vigente del registro del proceso
+    (lo carga o lo crea solo la primera vez).
+    """
+    modelo = obtener_registro().obtener()
+    return modelo.vectorizer if modelo else None
+
 if __name__ == "__main__":
     print("Demo model_loader — creando/asegurando vectorizer TF-IDF...")
     vectorizer = load_vectorizer()
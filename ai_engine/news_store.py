@@ -0,0 +1,656 @@
+"""
+news_store.py — Almacén de noticias en SQLite (modo WAL)
+Reemplaza al monolítico 'news_scrapers/noticias_partidos.json': antes cada
+guardado leía y reescribía el archivo completo (O(corpus) por guardado) y dos
+scrapers a la vez podían pisarse los cambios.
+
+  - Upsert por '_id' en transacciones por lotes: guardar cuesta O(nuevas).
+  - Índices secundarios persistentes: por _id (clave primaria), por URL
+    CANÓNICA (única, ver articulo.normalizar_url), por fuente y por fecha.
+    Los scrapers preguntan "¿ya la tengo?" (por ID o por URL, da igual) sin
+    cargar el corpus, y el motor hace consultas por rango de fechas.
+  - WAL: varios scrapers escriben y Flask lee al mismo tiempo sin bloquearse.
+  - Casi duplicados (ver duplicados.py): las bandas LSH de cada artículo se
+    guardan en una tabla indexada, así una nota nueva se compara solo contra
+    sus candidatos, sin recorrer el corpus.
+  - Cuerpos ('contenido') aparte y comprimidos con un diccionario por fuente
+    (ver body_store.py); con con_contenido=False los artículos salen sin el
+    texto y lo cargan por _id solo si alguien lo lee.
+  - Migración única desde el JSON antiguo la primera vez que se abre.
+  - Staging (AlmacenStaging): los scrapers que corren en paralelo (ver
+    scraper_manager) anexan lo nuevo a su propio JSONL y fusionar_staging()
+    lo pasa al almacén al final, deduplicando por URL canónica.
+
+Uso manual:
+    python -m ai_engine.news_store [ruta_json]   # (re)migrar desde un JSON
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+import numpy as np
+
+from ai_engine.ai_utils import limpiar_texto_rapido
+from ai_engine.articulo import Articulo, como_articulo, normalizar_url
+from ai_engine.duplicados import firma_minhash, bandas_lsh, es_duplicado, fusionar_fuentes
+from ai_engine.body_store import AlmacenCuerpos, MIN_MUESTRAS_DICCIONARIO, MAX_MUESTRAS_DICCIONARIO
+
+DB_PATH = os.environ.get("NEWS_DB_PATH", "news_scrapers/noticias.db")
+# "sqlite" (por defecto) o "jsonl": segmentos de solo-anexar sin base de datos (ver segment_log)
+BACKEND = os.environ.get("NEWS_BACKEND", "sqlite").lower()
+JSON_PATH = "news_scrapers/noticias_partidos.json"  # Formato antiguo (solo para migrar)
+TAM_LOTE = 500  # Artículos por transacción
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS articulos (
+    id            TEXT PRIMARY KEY,
+    url           TEXT,
+    url_canonica  TEXT,             -- normalizar_url(url): clave del índice por URL
+    fuente        TEXT NOT NULL,
+    titulo        TEXT NOT NULL DEFAULT '',
+    teaser        TEXT NOT NULL DEFAULT '',
+    contenido     TEXT NOT NULL DEFAULT '',  -- (vacío: el texto está en 'cuerpos', ver body_store)
+    slug          TEXT NOT NULL DEFAULT '',
+    fecha         TEXT,
+    fuentes       TEXT,             -- JSON: medios que publicaron la misma nota
+    duplicado_de  TEXT,             -- id del canónico si es un casi duplicado
+    extra         BLOB,             -- campos que el motor no usa (zlib + JSON)
+    firma         BLOB,             -- firma MinHash (uint64 x NUM_PERMUTACIONES)
+    guardado_en   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bandas_lsh (
+    banda  INTEGER NOT NULL,
+    clave  BLOB NOT NULL,
+    id     TEXT NOT NULL,
+    PRIMARY KEY (banda, clave, id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    clave  TEXT PRIMARY KEY,
+    valor  TEXT
+);
+"""
+
+# Índices secundarios (se crean después de migrar el esquema de un almacén viejo)
+_INDICES = """
+CREATE UNIQUE INDEX IF NOT EXISTS ux_articulos_url ON articulos(url) WHERE url IS NOT NULL AND url != '';
+CREATE UNIQUE INDEX IF NOT EXISTS ux_articulos_url_canonica ON articulos(url_canonica) WHERE url_canonica IS NOT NULL;
+CREATE INDEX IF NOT EXISTS ix_articulos_fuente_fecha ON articulos(fuente, fecha);
+CREATE INDEX IF NOT EXISTS ix_articulos_fecha ON articulos(fecha);
+"""
+
+_COLUMNAS = "id, url, fuente, titulo, teaser, contenido, slug, fecha, fuentes, duplicado_de, extra"
+_COLUMNAS_A = ", ".join(f"a.{c}" for c in _COLUMNAS.split(", "))
+
+
+def _fila_a_articulo(fila, conservar_extra: bool = False) -> Articulo:
+    id_, url, fuente, titulo, teaser, contenido, slug, fecha, fuentes, duplicado_de, extra = fila
+    a = Articulo(id=id_, titulo=titulo, teaser=teaser, contenido=contenido, url=url, slug=slug,
+                 fuente=fuente, fecha=fecha, fuentes=json.loads(fuentes) if fuentes else None,
+                 duplicado_de=duplicado_de)
+    if conservar_extra:
+        a._extra = extra
+    return a
+
+
+class NewsStore:
+    """ Acceso al almacén (una conexión SQLite por hilo). """
+
+    def __init__(self, ruta: str = DB_PATH, ruta_json: str = JSON_PATH):
+        self.ruta = ruta
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        conexion = self._conexion()
+        conexion.executescript(_ESQUEMA)
+        # Contador de versión (lo sube cada escritura) + identidad del archivo
+        conexion.execute("INSERT OR IGNORE INTO meta (clave, valor) VALUES ('id_almacen', ?)", (uuid.uuid4().hex,))
+        conexion.execute("INSERT OR IGNORE INTO meta (clave, valor) VALUES ('version', '0')")
+        self._migrar_esquema(conexion)
+        conexion.executescript(_INDICES)
+        self.cuerpos = AlmacenCuerpos(self._conexion)
+        self._mover_cuerpos(conexion)
+        if ruta_json and self._meta("migrado_json") is None:
+            self.migrar_desde_json(ruta_json)
+
+    def _conexion(self) -> sqlite3.Connection:
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            # isolation_level=None: las transacciones se abren a mano (BEGIN IMMEDIATE)
+            conexion = sqlite3.connect(self.ruta, timeout=30, isolation_level=None, check_same_thread=False)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            conexion.execute("PRAGMA busy_timeout=30000")
+            self._local.conexion = conexion
+        return conexion
+
+    def _migrar_esquema(self, conexion):
+        """ Almacenes creados antes de la columna 'url_canonica': se agrega y se rellena. """
+        columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(articulos)")}
+        if "url_canonica" in columnas:
+            return
+        print("🔧 Agregando índice por URL canónica al almacén de noticias...")
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            conexion.execute("ALTER TABLE articulos ADD COLUMN url_canonica TEXT")
+            vistas = {}
+            for id_, url in conexion.execute("SELECT id, url FROM articulos WHERE url IS NOT NULL ORDER BY rowid").fetchall():
+                canonica = normalizar_url(url)
+                if canonica in vistas:
+                    # La misma nota guardada con dos claves: se deja como duplicado del primero
+                    conexion.execute("UPDATE articulos SET duplicado_de = ? WHERE id = ?", (vistas[canonica], id_))
+                    conexion.execute("DELETE FROM bandas_lsh WHERE id = ?", (id_,))
+                    continue
+                vistas[canonica] = id_
+                conexion.execute("UPDATE articulos SET url_canonica = ? WHERE id = ?", (canonica, id_))
+            self._subir_version(conexion)
+            conexion.execute("COMMIT")
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+
+    def _mover_cuerpos(self, conexion):
+        """
+        Almacenes anteriores a body_store: el texto pasa de 'articulos.contenido'
+        a 'cuerpos'. Se revisa una sola vez (queda la marca 'cuerpos_aparte').
+        """
+        if self._meta("cuerpos_aparte") is not None:
+            return
+        if not conexion.execute("SELECT 1 FROM articulos WHERE contenido != '' LIMIT 1").fetchone():
+            self._marcar_cuerpos_aparte(conexion)
+            return
+        print("🔧 Moviendo los cuerpos de las noticias al almacén comprimido...")
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            # Primero los diccionarios (con muestras del texto aún sin mover), después se comprime una sola vez
+            for fuente, n in conexion.execute("SELECT fuente, COUNT(*) FROM articulos WHERE contenido != '' "
+                                              "GROUP BY fuente").fetchall():
+                if n >= MIN_MUESTRAS_DICCIONARIO:
+                    muestras = [fila[0] for fila in conexion.execute(
+                        "SELECT contenido FROM articulos WHERE fuente = ? AND contenido != '' ORDER BY random() LIMIT ?",
+                        (fuente, MAX_MUESTRAS_DICCIONARIO))]
+                    self.cuerpos.entrenar(conexion, fuente, muestras)
+            ultimo = 0
+            while True:
+                filas = conexion.execute("SELECT rowid, id, fuente, contenido FROM articulos "
+                                         "WHERE rowid > ? AND contenido != '' ORDER BY rowid LIMIT ?",
+                                         (ultimo, TAM_LOTE)).fetchall()
+                if not filas:
+                    break
+                for rowid, id_, fuente, contenido in filas:
+                    self.cuerpos.guardar(conexion, id_, fuente, contenido)
+                    conexion.execute("UPDATE articulos SET contenido = '' WHERE rowid = ?", (rowid,))
+                ultimo = filas[-1][0]
+            self._marcar_cuerpos_aparte(conexion)
+            conexion.execute("COMMIT")
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+
+    def _marcar_cuerpos_aparte(self, conexion):
+        conexion.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('cuerpos_aparte', ?)",
+                         (time.strftime("%Y-%m-%d %H:%M:%S"),))
+
+    def _meta(self, clave: str):
+        fila = self._conexion().execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+        return fila[0] if fila else None
+
+    def _subir_version(self, conexion):
+        """ (Dentro de la transacción que escribe) Ver version(). """
+        conexion.execute("UPDATE meta SET valor = CAST(valor AS INTEGER) + 1 WHERE clave = 'version'")
+
+    # -----------------------------
+    # Escritura
+    # -----------------------------
+    def guardar(self, articulos, tam_lote: int = TAM_LOTE) -> dict:
+        """
+        Inserta o actualiza (upsert por _id) los artículos en transacciones
+        de 'tam_lote'. Acepta Articulo o diccionarios (forma compacta o la
+        anidada antigua). Devuelve el conteo de guardados/duplicados/omitidos.
+        """
+        resumen = {"guardados": 0, "duplicados": 0, "omitidos": 0}
+        lote = []
+        for n in articulos:
+            a = n if isinstance(n, Articulo) else Articulo.desde_dict(n, conservar_extra=True) if isinstance(n, dict) else None
+            if a is None or not a.id:
+                resumen["omitidos"] += 1
+                continue
+            lote.append(a)
+            if len(lote) >= tam_lote:
+                self._guardar_lote(lote, resumen)
+                lote = []
+        if lote:
+            self._guardar_lote(lote, resumen)
+        return resumen
+
+    def _guardar_lote(self, lote: list, resumen: dict):
+        conexion = self._conexion()
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            for a in lote:
+                resumen[self._guardar_uno(conexion, a)] += 1
+            self._subir_version(conexion)
+            conexion.execute("COMMIT")
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+        for fuente in self.cuerpos.sin_diccionario(conexion, {a.fuente for a in lote}):
+            self._entrenar_diccionario(conexion, fuente)
+
+    def _entrenar_diccionario(self, conexion, fuente: str) -> int:
+        """ Entrena el diccionario de compresión de 'fuente' y recomprime sus cuerpos con él. """
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            self.cuerpos.entrenar(conexion, fuente)
+            recomprimidos = self.cuerpos.recomprimir(conexion, fuente)
+            conexion.execute("COMMIT")
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+        print(f"📚 Diccionario de compresión entrenado para {fuente} ({recomprimidos} cuerpos recomprimidos).")
+        return recomprimidos
+
+    def recomprimir_cuerpos(self) -> int:
+        """ Reentrena el diccionario de cada fuente (con lo guardado hoy) y recomprime todos los cuerpos. """
+        conexion = self._conexion()
+        fuentes = [fila[0] for fila in conexion.execute(
+            "SELECT a.fuente FROM cuerpos c JOIN articulos a ON a.id = c.id GROUP BY a.fuente HAVING COUNT(*) >= ?",
+            (MIN_MUESTRAS_DICCIONARIO,))]
+        return sum(self._entrenar_diccionario(conexion, fuente) for fuente in fuentes)
+
+    def _guardar_uno(self, conexion, a: Articulo) -> str:
+        id_ = str(a.id)
+
+        # La misma URL (canónica) ya guardada con OTRO id: es el mismo artículo
+        url_canonica = normalizar_url(a.url) or None
+        if url_canonica:
+            fila = conexion.execute("SELECT id FROM articulos WHERE url_canonica = ?", (url_canonica,)).fetchone()
+            if fila and fila[0] != id_:
+                return "omitidos"
+
+        # Casi duplicado de otro artículo: se une a su canónico
+        firma = None
+        if not a.duplicado_de:
+            firma = firma_minhash(limpiar_texto_rapido(a.texto()))
+            canonico_id = self._buscar_canonico(conexion, id_, firma) if firma is not None else None
+            if canonico_id is not None:
+                canonico = _fila_a_articulo(conexion.execute(
+                    f"SELECT {_COLUMNAS} FROM articulos WHERE id = ?", (canonico_id,)).fetchone())
+                fusionar_fuentes(canonico, a)
+                conexion.execute("UPDATE articulos SET fuentes = ? WHERE id = ?",
+                                 (json.dumps(canonico.fuentes, ensure_ascii=False), canonico_id))
+                a = Articulo(id=id_, url=a.url, slug=a.slug, fuente=a.fuente, fecha=a.fecha,
+                             duplicado_de=canonico_id)
+                firma = None
+
+        conexion.execute(
+            f"""INSERT INTO articulos ({_COLUMNAS}, firma, guardado_en, url_canonica)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    url = excluded.url, url_canonica = excluded.url_canonica, fuente = excluded.fuente, titulo = excluded.titulo,
+                    teaser = excluded.teaser, contenido = '', slug = excluded.slug,
+                    fecha = excluded.fecha, fuentes = COALESCE(excluded.fuentes, articulos.fuentes),
+                    duplicado_de = excluded.duplicado_de, extra = excluded.extra,
+                    firma = excluded.firma, guardado_en = excluded.guardado_en""",
+            (id_, a.url or None, a.fuente, a.titulo, a.teaser, '', a.slug, a.fecha,
+             json.dumps(a.fuentes, ensure_ascii=False) if a.fuentes else None, a.duplicado_de, a._extra,
+             firma.tobytes() if firma is not None else None, time.time(), url_canonica))
+
+        self.cuerpos.guardar(conexion, id_, a.fuente, a.contenido)
+
+        conexion.execute("DELETE FROM bandas_lsh WHERE id = ?", (id_,))
+        if firma is not None:
+            conexion.executemany("INSERT OR IGNORE INTO bandas_lsh (banda, clave, id) VALUES (?, ?, ?)",
+                                 [(b, clave, id_) for b, clave in bandas_lsh(firma)])
+        return "duplicados" if a.duplicado_de else "guardados"
+
+    def _buscar_canonico(self, conexion, id_: str, firma):
+        """ Primer artículo (el más antiguo) casi idéntico a 'firma', o None. """
+        candidatos = set()
+        for b, clave in bandas_lsh(firma):
+            candidatos.update(fila[0] for fila in conexion.execute(
+                "SELECT id FROM bandas_lsh WHERE banda = ? AND clave = ?", (b, clave)))
+        candidatos.discard(id_)
+        if not candidatos:
+            return None
+        marcas = ",".join("?" * len(candidatos))
+        for id_candidato, firma_candidato in conexion.execute(
+                f"SELECT id, firma FROM articulos WHERE id IN ({marcas}) AND firma IS NOT NULL ORDER BY rowid",
+                tuple(candidatos)):
+            if es_duplicado(np.frombuffer(firma_candidato, dtype=np.uint64), firma):
+                return id_candidato
+        return None
+
+    def reemplazar(self, eliminados, articulos) -> dict:
+        """
+        En UNA transacción borra los _id 'eliminados' y guarda 'articulos'
+        (upsert). Sirve para re-clavear y fusionar registros (ver
+        migracion_ids) sin pasar por un estado intermedio visible.
+        """
+        resumen = {"guardados": 0, "duplicados": 0, "omitidos": 0, "eliminados": 0}
+        conexion = self._conexion()
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            for id_ in eliminados:
+                resumen["eliminados"] += conexion.execute("DELETE FROM articulos WHERE id = ?", (str(id_),)).rowcount
+                conexion.execute("DELETE FROM bandas_lsh WHERE id = ?", (str(id_),))
+                self.cuerpos.borrar(conexion, str(id_))
+            for a in articulos:
+                resumen[self._guardar_uno(conexion, a)] += 1
+            self._subir_version(conexion)
+            conexion.execute("COMMIT")
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+        return resumen
+
+    def liberar_espacio(self):
+        """ Devuelve al disco las páginas libres (VACUUM) y vacía el WAL. """
+        conexion = self._conexion()
+        conexion.execute("VACUUM")
+        conexion.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def tamano_en_disco(self) -> int:
+        """ Bytes que ocupa el almacén (base + WAL). """
+        return sum(os.path.getsize(self.ruta + sufijo) for sufijo in ("", "-wal")
+                   if os.path.exists(self.ruta + sufijo))
+
+    def migrar_desde_json(self, ruta_json: str = JSON_PATH) -> dict:
+        """ Importa (una sola vez) el JSON antiguo. Se puede volver a llamar a mano. """
+        resumen = {"guardados": 0, "duplicados": 0, "omitidos": 0}
+        if os.path.exists(ruta_json):
+            print(f"📦 Migrando {ruta_json} al almacén SQLite ({self.ruta})...")
+            try:
+                with open(ruta_json, "r", encoding="utf-8") as f:
+                    datos = json.load(f)
+            except json.JSONDecodeError:
+                print(f"⚠️ {ruta_json} está corrupto. No se migra.")
+                return resumen
+            registros = datos.values() if isinstance(datos, dict) else datos
+            resumen = self.guardar(n for n in registros if isinstance(n, dict))
+            print(f"✅ Migración completa: {resumen}")
+        self._conexion().execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('migrado_json', ?)",
+                                 (time.strftime("%Y-%m-%d %H:%M:%S"),))
+        return resumen
+
+    # -----------------------------
+    # Lectura
+    # -----------------------------
+    def _seleccionar(self, condiciones=(), parametros=(), orden: str = "a.rowid", con_contenido: bool = True,
+                     conservar_extra: bool = False, limite: int = None):
+        """
+        Genera los Articulo que cumplen 'condiciones' (sobre el alias 'a').
+        Con con_contenido el cuerpo se descomprime en la misma consulta; si
+        no, el Articulo lo pedirá por _id solo si alguien lee 'contenido'.
+        """
+        if con_contenido:
+            consulta = (f"SELECT {_COLUMNAS_A}, c.diccionario, c.datos FROM articulos a "
+                        "LEFT JOIN cuerpos c ON c.id = a.id")
+        else:
+            consulta = f"SELECT {_COLUMNAS_A} FROM articulos a"
+        if condiciones:
+            consulta += " WHERE " + " AND ".join(condiciones)
+        consulta += f" ORDER BY {orden}" + (f" LIMIT {int(limite)}" if limite else "")
+        for fila in self._conexion().execute(consulta, tuple(parametros)):
+            a = _fila_a_articulo(fila[:11], conservar_extra)
+            if con_contenido:
+                if fila[12] is not None:
+                    a.contenido = self.cuerpos.texto(fila[11], fila[12])
+            elif not a.contenido:
+                a._contenido = None
+            yield a
+
+    def articulos(self, incluir_duplicados: bool = False, conservar_extra: bool = False, con_contenido: bool = True):
+        """ Genera los Articulo guardados (en orden de inserción), sin cargar todo en memoria. """
+        condiciones = () if incluir_duplicados else ("a.duplicado_de IS NULL",)
+        return self._seleccionar(condiciones, con_contenido=con_contenido, conservar_extra=conservar_extra)
+
+    def contenido(self, id_: str) -> str:
+        """ Cuerpo (descomprimido) de un artículo, por _id. """
+        return self.cuerpos.obtener(id_)
+
+    def contenidos(self, ids) -> dict:
+        """ {_id: cuerpo} de muchos artículos en pocas consultas (ver articulo.textos). """
+        return self.cuerpos.obtener_varios(ids)
+
+    def cargar_articulos(self) -> list:
+        """ Lista de Articulo para el motor (sin duplicados ni campos extra). """
+        return list(self.articulos())
+
+    def ids(self) -> set:
+        return {fila[0] for fila in self._conexion().execute("SELECT id FROM articulos")}
+
+    def urls(self) -> set:
+        return {fila[0] for fila in self._conexion().execute("SELECT url FROM articulos WHERE url IS NOT NULL")}
+
+    def existe(self, id_: str = None, url: str = None) -> bool:
+        """ ¿Ya está guardado (por _id o por URL canónica)? Usa los índices, no carga nada. """
+        return bool(self._conexion().execute(
+            "SELECT 1 FROM articulos WHERE id = ? OR url_canonica = ? LIMIT 1",
+            (str(id_) if id_ is not None else None, normalizar_url(url) or None)).fetchone())
+
+    def contiene(self, clave: str) -> bool:
+        """ 'clave' puede ser un _id o una URL (los scrapers usan una u otra). """
+        return self.existe(id_=clave, url=clave)
+
+    def obtener(self, clave: str, conservar_extra: bool = False):
+        """ Articulo por _id o por URL canónica (None si no está). """
+        return next(self._seleccionar(("(a.id = ? OR a.url_canonica = ?)",),
+                                      (str(clave), normalizar_url(str(clave)) or None),
+                                      conservar_extra=conservar_extra, limite=1), None)
+
+    def por_fecha(self, desde: str = None, hasta: str = None, fuente: str = None,
+                  incluir_duplicados: bool = False, conservar_extra: bool = False, con_contenido: bool = True):
+        """
+        Artículos con fecha en [desde, hasta) (texto 'YYYY-MM-DD[ HH:MM:SS]'),
+        opcionalmente de una sola fuente, ordenados por fecha (usa los índices).
+        """
+        condiciones, parametros = [], []
+        for condicion, valor in (("a.fecha >= ?", desde), ("a.fecha < ?", hasta), ("a.fuente = ?", fuente)):
+            if valor is not None:
+                condiciones.append(condicion)
+                parametros.append(valor)
+        if not incluir_duplicados:
+            condiciones.append("a.duplicado_de IS NULL")
+        return self._seleccionar(condiciones, parametros, orden="a.fecha", con_contenido=con_contenido,
+                                 conservar_extra=conservar_extra)
+
+    def por_fuente(self, fuente: str, **kwargs):
+        """ Artículos de una fuente, ordenados por fecha. """
+        return self.por_fecha(fuente=fuente, **kwargs)
+
+    def contar_por_fuente(self, incluir_duplicados: bool = False) -> dict:
+        consulta = "SELECT fuente, COUNT(*) FROM articulos"
+        if not incluir_duplicados:
+            consulta += " WHERE duplicado_de IS NULL"
+        return dict(self._conexion().execute(consulta + " GROUP BY fuente").fetchall())
+
+    def version(self) -> str:
+        """
+        Cambia con cada guardado (sirve para invalidar el snapshot binario del
+        corpus). Es un contador en 'meta' que sube en la misma transacción que
+        escribe, así leerlo no recorre la tabla; el id del almacén evita que
+        una base recreada desde cero repita versiones de la anterior.
+        """
+        meta = dict(self._conexion().execute("SELECT clave, valor FROM meta WHERE clave IN ('id_almacen', 'version')"))
+        return f"sqlite-{meta.get('id_almacen')}-{meta.get('version')}"
+
+    def contar(self, incluir_duplicados: bool = True) -> int:
+        consulta = "SELECT COUNT(*) FROM articulos" + ("" if incluir_duplicados else " WHERE duplicado_de IS NULL")
+        return self._conexion().execute(consulta).fetchone()[0]
+
+
+class LoteNoticias:
+    """
+    Lo que ven los scrapers: el almacén + las noticias nuevas pendientes de
+    guardar. Se usa como el diccionario de antes ('in', [clave] = noticia,
+    len), pero "¿ya la tengo?" se consulta a los índices del almacén (por _id
+    o por URL canónica, sin importar con cuál indexe el scraper) y al guardar
+    solo se escriben las pendientes.
+    """
+
+    def __init__(self, store: NewsStore, por: str = "id"):
+        self.store = store
+        self.por = por  # Solo informativo: 'in' acepta tanto IDs como URLs
+        self.pendientes = {}
+        self._claves_pendientes = set()  # _id y URL canónica de las pendientes
+
+    def _claves(self, clave, noticia=None) -> set:
+        claves = {str(clave), normalizar_url(str(clave))}
+        if isinstance(noticia, (dict, Articulo)):
+            a = como_articulo(noticia)
+            claves.update(c for c in (str(a.id) if a.id else None, normalizar_url(a.url)) if c)
+        return claves - {""}
+
+    def __contains__(self, clave):
+        return not self._claves(clave).isdisjoint(self._claves_pendientes) or self.store.contiene(clave)
+
+    def __setitem__(self, clave, noticia):
+        self.pendientes[clave] = noticia
+        self._claves_pendientes |= self._claves(clave, noticia)
+
+    def __getitem__(self, clave):
+        return self.pendientes[clave]
+
+    def __len__(self):
+        return self.store.contar() + len(self.pendientes)
+
+    def guardar(self) -> dict:
+        """ Escribe las pendientes en el almacén (un lote); desde ahí las ven los índices. """
+        resumen = self.store.guardar(self.pendientes.values())
+        self.pendientes = {}
+        self._claves_pendientes = set()
+        return resumen
+
+
+class AlmacenStaging:
+    """
+    Almacén de un scraper que corre en paralelo con otros: pregunta al
+    almacén principal qué ya existe, pero lo nuevo se anexa a su propio
+    archivo JSONL ('ruta') en vez de competir por escribir en el almacén.
+    fusionar_staging() lo pasa al almacén cuando terminan todos.
+    """
+
+    def __init__(self, store, ruta: str):
+        self.store = store
+        self.ruta = ruta
+        self._claves = set()  # _id y URL canónica de lo ya anexado
+        self._n = 0
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        for a in leer_staging(ruta):  # (restos de una corrida que no llegó a fusionarse)
+            self._registrar(a)
+
+    def _registrar(self, a: Articulo):
+        self._claves.update(c for c in (str(a.id), normalizar_url(a.url)) if c)
+        self._n += 1
+
+    def contiene(self, clave: str) -> bool:
+        return (str(clave) in self._claves or normalizar_url(str(clave)) in self._claves
+                or self.store.contiene(clave))
+
+    def contar(self, incluir_duplicados: bool = True) -> int:
+        return self.store.contar(incluir_duplicados) + self._n
+
+    def contenido(self, id_: str) -> str:
+        return self.store.contenido(id_)
+
+    def contenidos(self, ids) -> dict:
+        return self.store.contenidos(ids)
+
+    def guardar(self, articulos, tam_lote: int = TAM_LOTE) -> dict:
+        """ Anexa los artículos al JSONL de staging ('guardados' = anexados, aún no fusionados). """
+        resumen = {"guardados": 0, "duplicados": 0, "omitidos": 0}
+        with open(self.ruta, "a", encoding="utf-8") as f:
+            for n in articulos:
+                a = n if isinstance(n, Articulo) else Articulo.desde_dict(n, conservar_extra=True) if isinstance(n, dict) else None
+                if a is None or not a.id:
+                    resumen["omitidos"] += 1
+                    continue
+                f.write(json.dumps(a.a_dict(), ensure_ascii=False) + "\n")
+                self._registrar(a)
+                resumen["guardados"] += 1
+            f.flush()
+            os.fsync(f.fileno())
+        return resumen
+
+
+def leer_staging(ruta: str):
+    """ Genera los Articulo de un JSONL de staging (una última línea cortada se ignora). """
+    try:
+        f = open(ruta, encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        for linea in f:
+            if not linea.strip():
+                continue
+            try:
+                yield Articulo.desde_dict(json.loads(linea), conservar_extra=True)
+            except ValueError:
+                print(f"⚠️  Línea de staging ilegible en {ruta} (se ignora).")
+
+
+def fusionar_staging(rutas, store=None) -> dict:
+    """
+    Pasa al almacén lo anexado en cada staging, en el orden de 'rutas'. Una
+    nota (misma URL canónica) que trajeron varias fuentes se guarda una vez:
+    la del primer staging; dentro de uno mismo, gana la última versión.
+    Borra cada staging ya fusionado. Devuelve {ruta: resumen de guardar}.
+    """
+    store = store or obtener_store()
+    vistas, resumenes = set(), {}
+    for ruta in rutas:
+        if not os.path.exists(ruta):
+            continue
+        propias, repetidas = {}, 0
+        for a in leer_staging(ruta):
+            clave = normalizar_url(a.url) or str(a.id)
+            if clave in vistas:
+                repetidas += 1
+                continue
+            propias[clave] = a
+        vistas.update(propias)
+        resumen = store.guardar(propias.values())
+        resumen["omitidos"] += repetidas
+        resumenes[ruta] = resumen
+        os.remove(ruta)
+    return resumenes
+
+
+# --- Almacén único por proceso ---
+_store = None
+_lock_store = threading.Lock()
+
+
+def _nuevo_store(ruta: str = None):
+    if BACKEND == "jsonl":
+        from ai_engine.segment_log import RegistroSegmentos, LOG_DIR
+        return RegistroSegmentos(ruta or LOG_DIR)
+    return NewsStore(ruta or DB_PATH)
+
+
+def obtener_store(ruta: str = None):
+    """ Almacén del proceso: NewsStore o RegistroSegmentos según NEWS_BACKEND. """
+    global _store
+    if ruta is not None and (_store is None or _store.ruta != ruta):
+        return _nuevo_store(ruta)
+    if _store is None:
+        with _lock_store:
+            if _store is None:
+                _store = _nuevo_store()
+    return _store
+
+
+def usar_store(store):
+    """ Fija el almacén del proceso (ej. un AlmacenStaging en un worker de scraper_manager). """
+    global _store
+    _store = store
+
+
+if __name__ == "__main__":
+    store = obtener_store()
+    store.migrar_desde_json(sys.argv[1] if len(sys.argv) > 1 else JSON_PATH)
+    print(f"ℹ️  Artículos en el almacén: {store.contar()} ({store.contar(incluir_duplicados=False)} sin duplicados)")
@@ -0,0 +1,91 @@
+"""
+result_cache.py — Caché de resultados de verificación (LRU + TTL)
+Muchos usuarios pegan el mismo mensaje viral con mínimas diferencias de
+puntuación o tildes; 'limpiar_texto' los lleva a la misma forma canónica.
+La clave es (texto limpio, top_k) y cada entrada va sellada con la versión
+del modelo + generación del índice + huella del corpus: si cualquiera cambia
+(reentrenamiento, actualización del índice, noticias nuevas o editadas,
+/recargar_noticias), la caché se vacía sola.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+MAX_ENTRADAS_CACHE = int(os.environ.get("MAX_ENTRADAS_CACHE", 2048))
+TTL_CACHE_SEGUNDOS = float(os.environ.get("TTL_CACHE_SEGUNDOS", 600))  # 10 minutos
+
+
+class CacheResultados:
+    """ LRU acotada con expiración por entrada y contadores de aciertos/fallos. """
+
+    def __init__(self, max_entradas: int = MAX_ENTRADAS_CACHE, ttl: float = TTL_CACHE_SEGUNDOS):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos = OrderedDict()  # clave -> (expira_en, valor)
+        self._version = None
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expirados = 0
+        self.invalidaciones = 0
+
+    def _comprobar_version(self, version):
+        # (Llamar con el lock tomado)
+        if version != self._version:
+            if self._datos:
+                self.invalidaciones += 1
+            self._datos.clear()
+            self._version = version
+
+    def obtener(self, clave, version):
+        """ Devuelve el valor cacheado o None (cuenta acierto/fallo). """
+        with self._lock:
+            self._comprobar_version(version)
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            expira_en, valor = entrada
+            if expira_en < time.monotonic():
+                del self._datos[clave]
+                self.expirados += 1
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave, version, valor):
+        with self._lock:
+            self._comprobar_version(version)
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def invalidar(self):
+        """ Vacía la caché (ej. desde /recargar_noticias). """
+        with self._lock:
+            if self._datos:
+                self.invalidaciones += 1
+            self._datos.clear()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._datos),
+                "max_entradas": self.max_entradas,
+                "ttl_segundos": self.ttl,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / total, 4) if total else 0.0,
+                "expirados": self.expirados,
+                "invalidaciones": self.invalidaciones,
+            }
+
+
+# Caché única del proceso
+cache_resultados = CacheResultados()
@@ -0,0 +1,154 @@
+"""
+retraining.py — Reentrenamiento del modelo TF-IDF en segundo plano
+Reconstruye el vectorizador y el índice del corpus desde la base de
+noticias (leída en streaming) FUERA del camino de las peticiones,
+guarda un artefacto versionado y lo publica atómicamente:
+  1. Índice del corpus en disco (models/indice_corpus, ver index_store)
+  2. models/vectorizer_es-<fecha>.joblib  (artefacto versionado)
+  3. os.replace(...) sobre models/vectorizer_es.joblib  (los demás procesos
+     lo detectan por mtime gracias al RegistroModelos)
+  4. Intercambio en memoria del modelo y del índice en ESTE proceso.
+
+Uso manual (ej. desde cron tras correr los scrapers):
+    python -m ai_engine.retraining
+"""
+
+import os
+import glob
+import time
+import threading
+from datetime import datetime
+
+import joblib
+
+from ai_engine import model_loader
+from ai_engine.corpus_index import IndiceCorpus, instalar_indice
+from ai_engine.corpus_reader import iterar_articulos
+
+# Cuántos artefactos versionados se conservan en disco
+MAX_ARTEFACTOS = 5
+
+_lock_reentrenamiento = threading.Lock()
+_ultimo_resultado = {}
+
+
+def _ruta_versionada(ruta_modelo: str, version: str) -> str:
+    base, ext = os.path.splitext(ruta_modelo)
+    return f"{base}-{version}{ext}"
+
+
+def _limpiar_artefactos_antiguos(ruta_modelo: str, conservar: int = MAX_ARTEFACTOS):
+    """ Borra los artefactos versionados más viejos (conserva los 'conservar' últimos). """
+    base, ext = os.path.splitext(ruta_modelo)
+    artefactos = sorted(glob.glob(f"{base}-*{ext}"))
+    for viejo in artefactos[:-conservar] if conservar > 0 else artefactos:
+        try:
+            os.remove(viejo)
+        except OSError as e:
+            print(f"⚠️ No se pudo borrar el artefacto antiguo {viejo}: {e}")
+
+
+def _publicar_archivo(origen: str, destino: str) -> bytes:
+    """
+    Copia 'origen' a un temporal en la MISMA carpeta y lo renombra sobre
+    'destino' con os.replace (atómico): un lector nunca ve un archivo a medias.
+    Devuelve los bytes publicados.
+    """
+    with open(origen, "rb") as f:
+        contenido = f.read()
+    temporal = f"{destino}.tmp-{os.getpid()}"
+    with open(temporal, "wb") as f:
+        f.write(contenido)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, destino)
+    return contenido
+
+
+def reentrenar_modelo(publicar_en_memoria: bool = True):
+    """
+    Entrena un vectorizador nuevo con el corpus actual, escribe el artefacto
+    versionado y lo publica. Si 'publicar_en_memoria', además construye el
+    índice del corpus y lo intercambia junto con el modelo en este proceso.
+    Devuelve un diccionario con el resumen (o lanza la excepción).
+    """
+    t0 = time.perf_counter()
+    registro = model_loader.obtener_registro()
+    ruta_modelo = registro.ruta
+    os.makedirs(os.path.dirname(ruta_modelo) or ".", exist_ok=True)
+
+    # --- 1. Crear el corpus (leyendo la base de datos en streaming) ---
+    corpus_base = model_loader._crear_corpus_entrenamiento()
+    if not corpus_base:
+        raise ValueError("Corpus de entrenamiento vacío. Ejecuta los scrapers primero.")
+
+    # --- 2. Entrenar ---
+    print("🧠  [Reentrenamiento] Entrenando nuevo vectorizer TF-IDF en segundo plano...")
+    vectorizer = model_loader._nuevo_vectorizer()
+    vectorizer.fit(corpus_base)
+
+    # --- 3. Índice en disco (memmap) ANTES de publicar el modelo: cuando los
+    #        demás procesos detecten el modelo nuevo, su índice ya estará listo ---
+    indice = model_loader.construir_indice_en_disco(vectorizer)
+    articulos_indexados = len(indice) if indice is not None else 0
+
+    # --- 4. Artefacto versionado + publicación atómica ---
+    version = datetime.now().strftime("%Y%m%d-%H%M%S")
+    ruta_versionada = _ruta_versionada(ruta_modelo, version)
+    joblib.dump(vectorizer, ruta_versionada)
+    contenido = _publicar_archivo(ruta_versionada, ruta_modelo)
+    _limpiar_artefactos_antiguos(ruta_modelo)
+
+    # --- 5. Intercambio en memoria (este proceso) ---
+    if publicar_en_memoria:
+        if indice is None:
+            indice = IndiceCorpus.construir(vectorizer, iterar_articulos())
+        # Primero el índice (ligado al nuevo vectorizador) y luego el modelo:
+        # la primera petición con el modelo nuevo ya encuentra su índice listo.
+        instalar_indice(indice)
+        registro.publicar(vectorizer, contenido, segundos_carga=0.0)
+
+    resumen = {
+        "artefacto": ruta_versionada,
+        "version": registro.estado()["version"] if publicar_en_memoria else None,
+        "vocabulario": len(vectorizer.vocabulary_),
+        "articulos_corpus": len(corpus_base),
+        "articulos_indexados": articulos_indexados,
+        "segundos": round(time.perf_counter() - t0, 3),
+        "terminado_en": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    print(f"✅ [Reentrenamiento] Modelo publicado: {resumen}")
+    return resumen
+
+
+def _ejecutar_en_hilo():
+    global _ultimo_resultado
+    try:
+        _ultimo_resultado = {"estado": "ok", **reentrenar_modelo()}
+    except Exception as e:
+        print(f"🚨 [Reentrenamiento] Falló: {e}")
+        _ultimo_resultado = {"estado": "error", "error": str(e)}
+    finally:
+        _lock_reentrenamiento.release()
+
+
+def iniciar_reentrenamiento() -> bool:
+    """
+    Lanza el reentrenamiento en un hilo aparte. Devuelve False si ya hay
+    uno en curso (no se encolan reentrenamientos).
+    """
+    if not _lock_reentrenamiento.acquire(blocking=False):
+        return False
+    threading.Thread(target=_ejecutar_en_hilo, name="reentrenamiento-tfidf", daemon=True).start()
+    return True
+
+
+def estado_reentrenamiento() -> dict:
+    """ ¿Hay un reentrenamiento en curso? + resumen del último. """
+    return {"en_curso": _lock_reentrenamiento.locked(), "ultimo": _ultimo_resultado}
+
+
+if __name__ == "__main__":
+    # En un proceso aparte solo se escribe y publica el artefacto; los
+    # servidores en marcha lo recargan solos al detectar el cambio de mtime.
+    reentrenar_modelo(publicar_en_memoria=False)
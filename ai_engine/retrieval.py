@@ -0,0 +1,98 @@
+"""
+retrieval.py — Motor de recuperación top-k con índice invertido
+Guarda, por cada término del vocabulario TF-IDF, la lista de artículos que lo
+contienen (postings) con su peso. Una consulta solo puntúa los artículos que
+comparten al menos un término con la afirmación, y devuelve los k mejores.
+"""
+
+import numpy as np
+from sklearn.preprocessing import normalize
+
+
+def seleccionar_top_k(candidatos, puntajes, top_k: int):
+    """
+    Elige los top_k candidatos de mayor puntaje (> 0), de mayor a menor.
+    'candidatos' debe venir en orden ascendente: en caso de empate gana el
+    artículo que aparece primero en el corpus.
+    """
+    if top_k < 1 or candidatos.size == 0:
+        return []
+
+    if top_k == 1:
+        seleccion = np.array([int(np.argmax(puntajes))])
+    else:
+        if top_k < candidatos.size:
+            # Selección parcial O(candidatos) con np.partition; se conservan
+            # los empates en el corte para desempatar por orden del corpus.
+            corte = np.partition(puntajes, -top_k)[-top_k]
+            seleccion = np.flatnonzero(puntajes >= corte)
+        else:
+            seleccion = np.arange(candidatos.size)
+        orden = np.lexsort((candidatos[seleccion], -puntajes[seleccion]))
+        seleccion = seleccion[orden][:top_k]
+
+    return [(int(candidatos[i]), float(puntajes[i])) for i in seleccion if puntajes[i] > 0.0]
+
+
+class IndiceInvertido:
+    """
+    Postings por término construidos a partir de la matriz documento-término
+    (normalizada L2). Internamente es la matriz en formato CSC:
+      - punteros[t]:punteros[t+1] delimita los postings del término t
+      - documentos / pesos: fila (artículo) y peso TF-IDF de cada posting
+    """
+
+    def __init__(self, matriz_csr=None, punteros=None, documentos=None, pesos=None, n_documentos=0):
+        if matriz_csr is not None:
+            csc = matriz_csr.tocsc()
+            csc.sort_indices()
+            n_documentos = matriz_csr.shape[0]
+            punteros, documentos, pesos = csc.indptr, csc.indices, csc.data
+        # (Los arreglos pueden venir ya hechos, ej. mapeados desde disco)
+        self.n_documentos = n_documentos
+        self.punteros = punteros
+        self.documentos = documentos
+        self.pesos = pesos
+
+    def postings(self, termino: int):
+        """ Devuelve (documentos, pesos) del término indicado. """
+        ini, fin = self.punteros[termino], self.punteros[termino + 1]
+        return self.documentos[ini:fin], self.pesos[ini:fin]
+
+    def puntuar_candidatos(self, vector_consulta):
+        """
+        Acumula el producto escalar SOLO sobre los artículos candidatos.
+        Devuelve (candidatos, puntajes) con los candidatos en orden ascendente.
+        """
+        q = normalize(vector_consulta, norm='l2', copy=True).tocsr()
+        terminos, pesos_q = q.indices, q.data
+        if terminos.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        inicios = self.punteros[terminos]
+        largos = self.punteros[terminos + 1] - inicios
+        total = int(largos.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        # Posiciones de todos los postings de los términos de la consulta
+        desplaz = np.repeat(inicios - np.cumsum(largos) + largos, largos)
+        posiciones = np.arange(total) + desplaz
+
+        docs = self.documentos[posiciones]
+        contrib = self.pesos[posiciones] * np.repeat(pesos_q, largos)
+
+        candidatos, inverso = np.unique(docs, return_inverse=True)
+        puntajes = np.bincount(inverso, weights=contrib, minlength=candidatos.size)
+        return candidatos, puntajes
+
+    def buscar(self, vector_consulta, top_k: int = 1):
+        """
+        Devuelve una lista [(fila_articulo, similitud), ...] con los top_k
+        artículos de mayor similitud coseno (> 0), de mayor a menor.
+        En caso de empate gana el artículo que aparece primero en el corpus.
+        """
+        if top_k < 1:
+            return []
+        candidatos, puntajes = self.puntuar_candidatos(vector_consulta)
+        return seleccionar_top_k(candidatos, puntajes, top_k)
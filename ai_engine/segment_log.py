@@ -0,0 +1,680 @@
+"""
+segment_log.py — Registro de noticias en segmentos JSONL de solo-anexar
+Alternativa liviana al almacén SQLite (news_store), sin base de datos:
+
+  news_scrapers/noticias_log/
+    MANIFIESTO.json            -> snapshot vigente + segmentos ya compactados
+    snapshot-<gen>.jsonl       -> corpus compactado e INMUTABLE (una noticia por línea)
+    indices-<gen>.json         -> índices secundarios del snapshot
+    lsh-<gen>.npz              -> bandas LSH de los artículos canónicos del snapshot
+    segmento-<ns>-<pid>.jsonl  -> noticias nuevas de UN guardado de un scraper
+
+  - Guardar = escribir un segmento nuevo (solo las noticias nuevas) a un
+    temporal y publicarlo con os.replace: O(nuevas) y un lector nunca ve un
+    archivo a medias (ni se pisan dos scrapers, cada uno escribe el suyo).
+  - Leer = recorrer el snapshot y los segmentos línea por línea (sin
+    json.load del archivo completo). Si el mismo _id aparece varias veces
+    gana el último; una URL ya vista con otro _id se ignora.
+  - Compactar (en segundo plano cuando se acumulan segmentos) = resolver
+    _id/URL repetidos de los segmentos, colapsar SUS casi duplicados contra
+    el LSH guardado del snapshot (lo ya compactado no se vuelve a comparar)
+    y reescribir el snapshot en streaming; el manifiesto se reemplaza
+    atómicamente.
+  - Índices secundarios: junto a cada snapshot se escribe indices-<gen>.json
+    (_id -> posición en bytes, URL canónica, fuente y fecha). Se cargan (solo
+    claves, no el texto) y se completan con los segmentos pendientes, así
+    "¿ya la tengo?" y las consultas por fuente/fecha no recorren el corpus.
+    En memoria se mantienen al día: un guardado suma su segmento y solo se
+    leen los segmentos que agregó otro proceso (se detecta por la generación
+    del manifiesto, la lista de segmentos pendientes y la fecha de
+    modificación de la carpeta); se recargan solo si cambia la generación.
+
+Se activa con NEWS_BACKEND=jsonl (ver news_store.obtener_store): expone la
+misma interfaz que NewsStore, así que scrapers y motor no cambian.
+
+Uso manual:
+    python -m ai_engine.segment_log            # compactar ahora
+"""
+
+import os
+import glob
+import json
+import time
+import bisect
+import zipfile
+import threading
+
+import numpy as np
+
+from ai_engine.ai_utils import limpiar_texto_rapido
+from ai_engine.articulo import Articulo, normalizar_url
+from ai_engine.duplicados import (AgrupadorDuplicados, BANDAS_LSH, claves_bandas, firma_minhash,
+                                  fusionar_fuentes)
+
+LOG_DIR = os.environ.get("NEWS_LOG_DIR", "news_scrapers/noticias_log")
+JSON_PATH = "news_scrapers/noticias_partidos.json"  # Formato antiguo (solo para migrar)
+MANIFIESTO = "MANIFIESTO.json"
+MAX_SEGMENTOS = int(os.environ.get("NEWS_LOG_MAX_SEGMENTOS", 32))  # Se compacta al superarlo
+SEGUNDOS_LOCK_VENCIDO = 600  # Un lock de compactación más viejo se considera abandonado
+REINTENTOS_LECTURA = 3
+
+
+def _escribir_atomico(ruta: str, lineas):
+    """ Escribe 'lineas' en un temporal de la misma carpeta y lo publica con os.replace. """
+    temporal = f"{ruta}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(temporal, "w", encoding="utf-8") as f:
+        for linea in lineas:
+            f.write(linea)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+
+
+def _guardar_lsh(ruta: str, ids: list, bandas: list):
+    """ Guarda el LSH de un snapshot ({ids, bandas}) de forma atómica, como _escribir_atomico. """
+    temporal = f"{ruta}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(temporal, "wb") as f:
+        np.savez(f, ids=np.array(ids, dtype=str),
+                 bandas=np.array(bandas, dtype=np.uint64).reshape(-1, BANDAS_LSH))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+
+
+def _leer_jsonl_con_posicion(ruta: str):
+    """ (offset en bytes, registro) de cada línea de un JSONL (se omiten las vacías o corruptas). """
+    with open(ruta, "rb") as f:
+        offset = 0
+        for linea in f:
+            inicio, offset = offset, offset + len(linea)
+            if not linea.endswith(b"\n"):
+                break  # Línea final a medias: nunca se publicó completa
+            try:
+                registro = json.loads(linea)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            if isinstance(registro, dict) and registro.get("_id"):
+                yield inicio, registro
+
+
+def _leer_jsonl(ruta: str):
+    """ Registros de un JSONL (se omiten líneas vacías o corruptas). """
+    for _, registro in _leer_jsonl_con_posicion(ruta):
+        yield registro
+
+
+def _linea(registro: dict) -> str:
+    return json.dumps(registro, ensure_ascii=False) + "\n"
+
+
+def _firma_registro(registro: dict):
+    """ Firma MinHash de un registro (None si es un duplicado o un texto muy corto). """
+    if registro.get("duplicado_de"):
+        return None
+    return firma_minhash(limpiar_texto_rapido(Articulo.desde_dict(registro).texto()))
+
+
+def _sin_contenido(a: Articulo, con_contenido: bool) -> Articulo:
+    if not con_contenido and a.contenido:
+        a._contenido = None  # Se vuelve a leer por _id solo si alguien lo pide
+    return a
+
+
+class _Indices:
+    """
+    Índices secundarios en memoria: _id -> (archivo, offset, URL canónica,
+    fuente, fecha, ¿duplicado?), URL canónica -> _id y, al pedirlos, fecha
+    ordenada. Misma regla que la lectura: gana el último guardado de un _id y
+    una URL ya vista con otro _id se ignora.
+    """
+
+    def __init__(self):
+        self.entradas = {}
+        self.por_url = {}
+        self._fechas = None
+
+    def agregar(self, archivo: str, offset: int, registro: dict) -> bool:
+        id_ = registro["_id"]
+        canonica = normalizar_url(registro.get("url"))
+        if canonica and self.por_url.setdefault(canonica, id_) != id_:
+            return False
+        anterior = self.entradas.get(id_)
+        if anterior and anterior[2] and anterior[2] != canonica:
+            self.por_url.pop(anterior[2], None)
+        self.entradas[id_] = (archivo, offset, canonica, registro.get("fuente") or "Desconocida",
+                              registro.get("update_date") or "", bool(registro.get("duplicado_de")))
+        self._fechas = None
+        return True
+
+    def fechas(self) -> list:
+        """ [(fecha, _id), ...] ordenado (se calcula una vez por versión). """
+        if self._fechas is None:
+            self._fechas = sorted((e[4], id_) for id_, e in self.entradas.items())
+        return self._fechas
+
+    def a_json(self, archivo: str) -> str:
+        return json.dumps({"archivo": archivo, "entradas": {id_: e[1:] for id_, e in self.entradas.items()
+                                                             if e[0] == archivo}}, ensure_ascii=False)
+
+    @classmethod
+    def desde_json(cls, datos: dict):
+        indices = cls()
+        archivo = datos["archivo"]
+        for id_, (offset, canonica, fuente, fecha, duplicado) in datos["entradas"].items():
+            indices.entradas[id_] = (archivo, offset, canonica, fuente, fecha, duplicado)
+            if canonica:
+                indices.por_url[canonica] = id_
+        return indices
+
+
+class RegistroSegmentos:
+    """ Corpus de noticias en segmentos JSONL (misma interfaz que NewsStore). """
+
+    def __init__(self, ruta: str = LOG_DIR, ruta_json: str = JSON_PATH):
+        self.ruta = ruta
+        self._lock_compactacion = threading.Lock()
+        self._cache_indices = None  # (sello (ver _sello), generación, segmentos ya indexados, _Indices)
+        os.makedirs(ruta, exist_ok=True)
+        if ruta_json and not self._existe_manifiesto():
+            self.migrar_desde_json(ruta_json)
+
+    def _ruta(self, nombre: str) -> str:
+        return os.path.join(self.ruta, nombre)
+
+    def _manifiesto(self) -> dict:
+        try:
+            with open(self._ruta(MANIFIESTO), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"generacion": 0, "snapshot": None, "compactados": []}
+
+    def _existe_manifiesto(self) -> bool:
+        return os.path.exists(self._ruta(MANIFIESTO))
+
+    def _segmentos_pendientes(self, manifiesto: dict) -> list:
+        compactados = set(manifiesto.get("compactados", []))
+        return [r for r in sorted(glob.glob(self._ruta("segmento-*.jsonl")))
+                if os.path.basename(r) not in compactados]
+
+    # -----------------------------
+    # Escritura
+    # -----------------------------
+    def guardar(self, articulos, tam_lote: int = None) -> dict:
+        """
+        Anexa los artículos como un segmento nuevo. Acepta Articulo o
+        diccionarios. ('tam_lote' se acepta por compatibilidad con NewsStore.)
+        """
+        resumen = {"guardados": 0, "duplicados": 0, "omitidos": 0}
+        indices = self._indices() if self._existe_manifiesto() else None
+        guardadas_por_url = {}
+        lineas, registros = [], []
+        for n in articulos:
+            a = n if isinstance(n, Articulo) else Articulo.desde_dict(n, conservar_extra=True) if isinstance(n, dict) else None
+            canonica = normalizar_url(a.url) if a is not None else ""
+            if canonica and a.id:
+                id_url = indices.por_url.get(canonica) if indices is not None else None
+                id_url = id_url or guardadas_por_url.setdefault(canonica, str(a.id))
+            if a is None or not a.id or (canonica and id_url != str(a.id)):
+                resumen["omitidos"] += 1  # (sin _id, o la misma URL ya guardada con otro _id)
+                continue
+            registro = a.a_dict()
+            registro["_id"] = str(a.id)
+            lineas.append(_linea(registro))
+            registros.append(registro)
+            resumen["duplicados" if a.duplicado_de else "guardados"] += 1
+        if lineas:
+            nombre = f"segmento-{time.time_ns():020d}-{os.getpid()}.jsonl"
+            _escribir_atomico(self._ruta(nombre), lineas)
+            self._indexar_segmento(nombre, lineas, registros)
+            if len(self._segmentos_pendientes(self._manifiesto())) > MAX_SEGMENTOS:
+                self.compactar_en_segundo_plano()
+        return resumen
+
+    def migrar_desde_json(self, ruta_json: str = JSON_PATH) -> dict:
+        """ Importa el JSON antiguo como un segmento y compacta (el snapshot inicial). """
+        resumen = {"guardados": 0, "duplicados": 0, "omitidos": 0}
+        if os.path.exists(ruta_json):
+            print(f"📦 Migrando {ruta_json} al registro de segmentos ({self.ruta})...")
+            try:
+                with open(ruta_json, "r", encoding="utf-8") as f:
+                    datos = json.load(f)
+            except json.JSONDecodeError:
+                print(f"⚠️ {ruta_json} está corrupto. No se migra.")
+                return resumen
+            registros = datos.values() if isinstance(datos, dict) else datos
+            resumen = self.guardar(n for n in registros if isinstance(n, dict))
+        self.compactar()
+        print(f"✅ Migración completa: {resumen}")
+        return resumen
+
+    # -----------------------------
+    # Compactación
+    # -----------------------------
+    def _tomar_lock_archivo(self) -> bool:
+        """ Lock entre procesos (archivo creado con O_EXCL; los vencidos se liberan). """
+        ruta = self._ruta("compactando.lock")
+        try:
+            if time.time() - os.path.getmtime(ruta) > SEGUNDOS_LOCK_VENCIDO:
+                os.remove(ruta)
+        except OSError:
+            pass
+        try:
+            os.close(os.open(ruta, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            return False
+
+    def compactar(self, eliminados=(), nuevos=()) -> dict:
+        """
+        Une el snapshot vigente con los segmentos pendientes en un snapshot
+        nuevo. Devuelve un resumen (vacío si otro proceso ya está compactando).
+        'eliminados' (_id) se descartan y 'nuevos' (Articulo) se agregan al
+        final, sin la regla de URL repetida (ver reemplazar).
+        """
+        if not self._lock_compactacion.acquire(blocking=False):
+            return {}
+        try:
+            if not self._tomar_lock_archivo():
+                return {}
+            try:
+                return self._compactar(eliminados, nuevos)
+            finally:
+                os.remove(self._ruta("compactando.lock"))
+        finally:
+            self._lock_compactacion.release()
+
+    def _compactar(self, eliminados=(), nuevos=()) -> dict:
+        t0 = time.perf_counter()
+        manifiesto = self._manifiesto()
+
+        # Restos de una compactación interrumpida (ya incluidos en el snapshot)
+        for nombre in manifiesto.get("compactados", []):
+            try:
+                os.remove(self._ruta(nombre))
+            except FileNotFoundError:
+                pass
+
+        # Solo los segmentos pendientes (pocos) se cargan en memoria; el snapshot
+        # se recorre una vez, al escribir el nuevo
+        segmentos = self._segmentos_pendientes(manifiesto)
+        anterior = self._indices_snapshot(manifiesto)
+        recientes, id_por_url = {}, {}
+        for ruta in segmentos:
+            for registro in _leer_jsonl(ruta):
+                id_, url = registro["_id"], normalizar_url(registro.get("url"))
+                if url and (anterior.por_url.get(url) or id_por_url.setdefault(url, id_)) != id_:
+                    continue  # La misma nota guardada con otro _id
+                recientes[id_] = registro  # El último guardado gana
+        eliminados = {str(id_) for id_ in eliminados}
+        for id_ in eliminados:
+            recientes.pop(id_, None)
+        for a in nuevos:
+            registro = a.a_dict()
+            registro["_id"] = str(a.id)
+            recientes[registro["_id"]] = registro
+        # La misma nota en varios medios -> un solo artículo
+        lsh, modificados = self._colapsar_recientes(manifiesto, anterior, recientes, eliminados | set(recientes))
+
+        generacion = manifiesto.get("generacion", 0) + 1
+        snapshot = f"snapshot-{generacion:06d}.jsonl"
+        indices, ids_lsh, bandas = _Indices(), [], []
+
+        def registros():
+            if manifiesto.get("snapshot"):
+                for registro in _leer_jsonl(self._ruta(manifiesto["snapshot"])):
+                    id_ = registro["_id"]
+                    if id_ not in eliminados:  # (si se reemplaza, conserva su lugar)
+                        yield recientes.pop(id_, None) or modificados.get(id_, registro)
+            yield from recientes.values()
+
+        def lineas():
+            offset = 0
+            for registro in registros():
+                linea = _linea(registro)
+                indices.agregar(snapshot, offset, registro)
+                offset += len(linea.encode("utf-8"))
+                if registro["_id"] in lsh and not registro.get("duplicado_de"):
+                    ids_lsh.append(registro["_id"])
+                    bandas.append(lsh[registro["_id"]])
+                yield linea
+
+        _escribir_atomico(self._ruta(snapshot), lineas())
+        _escribir_atomico(self._ruta(f"indices-{generacion:06d}.json"), [indices.a_json(snapshot)])
+        _guardar_lsh(self._ruta(f"lsh-{generacion:06d}.npz"), ids_lsh, bandas)
+        nuevo = {"generacion": generacion, "snapshot": snapshot,
+                 "compactados": [os.path.basename(r) for r in segmentos],
+                 "articulos": len(indices.entradas), "compactado_en": time.strftime("%Y-%m-%d %H:%M:%S")}
+        _escribir_atomico(self._ruta(MANIFIESTO), [json.dumps(nuevo, ensure_ascii=False, indent=2)])
+
+        # Se borra lo ya incluido. El snapshot anterior se conserva una generación
+        # más: un lector que lo abrió antes del cambio de manifiesto puede terminar.
+        for ruta in segmentos:
+            os.remove(ruta)
+        for patron in ("snapshot-*.jsonl", "indices-*.json", "lsh-*.npz"):
+            for viejo in sorted(glob.glob(self._ruta(patron)))[:-2]:
+                os.remove(viejo)
+
+        resumen = {"generacion": generacion, "articulos": len(indices.entradas), "segmentos": len(segmentos),
+                   "segundos": round(time.perf_counter() - t0, 3)}
+        print(f"🗜️  Registro de noticias compactado: {resumen}")
+        return resumen
+
+    def _lsh_snapshot(self, manifiesto: dict) -> tuple:
+        """
+        (ids, bandas) del LSH del snapshot de 'manifiesto' (de lsh-<gen>.npz).
+        Un snapshot sin LSH (ej. de una versión anterior) se recorre una vez.
+        """
+        snapshot = manifiesto.get("snapshot")
+        if not snapshot:
+            return [], np.empty((0, BANDAS_LSH), dtype=np.uint64)
+        try:
+            with np.load(self._ruta(f"lsh-{manifiesto['generacion']:06d}.npz")) as datos:
+                return datos["ids"].tolist(), datos["bandas"]
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            ids, bandas = [], []
+            for registro in _leer_jsonl(self._ruta(snapshot)):
+                firma = _firma_registro(registro)
+                if firma is not None:
+                    ids.append(registro["_id"])
+                    bandas.append(claves_bandas(firma))
+            return ids, np.array(bandas, dtype=np.uint64).reshape(-1, BANDAS_LSH)
+
+    def _colapsar_recientes(self, manifiesto: dict, anterior: _Indices, recientes: dict, excluidos: set) -> tuple:
+        """
+        Colapsa EN SITIO los casi duplicados de 'recientes' ({_id: registro},
+        lo que entra al snapshot) entre sí y contra el snapshot vigente (ya
+        colapsado): con su LSH guardado solo se leen las filas que comparten
+        alguna banda con un reciente. Las de 'excluidos' (reemplazadas o
+        borradas) no cuentan. Devuelve ({_id: claves de bandas} de los
+        canónicos, {_id: registro} de los del snapshot que sumaron fuentes).
+        """
+        ids_lsh, bandas = self._lsh_snapshot(manifiesto)
+        lsh = {id_: bandas[fila] for fila, id_ in enumerate(ids_lsh) if id_ not in excluidos}
+        firmas = {id_: firma for id_, firma in ((id_, _firma_registro(r)) for id_, r in recientes.items())
+                  if firma is not None}
+
+        filas = set()
+        if firmas and len(ids_lsh):
+            claves = np.array([claves_bandas(f) for f in firmas.values()])
+            for b in range(BANDAS_LSH):
+                filas.update(np.flatnonzero(np.isin(bandas[:, b], claves[:, b])).tolist())
+        candidatos = [ids_lsh[fila] for fila in sorted(filas)
+                      if ids_lsh[fila] in lsh and ids_lsh[fila] in anterior.entradas]
+
+        # Primero los candidatos del snapshot (en su orden): el canónico es el más antiguo
+        agrupador, orden, registros = AgrupadorDuplicados(), [], {}
+        for id_ in candidatos:
+            registros[id_] = self._leer_registro(anterior.entradas[id_])
+            agrupador.agregar_firma(_firma_registro(registros[id_]))
+            orden.append(id_)
+        for id_, firma in firmas.items():
+            agrupador.agregar_firma(firma)
+            orden.append(id_)
+
+        canonicos, colapsadas = {}, 0
+        for i in range(len(registros), len(orden)):
+            c = agrupador.canonicos[i]
+            if c == i:
+                continue
+            id_canonico, id_ = orden[c], orden[i]
+            if id_canonico not in canonicos:
+                canonicos[id_canonico] = Articulo.desde_dict(registros.get(id_canonico) or recientes[id_canonico],
+                                                             conservar_extra=True)
+            duplicado = Articulo.desde_dict(recientes[id_], conservar_extra=True)
+            fusionar_fuentes(canonicos[id_canonico], duplicado)
+            recientes[id_] = Articulo(id=duplicado.id, url=duplicado.url, slug=duplicado.slug,
+                                      fuente=duplicado.fuente, fecha=duplicado.fecha,
+                                      duplicado_de=id_canonico).a_dict()
+            recientes[id_]["_id"] = id_
+            del firmas[id_]
+            colapsadas += 1
+
+        modificados = {}
+        for id_, canonico in canonicos.items():
+            registro = canonico.a_dict()
+            registro["_id"] = id_
+            (recientes if id_ in recientes else modificados)[id_] = registro
+        if colapsadas:
+            print(f"🧬 Duplicados colapsados: {colapsadas} noticias casi idénticas unidas a su original.")
+        lsh.update((id_, claves_bandas(firma)) for id_, firma in firmas.items())
+        return lsh, modificados
+
+    def reemplazar(self, eliminados, articulos) -> dict:
+        """
+        Borra los _id 'eliminados' y guarda 'articulos' en UN snapshot nuevo
+        (una compactación): ningún lector ve un estado intermedio.
+        """
+        eliminados, articulos = [str(i) for i in eliminados], list(articulos)
+        if not self.compactar(eliminados, articulos):
+            raise RuntimeError("Otro proceso está compactando el registro de noticias; reintente.")
+        return {"guardados": sum(1 for a in articulos if not a.duplicado_de),
+                "duplicados": sum(1 for a in articulos if a.duplicado_de),
+                "omitidos": 0, "eliminados": len(eliminados)}
+
+    def liberar_espacio(self):
+        """ Borra las generaciones anteriores del snapshot (solo se conservan para lectores en curso). """
+        generacion = self._manifiesto().get("generacion", 0)
+        for patron in ("snapshot-*.jsonl", "indices-*.json", "lsh-*.npz"):
+            for ruta in glob.glob(self._ruta(patron)):
+                if f"-{generacion:06d}." not in os.path.basename(ruta):
+                    os.remove(ruta)
+
+    def tamano_en_disco(self) -> int:
+        """ Bytes del snapshot vigente, sus índices, su LSH y los segmentos pendientes. """
+        manifiesto = self._manifiesto()
+        rutas = self._segmentos_pendientes(manifiesto)
+        if manifiesto.get("snapshot"):
+            rutas += [self._ruta(manifiesto["snapshot"]), self._ruta(f"indices-{manifiesto['generacion']:06d}.json"),
+                      self._ruta(f"lsh-{manifiesto['generacion']:06d}.npz")]
+        return sum(os.path.getsize(r) for r in rutas if os.path.exists(r))
+
+    def compactar_en_segundo_plano(self):
+        """
+        Lanza la compactación en un hilo (no bloquea al scraper que guarda).
+        Es daemon: no retiene la salida del proceso; si se corta a medias,
+        el manifiesto sigue apuntando al snapshot anterior.
+        """
+        if self._lock_compactacion.locked():
+            return
+        threading.Thread(target=self.compactar, name="compactar-noticias", daemon=True).start()
+
+    # -----------------------------
+    # Lectura
+    # -----------------------------
+    def _registros(self):
+        """ Recorre snapshot + segmentos (reintenta si una compactación los movió). """
+        for intento in range(REINTENTOS_LECTURA):
+            manifiesto = self._manifiesto()
+            try:
+                # Los segmentos pendientes son pocos: se leen primero para saber
+                # qué registros del snapshot quedaron reemplazados.
+                recientes = {}
+                for ruta in self._segmentos_pendientes(manifiesto):
+                    for registro in _leer_jsonl(ruta):
+                        recientes[registro["_id"]] = registro
+                urls = {}
+                if manifiesto.get("snapshot"):
+                    for registro in _leer_jsonl(self._ruta(manifiesto["snapshot"])):
+                        if registro.get("url"):
+                            urls[normalizar_url(registro["url"])] = registro["_id"]
+                        if registro["_id"] not in recientes:
+                            yield registro
+                for registro in recientes.values():
+                    url = normalizar_url(registro.get("url"))
+                    if not url or urls.setdefault(url, registro["_id"]) == registro["_id"]:
+                        yield registro
+                return
+            except FileNotFoundError:
+                if intento == REINTENTOS_LECTURA - 1:
+                    raise
+
+    def articulos(self, incluir_duplicados: bool = False, conservar_extra: bool = False, con_contenido: bool = True):
+        """
+        Genera los Articulo guardados, leyendo los archivos línea por línea.
+        (Los cuerpos van en la misma línea; sin con_contenido se descartan y
+        el Articulo los vuelve a pedir por _id si alguien los lee.)
+        """
+        for registro in self._registros():
+            if incluir_duplicados or not registro.get("duplicado_de"):
+                yield _sin_contenido(Articulo.desde_dict(registro, conservar_extra), con_contenido)
+
+    def cargar_articulos(self) -> list:
+        """ Lista de Articulo para el motor (sin duplicados ni campos extra). """
+        return list(self.articulos())
+
+    def _sello(self, manifiesto: dict) -> tuple:
+        """
+        Fecha de modificación de la carpeta, generación del manifiesto y
+        segmentos pendientes. La fecha sola no basta: dos publicaciones en el
+        mismo tick del reloj del sistema de archivos la dejan igual.
+        """
+        return (os.stat(self.ruta).st_mtime_ns, manifiesto.get("generacion", 0),
+                tuple(os.path.basename(r) for r in self._segmentos_pendientes(manifiesto)))
+
+    def _indices_snapshot(self, manifiesto: dict) -> _Indices:
+        """ Índices del snapshot de 'manifiesto' (de indices-<gen>.json). """
+        snapshot = manifiesto.get("snapshot")
+        indices = _Indices()
+        if snapshot:
+            try:
+                with open(self._ruta(f"indices-{manifiesto['generacion']:06d}.json"), "r", encoding="utf-8") as f:
+                    indices = _Indices.desde_json(json.load(f))
+            except (FileNotFoundError, json.JSONDecodeError, KeyError, ValueError):
+                # Snapshot sin índices (ej. de una versión anterior): se indexa recorriéndolo
+                for offset, registro in _leer_jsonl_con_posicion(self._ruta(snapshot)):
+                    indices.agregar(snapshot, offset, registro)
+        return indices
+
+    def _indices(self) -> _Indices:
+        """
+        Índices del snapshot vigente + segmentos pendientes. Si el sello no
+        cambió se devuelven tal cual; si cambió, se agregan solo los segmentos
+        nuevos (los del snapshot se recargan solo con otra generación).
+        """
+        cache = self._cache_indices
+        for intento in range(REINTENTOS_LECTURA):
+            manifiesto = self._manifiesto()
+            sello = self._sello(manifiesto)
+            if cache is not None and cache[0] == sello:
+                return cache[3]
+            generacion = manifiesto.get("generacion", 0)
+            try:
+                if cache is not None and cache[1] == generacion:
+                    indices, indexados = cache[3], cache[2]
+                else:
+                    indices, indexados = self._indices_snapshot(manifiesto), set()
+                for ruta in self._segmentos_pendientes(manifiesto):
+                    nombre = os.path.basename(ruta)
+                    if nombre in indexados:
+                        continue
+                    for offset, registro in _leer_jsonl_con_posicion(ruta):
+                        indices.agregar(nombre, offset, registro)
+                    indexados.add(nombre)
+                break
+            except FileNotFoundError:  # (una compactación movió los archivos)
+                cache = None
+                if intento == REINTENTOS_LECTURA - 1:
+                    raise
+        self._cache_indices = (sello, generacion, indexados, indices)
+        return indices
+
+    def _indexar_segmento(self, nombre: str, lineas: list, registros: list):
+        """
+        Suma a los índices en memoria el segmento que se acaba de escribir
+        (sin releerlo). El sello no se toca: la próxima consulta ve otra lista
+        de segmentos y agrega solo los que escribió otro proceso.
+        """
+        cache = self._cache_indices
+        if cache is None:
+            return
+        indices, offset = cache[3], 0
+        for linea, registro in zip(lineas, registros):
+            indices.agregar(nombre, offset, registro)
+            offset += len(linea.encode("utf-8"))
+        cache[2].add(nombre)
+
+    def contenido(self, id_: str) -> str:
+        """ Cuerpo de un artículo, por _id (se lee su línea con el índice). """
+        entrada = self._indices().entradas.get(str(id_))
+        return self._leer_entrada(entrada).contenido if entrada else ""
+
+    def contenidos(self, ids) -> dict:
+        """ {_id: cuerpo} de muchos artículos: cada archivo se abre una vez y se lee en orden. """
+        entradas = self._indices().entradas
+        por_archivo = {}
+        for id_ in map(str, ids):
+            entrada = entradas.get(id_)
+            if entrada:
+                por_archivo.setdefault(entrada[0], []).append((entrada[1], id_))
+        cuerpos = {}
+        for archivo, posiciones in por_archivo.items():
+            with open(self._ruta(archivo), "rb") as f:
+                for offset, id_ in sorted(posiciones):
+                    f.seek(offset)
+                    cuerpos[id_] = json.loads(f.readline()).get("contenido_full") or ""
+        return cuerpos
+
+    def _leer_registro(self, entrada) -> dict:
+        with open(self._ruta(entrada[0]), "rb") as f:
+            f.seek(entrada[1])
+            return json.loads(f.readline())
+
+    def _leer_entrada(self, entrada, conservar_extra: bool = False) -> Articulo:
+        return Articulo.desde_dict(self._leer_registro(entrada), conservar_extra)
+
+    def ids(self) -> set:
+        return set(self._indices().entradas)
+
+    def urls(self) -> set:
+        return set(self._indices().por_url)
+
+    def existe(self, id_: str = None, url: str = None) -> bool:
+        """ ¿Ya está guardado (por _id o por URL canónica)? Usa los índices. """
+        indices = self._indices()
+        return (id_ is not None and str(id_) in indices.entradas) or bool(url and normalizar_url(url) in indices.por_url)
+
+    def contiene(self, clave: str) -> bool:
+        """ 'clave' puede ser un _id o una URL (los scrapers usan una u otra). """
+        return self.existe(id_=clave, url=clave)
+
+    def obtener(self, clave: str, conservar_extra: bool = False):
+        """ Articulo por _id o por URL canónica (None si no está). """
+        indices = self._indices()
+        id_ = str(clave) if str(clave) in indices.entradas else indices.por_url.get(normalizar_url(str(clave)))
+        return self._leer_entrada(indices.entradas[id_], conservar_extra) if id_ else None
+
+    def por_fecha(self, desde: str = None, hasta: str = None, fuente: str = None,
+                  incluir_duplicados: bool = False, conservar_extra: bool = False, con_contenido: bool = True):
+        """ Artículos con fecha en [desde, hasta), opcionalmente de una fuente, ordenados por fecha. """
+        indices = self._indices()
+        fechas = indices.fechas()
+        inicio = bisect.bisect_left(fechas, (desde, "")) if desde is not None else 0
+        fin = bisect.bisect_left(fechas, (hasta, "")) if hasta is not None else len(fechas)
+        for _, id_ in fechas[inicio:fin]:
+            entrada = indices.entradas[id_]
+            if (fuente is None or entrada[3] == fuente) and (incluir_duplicados or not entrada[5]):
+                yield _sin_contenido(self._leer_entrada(entrada, conservar_extra), con_contenido)
+
+    def por_fuente(self, fuente: str, **kwargs):
+        """ Artículos de una fuente, ordenados por fecha. """
+        return self.por_fecha(fuente=fuente, **kwargs)
+
+    def contar_por_fuente(self, incluir_duplicados: bool = False) -> dict:
+        conteo = {}
+        for e in self._indices().entradas.values():
+            if incluir_duplicados or not e[5]:
+                conteo[e[3]] = conteo.get(e[3], 0) + 1
+        return conteo
+
+    def version(self) -> str:
+        """ Cambia con cada guardado o compactación (invalida el snapshot binario del corpus). """
+        manifiesto = self._manifiesto()
+        pendientes = [os.path.basename(r) for r in self._segmentos_pendientes(manifiesto)]
+        return f"jsonl-{manifiesto.get('generacion', 0)}-{pendientes[-1] if pendientes else ''}-{len(pendientes)}"
+
+    def contar(self, incluir_duplicados: bool = True) -> int:
+        return sum(1 for e in self._indices().entradas.values() if incluir_duplicados or not e[5])
+
+
+if __name__ == "__main__":
+    print(RegistroSegmentos().compactar())
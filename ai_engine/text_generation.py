@@ -1,128 +1,171 @@
-import json
-import os
-from ai_engine.model_loader import load_vectorizer
-from ai_engine.ai_utils import limpiar_texto, similitud_coseno, formatear_respuesta
+from ai_engine.model_loader import obtener_registro
+from ai_engine.ai_utils import limpiar_texto_rapido, formatear_respuesta, EVIDENCE_THRESHOLD
+from ai_engine.corpus_index import obtener_indice, generacion_indice, huella_db
+from ai_engine.result_cache import cache_resultados
 
-def generar_respuesta(texto_usuario: str, db_news: list):
+# Tamaño de bloque para la verificación por lotes (acota la memoria del
+# producto matriz-matriz: n_articulos x TAM_BLOQUE_LOTE)
+TAM_BLOQUE_LOTE = 256
+
+
+def _respuesta_error(mensaje: str, color: str = "alert-danger"):
+    """ Diccionario de respuesta para los casos de error (no un string). """
+    return {"veredicto_texto": mensaje, "veredicto_color_class": color, "similitud_porcentaje": 0, "similitud_texto": "0%", "mensaje_explicativo": ""}, []
+
+
+def _armar_respuesta(texto_usuario: str, coincidencias: list):
+    """ Convierte [(articulo, similitud), ...] en (resultado_dict, evidencias). """
+    mejor_articulo, mejor_similitud = coincidencias[0] if coincidencias else (None, 0.0)
+
+    resultado_dict = formatear_respuesta(texto_usuario, mejor_articulo, mejor_similitud)
+
+    evidencias_relevantes = [art for art, sim in coincidencias if sim >= EVIDENCE_THRESHOLD]
+
+    return resultado_dict, evidencias_relevantes
+
+
+def _version_resultados(modelo, db_news):
+    """
+    Sello de versión para la caché: modelo + generación del índice + huella
+    del corpus (si cambian las noticias, la caché se vacía aunque el índice
+    todavía no se haya sincronizado).
+    """
+    return (modelo.version, generacion_indice(), huella_db(db_news))
+
+
+def _copia(respuesta):
+    """ Copia superficial de (resultado_dict, evidencias) para no compartir la de la caché. """
+    resultado_dict, evidencias = respuesta
+    return dict(resultado_dict), list(evidencias)
+
+
+def generar_respuesta(texto_usuario: str, db_news: list, top_k: int = 1):
     """
     Genera una respuesta comparando la afirmación del usuario contra la base de datos
     de noticias (CACHEADA) de TODAS las fuentes.
+    'top_k' indica cuántos artículos (como máximo) se devuelven como evidencia.
+    'db_news' puede ser la lista o una función que la devuelva (ej. la caché
+    de Flask); se resuelve antes de consultar la caché de resultados, porque
+    su huella forma parte del sello.
     """
     print("🧠 Iniciando motor de IA (MODO JSON COMPLETO)...")
 
     # --- 1. Cargar herramientas ---
-    vectorizer = load_vectorizer()
-    if vectorizer is None:
-        # Devolver un diccionario de error, no un string
-        return {"veredicto_texto": "Error crítico: El motor de IA no pudo iniciarse.", "veredicto_color_class": "alert-danger", "similitud_porcentaje": 0, "similitud_texto": "0%", "mensaje_explicativo": ""}, []
+    modelo = obtener_registro().obtener()
+    if modelo is None:
+        return _respuesta_error("Error crítico: El motor de IA no pudo iniciarse.")
+    vectorizer = modelo.vectorizer
 
-    # --- 2. Cargar y unificar todas las noticias ---
-    
+    # --- 2. Procesar texto del usuario y consultar la caché de resultados ---
+    texto_usuario_limpio = limpiar_texto_rapido(texto_usuario)
+    if not texto_usuario_limpio:
+        return _respuesta_error("Tu consulta estaba vacía.", "alert-warning")
+
+    if callable(db_news):
+        db_news = db_news()
     if db_news is None:
         db_news = []
-        
+
+    top_k = max(1, top_k)
+    clave_cache = (texto_usuario_limpio, top_k)
+    cacheado = cache_resultados.obtener(clave_cache, _version_resultados(modelo, db_news))
+    if cacheado is not None:
+        print("⚡ Resultado servido desde la caché (afirmación ya verificada).")
+        return _copia(cacheado)
+
+    # --- 3. Obtener el índice precalculado del corpus ---
+    # (Se limpia y vectoriza UNA sola vez; solo se reconstruye si cambian
+    #  las noticias o el modelo)
+
     print(f"Recibidas {len(db_news)} noticias de DB (cacheadas).")
 
-    corpus_noticias = []
-
-    # Normalizar noticias de la DB (todas las fuentes)
-    for n in db_news:
-        if not isinstance(n, dict):
-            continue # Omitir items corruptos
-            
-        # --- ¡INICIO DE LA CORRECCIÓN DE NoneType y FUENTE! ---
-        
-        # 1. Forzar que 'titulo' y 'teaser' sean strings, no None.
-        titulo = n.get('title') or '' 
-        
-        data = n.get('data', {})
-        if data is None: # Comprobar si 'data' es null
-            data = {}
-        teaser = data.get('teaser') or ''
-        
-        # 2. Incluir el contenido completo de los otros scrapers (RPP, TV Peru, etc.)
-        contenido_full = n.get('contenido_full', '') or ''
-        
-        # 3. Combinar todo el texto disponible
-        texto_a_limpiar = titulo + " " + teaser + " " + contenido_full
-        
-        # 4. Asignar la fuente correctamente desde los metadatos
-        if 'metadata' in n and isinstance(n['metadata'], list):
-            for meta in n['metadata']:
-                if meta.get('key') == 'source':
-                    n['fuente'] = meta.get('value', 'Desconocida')
-                    break
-        if 'fuente' not in n:
-             # Fallback para artículos que no tengan metadata (ej. La República v1)
-             if 'larepublica.pe' in n.get('url', ''):
-                 n['fuente'] = 'La República'
-             elif 'rpp.pe' in n.get('url', ''):
-                 n['fuente'] = 'RPP'
-             elif 'canaln.pe' in n.get('url', ''):
-                 n['fuente'] = 'Canal N'
-             elif 'elperuano.pe' in n.get('url', ''):
-                 n['fuente'] = 'El Peruano'
-             elif 'tvperu.gob.pe' in n.get('url', ''):
-                 n['fuente'] = 'TV Perú'
-             else:
-                 n['fuente'] = 'Desconocida'
-        
-        # --- FIN DE LA CORRECCIÓN ---
-
-        if texto_a_limpiar.strip():
-            # (Lógica específica de URL de La República)
-            if n['fuente'] == 'La República' and n.get('slug') and not n.get('url'):
-                 n['url'] = f"https://larepublica.pe/{n.get('slug')}"
-                 
-            corpus_noticias.append({
-                'texto_limpio': limpiar_texto(texto_a_limpiar),
-                'articulo_original': n
-            })
-
-    if not corpus_noticias:
-        return {"veredicto_texto": "La base de datos de noticias está vacía. Ejecuta los scrapers.", "veredicto_color_class": "alert-danger", "similitud_porcentaje": 0, "similitud_texto": "0%", "mensaje_explicativo": ""}, []
-
-    print(f"Total de noticias en corpus para análisis: {len(corpus_noticias)}")
-
-    # --- 3. Procesar texto del usuario ---
-    texto_usuario_limpio = limpiar_texto(texto_usuario)
-    if not texto_usuario_limpio:
-        return {"veredicto_texto": "Tu consulta estaba vacía.", "veredicto_color_class": "alert-warning", "similitud_porcentaje": 0, "similitud_texto": "0%", "mensaje_explicativo": ""}, []
-        
+    indice = obtener_indice(vectorizer, db_news)
+
+    if len(indice) == 0:
+        return _respuesta_error("La base de datos de noticias está vacía. Ejecuta los scrapers.")
+
+    print(f"Total de noticias en corpus para análisis: {len(indice)}")
+
     try:
         vector_usuario = vectorizer.transform([texto_usuario_limpio])
     except Exception as e:
-        return {"veredicto_texto": f"Error al procesar tu solicitud: {e}", "veredicto_color_class": "alert-danger", "similitud_porcentaje": 0, "similitud_texto": "0%", "mensaje_explicativo": ""}, []
+        return _respuesta_error(f"Error al procesar tu solicitud: {e}")
+
+    # --- 4. Encontrar las mejores coincidencias (índice invertido + top-k) ---
+    coincidencias = indice.buscar(vector_usuario, top_k=top_k)
+
+    print(f"Análisis completo. Mejor similitud encontrada: {coincidencias[0][1] if coincidencias else 0.0:.4f}")
 
-    # --- 4. Encontrar la mejor coincidencia (Similitud de Coseno) ---
-    mejor_similitud = 0.0
-    mejor_articulo = None
+    # --- 5. Formar la respuesta (y guardarla en caché) ---
+    respuesta = _armar_respuesta(texto_usuario, coincidencias)
+    cache_resultados.guardar(clave_cache, _version_resultados(modelo, db_news), respuesta)
+    return _copia(respuesta)
 
-    for noticia in corpus_noticias:
-        if not noticia['texto_limpio']:
+
+def generar_respuestas_lote(textos_usuario: list, db_news: list, top_k: int = 1,
+                            tam_bloque: int = TAM_BLOQUE_LOTE):
+    """
+    Verifica MUCHAS afirmaciones a la vez (ej. una cola de moderación).
+    Por cada bloque de 'tam_bloque' afirmaciones hace UNA llamada a
+    'transform' y UN producto matriz-matriz contra el corpus.
+    Devuelve una lista de (resultado_dict, evidencias), en el mismo orden.
+    """
+    textos_usuario = list(textos_usuario or [])
+    print(f"🧠 Iniciando motor de IA (MODO LOTE: {len(textos_usuario)} afirmaciones)...")
+
+    # --- 1. Cargar herramientas ---
+    modelo = obtener_registro().obtener()
+    if modelo is None:
+        return [_respuesta_error("Error crítico: El motor de IA no pudo iniciarse.") for _ in textos_usuario]
+    vectorizer = modelo.vectorizer
+    top_k = max(1, top_k)
+
+    # --- 2. Índice del corpus (se construye una sola vez para todo el lote) ---
+    if callable(db_news):
+        db_news = db_news()
+    db_news = db_news or []
+    indice = obtener_indice(vectorizer, db_news)
+    if len(indice) == 0:
+        return [_respuesta_error("La base de datos de noticias está vacía. Ejecuta los scrapers.") for _ in textos_usuario]
+    version = _version_resultados(modelo, db_news)
+
+    resultados = [None] * len(textos_usuario)
+    tam_bloque = max(1, int(tam_bloque))
+    aciertos_cache = 0
+
+    for inicio in range(0, len(textos_usuario), tam_bloque):
+        bloque = textos_usuario[inicio:inicio + tam_bloque]
+
+        # --- 3. Limpiar el bloque (vacías y cacheadas se responden aparte) ---
+        posiciones, limpios = [], []
+        for offset, texto in enumerate(bloque):
+            texto_limpio = limpiar_texto_rapido(texto)
+            if not texto_limpio:
+                resultados[inicio + offset] = _respuesta_error("Tu consulta estaba vacía.", "alert-warning")
+                continue
+            cacheado = cache_resultados.obtener((texto_limpio, top_k), version)
+            if cacheado is not None:
+                resultados[inicio + offset] = _copia(cacheado)
+                aciertos_cache += 1
+                continue
+            posiciones.append(inicio + offset)
+            limpios.append(texto_limpio)
+
+        if not limpios:
             continue
-        
+
+        # --- 4. Un transform + un producto matriz-matriz por bloque ---
         try:
-            vector_noticia = vectorizer.transform([noticia['texto_limpio']])
-            sim = similitud_coseno(vector_usuario, vector_noticia)
-            
-            if sim > mejor_similitud:
-                mejor_similitud = sim
-                mejor_articulo = noticia['articulo_original']
-                
+            matriz_consultas = vectorizer.transform(limpios)
         except Exception as e:
-            pass # Ignorar artículos que no se puedan vectorizar
-
-    print(f"Análisis completo. Mejor similitud encontrada: {mejor_similitud:.4f}")
-
-    # --- 5. Formar la respuesta ---
-    
-    resultado_dict = formatear_respuesta(texto_usuario, mejor_articulo, mejor_similitud)
+            for pos in posiciones:
+                resultados[pos] = _respuesta_error(f"Error al procesar tu solicitud: {e}")
+            continue
 
-    EVIDENCE_THRESHOLD = 0.4 # 40%
+        for pos, texto_limpio, coincidencias in zip(posiciones, limpios, indice.buscar_lote(matriz_consultas, top_k=top_k)):
+            respuesta = _armar_respuesta(textos_usuario[pos], coincidencias)
+            cache_resultados.guardar((texto_limpio, top_k), version, respuesta)
+            resultados[pos] = _copia(respuesta)
 
-    evidencias_relevantes = []
-    if mejor_articulo and mejor_similitud >= EVIDENCE_THRESHOLD:
-        evidencias_relevantes = [mejor_articulo]
-    
-    return resultado_dict, evidencias_relevantes
\ No newline at end of file
+    print(f"Análisis por lotes completo ({len(textos_usuario)} afirmaciones, {aciertos_cache} desde caché).")
+    return resultados
\ No newline at end of file
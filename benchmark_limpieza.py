@@ -0,0 +1,68 @@
+"""
+benchmark_limpieza.py — Micro-benchmark de la limpieza de textos
+Comprueba que 'limpiar_texto_rapido' / 'limpiar_textos' dan EXACTAMENTE la
+misma salida que 'limpiar_texto' (sobre el corpus real y sobre todos los
+caracteres Unicode) y mide el tiempo de cada variante.
+
+Uso:
+    python benchmark_limpieza.py [repeticiones] [procesos]
+"""
+
+import sys
+import time
+
+from ai_engine.ai_utils import limpiar_texto, limpiar_texto_rapido, limpiar_textos
+from ai_engine.model_loader import _load_json_database
+
+
+def _textos_corpus():
+    return [a.texto() for a in _load_json_database()]
+
+
+def _textos_unicode():
+    """ Todos los caracteres Unicode (sin surrogates), en bloques, para probar la tabla. """
+    caracteres = [chr(c) for c in range(sys.maxunicode + 1) if not 0xD800 <= c <= 0xDFFF]
+    return ["a" + "".join(caracteres[i:i + 64]) + " Z" for i in range(0, len(caracteres), 64)]
+
+
+def _medir(nombre, funcion, textos, repeticiones):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion(textos)
+        mejor = min(mejor, time.perf_counter() - t0)
+    print(f"  {nombre:<32} {mejor * 1000:10.2f} ms")
+    return resultado, mejor
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    procesos = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    # --- 1. Equivalencia exacta ---
+    print("🔎 Verificando equivalencia con limpiar_texto...")
+    for nombre, textos in (("corpus", _textos_corpus()), ("unicode", _textos_unicode())):
+        esperado = [limpiar_texto(t) for t in textos]
+        for variante, obtenido in (("rapido", [limpiar_texto_rapido(t) for t in textos]),
+                                   ("lote", limpiar_textos(iter(textos), procesos=1)),
+                                   ("pool", limpiar_textos(textos, procesos=procesos))):
+            distintos = sum(1 for a, b in zip(esperado, obtenido) if a != b) + abs(len(esperado) - len(obtenido))
+            if distintos:
+                print(f"❌ {nombre}/{variante}: {distintos} textos con salida distinta")
+                sys.exit(1)
+        print(f"✅ {nombre}: {len(textos)} textos idénticos")
+
+    # --- 2. Tiempos (corpus real, repetido para que pese) ---
+    textos = _textos_corpus() * 20
+    if not textos:
+        print("⚠️  No hay noticias en la base de datos. Ejecuta los scrapers primero.")
+        return
+    print(f"\n⏱️  Limpiando {len(textos)} textos (mejor de {repeticiones}):")
+    _, base = _medir("limpiar_texto (referencia)", lambda ts: [limpiar_texto(t) for t in ts], textos, repeticiones)
+    _, rapido = _medir("limpiar_textos (1 proceso)", lambda ts: limpiar_textos(ts, procesos=1), textos, repeticiones)
+    _, pool = _medir(f"limpiar_textos ({procesos} procesos)", lambda ts: limpiar_textos(ts, procesos=procesos), textos, repeticiones)
+    print(f"\n🚀 Aceleración: x{base / rapido:.1f} (1 proceso), x{base / pool:.1f} ({procesos} procesos)")
+
+
+if __name__ == "__main__":
+    main()
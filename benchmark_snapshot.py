@@ -0,0 +1,111 @@
+"""
+benchmark_snapshot.py — JSON vs. snapshot binario del corpus (arranque en frío)
+Genera corpus sintéticos de N artículos, los escribe como el JSON de los
+scrapers (indent=4) y como snapshot binario (ai_engine.corpus_snapshot), y
+mide en un proceso NUEVO por cada carga (para que el pico de RSS sea real):
+  - json.load + cargar_articulos   (lo que hacía _load_json_database)
+  - JSON en streaming              (corpus_reader.iterar_registros_json)
+  - snapshot binario               (corpus_snapshot.cargar_snapshot)
+
+Uso:
+    python benchmark_snapshot.py [N ...]      # por defecto: 10000 100000 1000000
+"""
+
+import os
+import sys
+import json
+import random
+import shutil
+import tempfile
+import subprocess
+
+from ai_engine.articulo import Articulo
+from ai_engine.corpus_snapshot import escribir_snapshot
+
+TAMANOS = (10_000, 100_000, 1_000_000)
+VERSION = "benchmark"
+
+_PALABRAS = ("congreso elecciones partido candidato fujimori acuña onpe jne encuesta voto lima perú "
+             "presidente ministro fiscalía denuncia campaña región alcalde debate propuesta reforma "
+             "economía seguridad corrupción tribunal jurado padrón segunda vuelta bancada moción").split()
+
+# Código que corre cada medición (en un proceso aparte)
+_MEDIR = r"""
+import sys, json, time, resource
+sys.path.insert(0, sys.argv[3])
+modo, ruta = sys.argv[1], sys.argv[2]
+from ai_engine.articulo import cargar_articulos, Articulo
+from ai_engine.corpus_reader import iterar_registros_json
+from ai_engine.corpus_snapshot import cargar_snapshot
+rss_base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+t0 = time.perf_counter()
+if modo == "json":
+    with open(ruta, "r", encoding="utf-8") as f:
+        articulos = cargar_articulos(json.load(f))
+elif modo == "json_streaming":
+    articulos = [Articulo.desde_dict(n) for n in iterar_registros_json(ruta)]
+else:
+    articulos = cargar_snapshot(sys.argv[4], ruta)
+segundos = time.perf_counter() - t0
+print(json.dumps({"n": len(articulos), "segundos": segundos,
+                  "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                  "rss_base_mb": rss_base / 1024}))
+"""
+
+
+def _articulo_sintetico(i: int, rng: random.Random) -> Articulo:
+    texto = lambda n: " ".join(rng.choice(_PALABRAS) for _ in range(n))
+    fuente = rng.choice(("La República", "El Peruano", "Canal N", "RPP", "TV Perú"))
+    return Articulo(id=f"bench{i}", titulo=texto(10).capitalize(), teaser=texto(30), contenido=texto(150),
+                    url=f"https://ejemplo.pe/politica/{i}", slug=f"politica/{i}", fuente=fuente,
+                    fecha=f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 10:00:00",
+                    extra={"termino_busqueda": rng.choice(_PALABRAS)})
+
+
+def _generar(carpeta: str, n: int):
+    """ Escribe el JSON (indent=4, sin cargar todo en memoria) y el snapshot. """
+    rng = random.Random(n)
+    ruta_json = os.path.join(carpeta, "noticias.json")
+    with open(ruta_json, "w", encoding="utf-8") as f:
+        f.write("{\n")
+        for i in range(n):
+            registro = json.dumps(_articulo_sintetico(i, rng).a_dict(), indent=4, ensure_ascii=False)
+            f.write(f'    "bench{i}": ' + registro.replace("\n", "\n    ") + (",\n" if i < n - 1 else "\n"))
+        f.write("}\n")
+
+    rng = random.Random(n)
+    articulos = (Articulo.desde_dict(_articulo_sintetico(i, rng).a_dict()) for i in range(n))
+    ruta_snapshot = escribir_snapshot(articulos, VERSION, os.path.join(carpeta, "corpus_snapshot.bin"))
+    return ruta_json, ruta_snapshot
+
+
+def _medir(modo: str, ruta: str) -> dict:
+    proceso = subprocess.run([sys.executable, "-c", _MEDIR, modo, ruta, os.path.dirname(os.path.abspath(__file__)),
+                              VERSION], capture_output=True, text=True)
+    if proceso.returncode != 0:
+        return {"error": (proceso.stderr.strip().splitlines() or [f"código {proceso.returncode}"])[-1]}
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def main():
+    tamanos = [int(a) for a in sys.argv[1:]] or TAMANOS
+    print(f"{'N':>9}  {'formato':<15} {'archivo':>10} {'carga':>10} {'pico RSS':>10}")
+    for n in tamanos:
+        carpeta = tempfile.mkdtemp(prefix="bench_snapshot_")
+        try:
+            ruta_json, ruta_snapshot = _generar(carpeta, n)
+            for modo, ruta in (("json", ruta_json), ("json_streaming", ruta_json), ("snapshot", ruta_snapshot)):
+                r = _medir(modo, ruta)
+                tamano = f"{os.path.getsize(ruta) / 2 ** 20:8.1f}MB"
+                if "error" in r:
+                    print(f"{n:>9}  {modo:<15} {tamano:>10}  ❌ {r['error']}")
+                elif r["n"] != n:
+                    print(f"{n:>9}  {modo:<15} {tamano:>10}  ❌ cargó {r['n']} artículos")
+                else:
+                    print(f"{n:>9}  {modo:<15} {tamano:>10} {r['segundos']:9.2f}s {r['rss_mb']:8.0f}MB")
+        finally:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,8 @@ if project_root not in sys.path:
 from web_app.app import app, init_app
 
 # --- ¡NUEVAS IMPORTACIONES! ---
-from ai_engine.model_loader import load_vectorizer
+from ai_engine.model_loader import load_vectorizer, construir_indice_en_disco
+from ai_engine.index_store import abrir_indice
 # --- FIN DE IMPORTACIONES ---
 
 
@@ -41,11 +42,14 @@ if __name__ == "__main__":
     # Esto creará 'vectorizer_es.joblib' si no existe.
     print("🧠 Pre-cargando y/o entrenando modelo de IA...")
     try:
-        load_vectorizer()
+        vectorizer = load_vectorizer()
+        # Índice del corpus en disco (memmap): si falta o es de otro modelo, se crea
+        if vectorizer is not None and abrir_indice(vectorizer) is None:
+            construir_indice_en_disco(vectorizer)
         print("✅ Modelo de IA listo.")
     except Exception as e:
         print(f"🚨 ERROR FATAL: No se pudo entrenar el modelo de IA.")
-        print(f"Asegúrate de que 'news_scrapers/noticias_partidos.json' exista y no esté vacío.")
+        print(f"Asegúrate de que el almacén de noticias (o 'news_scrapers/noticias_partidos.json') tenga artículos.")
         print(f"Error: {e}")
         sys.exit(1) # Detener el programa si la IA no puede entrenar
     # --- FIN DE MODIFICACIÓN ---
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Descarga concurrente de las páginas de artículos (asyncio + límite por host).
+RPP, Canal N y TV Perú bajaban el HTML de cada nota de una en una, con una
+pausa entre cada una: miles de idas y vueltas en serie. Aquí se piden en
+paralelo, pero acotado:
+
+  - Un semáforo por host (CONCURRENCIA_POR_HOST) y un tope global de
+    descargas en vuelo (MAX_CONCURRENTES), que también frena la lectura
+    de la secuencia de URLs (puede ser un generador).
+  - Keep-alive: las peticiones van por el cliente HTTP compartido
+    (http_client), con un pool de conexiones por host.
+  - Timeouts de conexión y de lectura en cada petición.
+  - Cada respuesta se entrega, en orden de llegada, a quien itera: el
+    parser de cada fuente sigue siendo el mismo.
+
+Los scrapers ya usan 'requests' (aiohttp / httpx no son dependencias del
+proyecto): asyncio orquesta y cada GET bloqueante corre en un hilo.
+
+Uso:
+    with DescargadorAsync(HEADERS) as descargador:
+        for (url, termino), respuesta in descargador.descargar((u, t) for u, t in pendientes):
+            if respuesta is not None:
+                noticia = parsear(respuesta.text, url, termino)
+"""
+
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+
+from news_scrapers.http_client import obtener_cliente, TIMEOUT
+
+CONCURRENCIA_POR_HOST = int(os.environ.get("SCRAPER_CONCURRENCIA_POR_HOST", "4"))
+MAX_CONCURRENTES = int(os.environ.get("SCRAPER_MAX_CONCURRENTES", "16"))
+
+
+class DescargadorAsync:
+    """
+    Descarga trabajos (tuplas cuyo primer elemento es la URL) con asyncio.
+    'headers' se suman a las cabeceras comunes del cliente compartido.
+    """
+
+    def __init__(self, headers: dict = None, por_host: int = CONCURRENCIA_POR_HOST,
+                 maximo: int = MAX_CONCURRENTES, timeout=TIMEOUT):
+        self.headers = dict(headers or {})
+        self.por_host = max(1, por_host)
+        self.maximo = max(1, maximo)
+        self.timeout = timeout
+        self._cliente = obtener_cliente()
+        self._semaforos = {}  # host -> asyncio.Semaphore
+        self._executor = ThreadPoolExecutor(max_workers=self.maximo, thread_name_prefix="descarga")
+        self._loop = asyncio.new_event_loop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def _get(self, url: str) -> requests.Response:
+        """ (Corre en un hilo del executor) """
+        respuesta = self._cliente.get(url, headers=self.headers, timeout=self.timeout)
+        respuesta.raise_for_status()
+        return respuesta
+
+    async def _descargar_uno(self, trabajo):
+        url = trabajo[0]
+        host = urlsplit(url).netloc
+        if host not in self._semaforos:
+            self._semaforos[host] = asyncio.Semaphore(self.por_host)
+        async with self._semaforos[host]:
+            try:
+                return trabajo, await self._loop.run_in_executor(self._executor, self._get, url)
+            except requests.exceptions.RequestException as e:
+                print(f"[Fetch Error] {url}: {e}")
+                return trabajo, None
+
+    def descargar(self, trabajos):
+        """
+        Genera (trabajo, respuesta) a medida que terminan las descargas
+        (respuesta es None si falló). Nunca hay más de 'maximo' trabajos en
+        vuelo: el siguiente se lee de 'trabajos' cuando se libera un lugar.
+        """
+        trabajos = iter(trabajos)
+        pendientes = set()
+        try:
+            while True:
+                while len(pendientes) < self.maximo:
+                    trabajo = next(trabajos, None)
+                    if trabajo is None:
+                        break
+                    pendientes.add(self._loop.create_task(self._descargar_uno(trabajo)))
+                if not pendientes:
+                    return
+                hechas, pendientes = self._loop.run_until_complete(
+                    asyncio.wait(pendientes, return_when=asyncio.FIRST_COMPLETED))
+                for tarea in hechas:
+                    yield tarea.result()
+        finally:
+            if pendientes:  # Quien iteraba cortó antes de tiempo
+                for tarea in pendientes:
+                    tarea.cancel()
+                self._loop.run_until_complete(asyncio.gather(*pendientes, return_exceptions=True))
+
+    def cerrar(self):
+        self._executor.shutdown(wait=True)
+        if not self._loop.is_closed():
+            self._loop.close()
\ No newline at end of file
@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 import json
+import sqlite3
 import time
 import re
 from typing import List, Dict, Optional
@@ -11,6 +12,12 @@ import datetime # Importado datetime directamente
 import requests
 from bs4 import BeautifulSoup
 
+from ai_engine.articulo import desde_canaln, id_estable
+from ai_engine.news_store import obtener_store, LoteNoticias
+from news_scrapers.async_fetcher import DescargadorAsync
+from news_scrapers.http_client import obtener_cliente, HEADERS, USER_AGENT
+from news_scrapers.checkpoints import Checkpoints
+
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
@@ -25,9 +32,7 @@ from webdriver_manager.chrome import ChromeDriverManager
 import os
 
 BASE = "https://canaln.pe"
-UA = ("Mozilla5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-      "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-HEADERS = {"User-Agent": UA}
+UA = USER_AGENT  # (HEADERS: cabeceras comunes del cliente HTTP compartido)
 
 # ===== Ajustes =====
 EXPECTED_PER_PAGE = 15
@@ -268,12 +273,7 @@ def parse_cards_from_dom(driver) -> List[Dict]:
                 fecha_hora = info_ps[1].get_attribute("innerText").strip() if len(info_ps) > 1 else ""
             except Exception: pass
 
-            try:
-                slug_part = url.split('/')[-1].split('?')[0]
-                if not slug_part: slug_part = f"hash_{hash(url)}"
-                item_id = f"canaln_{slug_part}"
-            except Exception:
-                item_id = f"canaln_hash_{hash(url)}"
+            item_id = id_estable(url, "canaln")  # Determinista: mismo _id en cada corrida
 
             items.append({
                 "_id": item_id,
@@ -337,7 +337,7 @@ def wait_results_ready(driver) -> int:
 # =========================
 def fetch_html(url: str, timeout: int = 30) -> Optional[str]:
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=timeout)
+        resp = obtener_cliente().get(url, timeout=timeout)
         resp.raise_for_status(); resp.encoding = resp.apparent_encoding
         return resp.text
     except requests.exceptions.RequestException as e: print(f"[Error Fetch] {url}: {e}"); return None
@@ -360,7 +360,9 @@ def get_body_text_excluding_last3(soup: BeautifulSoup) -> str:
     return "\n\n".join(texts)
 
 def extract_article_content(url: str) -> Dict[str, str]:
-    html = fetch_html(url)
+    return parse_article_content(fetch_html(url))
+
+def parse_article_content(html: Optional[str]) -> Dict[str, str]:
     if html is None: return { "contenido": "[ERROR AL OBTENER HTML]", "primer_parrafo": "", "texto_div": "" }
     soup = BeautifulSoup(html, "html.parser")
     first_paragraph = get_first_paragraph(soup)
@@ -373,7 +375,19 @@ def extract_article_content(url: str) -> Dict[str, str]:
 # =========================
 # Scraper por término
 # =========================
-def scrape_term(term: str, existing_data: Dict, max_pages: Optional[int] = None, headless: bool = True) -> List[Dict]:
+def fetch_contents(items: List[Dict], descargador: DescargadorAsync) -> Dict[str, Dict[str, str]]:
+    """ Contenido de varias notas (url -> dict de extract_article_content), descargadas en paralelo. """
+    contents = {}
+    for (item_url,), resp in descargador.descargar((r["url"],) for r in items):
+        html = None
+        if resp is not None:
+            resp.encoding = resp.apparent_encoding; html = resp.text
+        contents[item_url] = parse_article_content(html)
+    return contents
+
+def scrape_term(term: str, existing_data: Dict, max_pages: Optional[int] = None, headless: bool = True,
+                descargador: Optional[DescargadorAsync] = None,
+                checkpoints: Optional[Checkpoints] = None) -> List[Dict]:
     encoded_term = quote(term)
     url = f"{BASE}/buscar/{encoded_term}"
     driver = None
@@ -433,45 +447,45 @@ def scrape_term(term: str, existing_data: Dict, max_pages: Optional[int] = None,
                 print(f"[{term}] Pag.{current_page_num_for_debug}: No items parseados. Fin.")
                 break
 
+            # ¿La página no trae nada nuevo? (se pregunta antes de agregarla)
+            sin_novedades = checkpoints is not None and checkpoints.pagina_sin_novedades(
+                term, [(r["url"], None) for r in items_on_page if r.get("url")], existing_data.__contains__)
+
             new_items_on_page = 0
+            nuevos = []
             for r in items_on_page:
                 item_url = r.get("url")
-                if not item_url:
-                    continue
-                
-                if item_url not in existing_data:
+                if item_url and item_url not in existing_data and item_url not in {n["url"] for n in nuevos}:
                     print(f"[{term}] Pag.{current_page_num_for_debug}: Nueva -> {r.get('title','?')[:50]}...")
-                    content = extract_article_content(item_url)
-                    r.update(content)
-                    r["termino_busqueda"] = term
-                    
-                    fecha_dt = datetime.datetime.now(datetime.timezone.utc) if r.get("fecha_hora") else None
-                    
-                    noticia_formateada = {
-                         "_id": r["_id"], "title": r.get("title", ""), "type": "article",
-                         "date": fecha_dt.strftime('%Y-%m-%d %H:%M:%S') if fecha_dt else None,
-                         "update_date": fecha_dt.strftime('%Y-%m-%d %H:%M:%S') if fecha_dt else None,
-                         "created_at": fecha_dt.strftime('%Y-%m-%d %H:%M:%S') if fecha_dt else None,
-                         "slug": item_url.replace(BASE, "").lstrip('/'),
-                         "url": item_url,
-                         "data": {
-                              "__typename": "ArticleDataType",
-                              "teaser": r.get("primer_parrafo", ""),
-                              "authors": [],
-                              "tags": [{'__typename':'TagType', 'name': t, 'slug': f'/tag/{t.lower()}'} for t in [r.get("categoria"), term] if t],
-                              "categories": [{'__typename':'CategoryReferenceType', 'name': r.get("categoria"), 'slug': f'/{r.get("categoria","").lower()}'}] if r.get("categoria") else [],
-                              "multimedia": []
-                         },
-                         "metadata_seo": {"keywords": term},
-                         "metadata": [{"key": "source", "value": "Canal N"}],
-                         "has_video": False,
-                         "contenido_full": r.get("contenido", "")
-                    }
-                    results_this_term.append(noticia_formateada)
-                    existing_data[item_url] = noticia_formateada
-                    new_items_on_page += 1
+                    nuevos.append(r)
+
+            # Contenido de las nuevas de la página: descarga concurrente (acotada por host)
+            if descargador is not None:
+                contents = fetch_contents(nuevos, descargador)
+            else:
+                contents = {r["url"]: extract_article_content(r["url"]) for r in nuevos}
+
+            for r in nuevos:
+                item_url = r["url"]
+                content = contents[item_url]
+                r.update(content)
+                r["termino_busqueda"] = term
+                
+                fecha_dt = datetime.datetime.now(datetime.timezone.utc) if r.get("fecha_hora") else None
+                
+                noticia_formateada = desde_canaln(
+                     r, content, term, BASE,
+                     fecha=fecha_dt.strftime('%Y-%m-%d %H:%M:%S') if fecha_dt else None,
+                ).a_dict()
+                results_this_term.append(noticia_formateada)
+                existing_data[item_url] = noticia_formateada
+                new_items_on_page += 1
 
             print(f"[{term}] Pag.{current_page_num_for_debug}: Añadidas {new_items_on_page} noticias NUEVAS.")
+
+            if sin_novedades:
+                print(f"[{term}] Nada nuevo en la pág. (checkpoint). Fin.")
+                break
             
             pages_done += 1
             if max_pages is not None and pages_done >= max_pages:
@@ -529,51 +543,26 @@ def scrape_term(term: str, existing_data: Dict, max_pages: Optional[int] = None,
 # =========================
 # Main
 # =========================
-def load_existing_data(filepath: str) -> Dict[str, Dict]:
-    if not os.path.exists(filepath):
-        print(f"[Info Main] No {filepath}. Creando.")
-        return {}
-    url_to_news = {}
+def load_existing_data(filepath: str) -> LoteNoticias:
+    # URLs ya guardadas en el almacén SQLite (el JSON antiguo se migra solo la primera vez)
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if isinstance(data, dict):
-            for key, item in data.items():
-                if isinstance(item, dict):
-                    url = item.get("url")
-                    if url:
-                        url_to_news[url] = item
-        elif isinstance(data, list):
-            print("[Info Main] JSON era lista. Convirtiendo...")
-            for item in data:
-                if isinstance(item, dict):
-                    url = item.get("url")
-                    if url:
-                        url_to_news[url] = item
-        else:
-            print(f"[Warn Main] {filepath} tipo inesperado.")
-            return {}
-        print(f"[Info Main] Cargadas {len(url_to_news)} noticias (por URL) de {filepath}")
-        return url_to_news
-    except json.JSONDecodeError:
-        print(f"[Warn Main] {filepath} corrupto.")
-        return {}
-    except Exception as e:
-        print(f"[Error Main] Cargando {filepath}: {e}")
-        return {}
+        data = LoteNoticias(obtener_store(), por="url")
+        print(f"[Info Main] Cargadas {len(data)} noticias (por URL) del almacén")
+        return data
+    except (sqlite3.Error, OSError) as e:
+        print(f"[Error Main] Abriendo el almacén de noticias: {e}")
+        raise
 
-def save_updated_data(filepath: str, data_dict_by_url: Dict[str, Dict]):
+def save_updated_data(filepath: str, data_dict_by_url: LoteNoticias) -> bool:
+    # Solo se escriben las noticias nuevas (upsert por _id; los duplicados se colapsan).
+    # Si falla, quedan pendientes en el lote para el siguiente guardado.
     try:
-        final_data_dict_by_id = {}
-        for url, item in data_dict_by_url.items():
-            item_id = str(item.get("_id", url))
-            final_data_dict_by_id[item_id] = item
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(final_data_dict_by_id, f, ensure_ascii=False, indent=2)
-        print(f"\n[Info Main] JSON guardado: {filepath} | Total: {len(final_data_dict_by_id)}")
+        resumen = data_dict_by_url.guardar()
+        print(f"\n[Info Main] Almacén actualizado: {resumen} | Total: {len(data_dict_by_url)}")
+        return True
     except Exception as e:
-        print(f"\n[Error Main] Guardando {filepath}: {e}")
+        print(f"\n[Error Main] Guardando en el almacén: {e}")
+        return False
 
 # --- ¡INICIO DE LA CORRECCIÓN! ---
 # Mover la lógica de ejecución a una función main()
@@ -608,18 +597,24 @@ def main():
     existing_data_by_url = load_existing_data(OUTPUT_FILE)
     initial_count = len(existing_data_by_url)
     added_count_total = 0
+    checkpoints = Checkpoints("Canal N")
 
-    for t in terms_to_scrape:
-        print(f"\n=== [Canal N] Scrapeando término: {t} ===")
-        new_data_list = scrape_term(t, existing_data=existing_data_by_url, max_pages=max_pages_per_term, headless=headless)
-        added_count_total += len(new_data_list)
+    # Un solo descargador para toda la corrida: reutiliza las conexiones abiertas
+    with DescargadorAsync(HEADERS) as descargador:
+        for t in terms_to_scrape:
+            print(f"\n=== [Canal N] Scrapeando término: {t} ===")
+            new_data_list = scrape_term(t, existing_data=existing_data_by_url, max_pages=max_pages_per_term,
+                                        headless=headless, descargador=descargador, checkpoints=checkpoints)
+            added_count_total += len(new_data_list)
 
     final_count = len(existing_data_by_url)
     print("\n--- Scraping de Canal N Completado ---")
     print(f"Noticias NUEVAS de Canal N agregadas en esta ejecución: {added_count_total}")
     print(f"Total de noticias en la base de datos principal ahora: {final_count}")
 
-    save_updated_data(OUTPUT_FILE, existing_data_by_url)
+    if save_updated_data(OUTPUT_FILE, existing_data_by_url):
+        checkpoints.guardar()  # Recién ahora: las noticias de la marca ya están en el almacén
+    print(checkpoints.resumen())
 
 if __name__ == "__main__":
     main() # Llamar a la función main
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Checkpoints de crawl por fuente y por término (marca de agua más alta).
+Los resultados de búsqueda vienen de lo más nuevo a lo más viejo, pero cada
+corrida recorría hasta PAGE_LIMIT páginas por término aunque ya tuviera casi
+todo. Aquí se guarda, por (fuente, término), lo más nuevo que se vio:
+
+    checkpoints(fuente, termino, fecha, ultimo_id, actualizado_en)
+
+y cada scraper corta la paginación en cuanto una página no trae nada nuevo:
+todos sus artículos ya están en el almacén, son más viejos (o iguales) que
+la marca o son el propio artículo de la marca. Si la búsqueda está ordenada
+por fecha (ordenada=True), basta con que la página llegue a la marca: las
+siguientes son más viejas. En una corrida "de mantenimiento" eso es ~1
+página por término.
+
+  - Fuentes con fecha (La República, El Peruano): la marca es la fecha más
+    nueva vista (y su ID). Sin fecha fiable (RPP, Canal N, TV Perú): la
+    marca es el primer resultado (el más nuevo) del término.
+  - Las marcas nuevas se escriben solo con guardar(), que cada scraper
+    llama DESPUÉS de guardar sus noticias: si una corrida se corta a medias,
+    lo que no llegó al almacén se vuelve a buscar.
+  - SCRAPER_CHECKPOINTS=0 desactiva el corte (crawl completo); las marcas
+    se siguen actualizando.
+"""
+
+import os
+import time
+import sqlite3
+
+CHECKPOINTS_PATH = os.environ.get("SCRAPER_CHECKPOINTS_PATH", "news_scrapers/checkpoints.db")
+USAR_CHECKPOINTS = os.environ.get("SCRAPER_CHECKPOINTS", "1") != "0"
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    fuente          TEXT NOT NULL,
+    termino         TEXT NOT NULL,
+    fecha           TEXT,             -- 'YYYY-MM-DD HH:MM:SS' más nueva vista (si la fuente la da)
+    ultimo_id       TEXT,             -- _id / URL del artículo de la marca
+    actualizado_en  REAL NOT NULL,
+    PRIMARY KEY (fuente, termino)
+);
+"""
+
+
+class Checkpoints:
+    """ Marcas de una fuente: se leen al crearla y se escriben con guardar(). """
+
+    def __init__(self, fuente: str, ruta: str = CHECKPOINTS_PATH, activo: bool = USAR_CHECKPOINTS):
+        self.fuente = fuente
+        self.ruta = ruta
+        self.activo = activo
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        conexion = self._conectar()
+        try:
+            conexion.executescript(_ESQUEMA)
+            self._marcas = {termino: {"fecha": fecha, "id": ultimo_id} for termino, fecha, ultimo_id in conexion.execute(
+                "SELECT termino, fecha, ultimo_id FROM checkpoints WHERE fuente = ?", (fuente,))}
+        finally:
+            conexion.close()
+        self._nuevas = {}  # termino -> marca pendiente de guardar
+        self.paginas = 0  # Páginas revisadas en esta corrida
+        self.cortes = set()  # Términos cortados por el checkpoint
+
+    def _conectar(self) -> sqlite3.Connection:
+        conexion = sqlite3.connect(self.ruta, timeout=30)
+        conexion.execute("PRAGMA journal_mode=WAL")
+        return conexion
+
+    def marca(self, termino: str):
+        """ {'fecha', 'id'} de lo más nuevo visto para 'termino' (None si nunca se buscó). """
+        return self._marcas.get(termino)
+
+    def pagina_sin_novedades(self, termino: str, items, conocida, ordenada: bool = False) -> bool:
+        """
+        ¿Se puede dejar de paginar después de esta página? 'items' son los
+        (clave, fecha o None) de la página; 'conocida(clave)' dice si ya está
+        en el almacén, así que hay que preguntar ANTES de agregar la página.
+        Anota de paso la marca nueva del término.
+        """
+        items = list(items)
+        self.paginas += 1
+        for clave, fecha in items:
+            self._avanzar(termino, clave, fecha)
+        if not self.activo:
+            return False
+
+        marca = self._marcas.get(termino) or {}
+        alcanzada, todo_visto = False, True
+        for clave, fecha in items:
+            vieja = clave == marca.get("id") or bool(fecha and marca.get("fecha") and fecha <= marca["fecha"])
+            alcanzada = alcanzada or vieja
+            if not vieja and not conocida(clave):
+                todo_visto = False
+        if todo_visto or (ordenada and alcanzada):
+            self.cortes.add(termino)
+            return True
+        return False
+
+    def _avanzar(self, termino: str, clave, fecha):
+        nueva = self._nuevas.get(termino)
+        if fecha:
+            if nueva is None or not nueva["fecha"] or fecha > nueva["fecha"]:
+                self._nuevas[termino] = {"fecha": fecha, "id": str(clave)}
+        elif nueva is None:  # Sin fecha: el primer resultado de la corrida es el más nuevo
+            self._nuevas[termino] = {"fecha": None, "id": str(clave)}
+
+    def guardar(self):
+        """ Escribe las marcas nuevas (llamar después de guardar las noticias). """
+        if not self._nuevas:
+            return
+        ahora = time.time()
+        conexion = self._conectar()
+        with conexion:  # (una transacción)
+            for termino, marca in self._nuevas.items():
+                anterior = self._marcas.get(termino) or {}
+                if marca["fecha"] and anterior.get("fecha") and marca["fecha"] < anterior["fecha"]:
+                    continue  # (nunca retroceder la marca)
+                conexion.execute(
+                    "INSERT OR REPLACE INTO checkpoints (fuente, termino, fecha, ultimo_id, actualizado_en) "
+                    "VALUES (?, ?, ?, ?, ?)", (self.fuente, termino, marca["fecha"], marca["id"], ahora))
+                self._marcas[termino] = marca
+        conexion.close()
+        self._nuevas = {}
+
+    def resumen(self) -> str:
+        return (f"📌 Checkpoints [{self.fuente}]: {self.paginas} páginas revisadas; "
+                f"{len(self.cortes)} términos cortados al no haber novedades.")
\ No newline at end of file
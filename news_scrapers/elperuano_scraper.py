@@ -4,6 +4,13 @@ import os
 import re
 import time
 import datetime
+import sqlite3
+
+from ai_engine.articulo import desde_elperuano
+from ai_engine.news_store import obtener_store, LoteNoticias
+from news_scrapers.http_client import obtener_cliente
+from news_scrapers.http_cache import TTL_BUSQUEDAS
+from news_scrapers.checkpoints import Checkpoints
 
 # --- Configuración ---
 API_URL = "https://elperuano.pe/portal/_SearchNews"
@@ -92,26 +99,18 @@ def _parse_elperuano_date(date_str):
         return None
 
 def cargar_noticias_existentes(archivo):
-    """Carga el JSON principal. Devuelve {} si no existe o está corrupto."""
-    if not os.path.exists(archivo):
-        return {}
-    try:
-        with open(archivo, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        print(f"Advertencia: El archivo principal {archivo} está corrupto. Se iniciará/continuará desde cero.")
-        return {}
-
-def guardar_noticias(archivo, datos):
-    """Guarda el diccionario de noticias actualizado en el archivo JSON principal."""
+    """IDs ya guardados en el almacén SQLite (el JSON antiguo se migra solo la primera vez)."""
+    return LoteNoticias(obtener_store(), por="id")
+
+def guardar_noticias(archivo, datos) -> bool:
+    """Escribe en el almacén SOLO las noticias nuevas (upsert por _id)."""
     try:
-        os.makedirs(os.path.dirname(archivo), exist_ok=True)
-        with open(archivo, 'w', encoding='utf-8') as f:
-            json.dump(datos, f, indent=4, ensure_ascii=False)
-        # --- ¡CAMBIO! Mensaje actualizado ---
-        print(f"\n¡Éxito! Base de datos principal ({archivo}) actualizada con noticias de El Peruano.")
-    except IOError as e:
-        print(f"\nError al escribir en el archivo {archivo}: {e}")
+        resumen = datos.guardar()
+        print(f"\n¡Éxito! Almacén de noticias actualizado con noticias de El Peruano ({resumen}).")
+        return True
+    except (sqlite3.Error, OSError) as e:
+        print(f"\nError al escribir en el almacén de noticias: {e}")
+        return False
 
 # --- Función Principal ---
 
@@ -123,6 +122,7 @@ def main():
     print(f"Se cargaron {len(noticias_guardadas)} noticias existentes desde {OUTPUT_FILE}.")
 
     nuevas_noticias_elperuano = 0
+    checkpoints = Checkpoints("El Peruano")
 
     for query in KEYWORDS:
         print(f"\n--- [El Peruano] Buscando término: '{query}' (desde {START_DATE_LIMIT.date()}) ---")
@@ -142,7 +142,7 @@ def main():
             print(f"Obteniendo [El Peruano]: Página {page_num} para '{query}'...")
 
             try:
-                response = requests.get(API_URL, params=params, timeout=15)
+                response = obtener_cliente().get(API_URL, params=params, timeout=15, frescura=TTL_BUSQUEDAS)
                 response.raise_for_status()
                 articulos_api = response.json()
 
@@ -154,6 +154,13 @@ def main():
                 # nuevas_en_esta_pagina = 0 # <-- REMOVED FROM HERE
                 all_articles_on_page_are_old = True
 
+                # ¿Nada nuevo (o ya se llegó al checkpoint del término)? Se pregunta antes de agregar la página
+                fechas = {a.get('intNoticiaId'): _parse_elperuano_date(a.get('dtmFecha')) for a in articulos_api}
+                sin_novedades = checkpoints.pagina_sin_novedades(
+                    query, [(f"elperuano_{id_}", fecha.strftime('%Y-%m-%d %H:%M:%S'))
+                            for id_, fecha in fechas.items() if id_ and fecha and fecha >= START_DATE_LIMIT],
+                    noticias_guardadas.__contains__, ordenada=True)
+
                 for articulo in articulos_api:
                     article_id_int = articulo.get('intNoticiaId')
                     article_date_obj = _parse_elperuano_date(articulo.get('dtmFecha'))
@@ -166,37 +173,10 @@ def main():
                         article_id_str_prefixed = f"elperuano_{article_id_int}"
 
                         if article_id_str_prefixed not in noticias_guardadas:
-                            url_slug = articulo.get("URLFriendLy", "").lstrip('/')
-                            full_url = BASE_URL + url_slug
-                            noticia_para_guardar = {
-                                "_id": article_id_str_prefixed,
-                                "title": articulo.get("vchTitulo"),
-                                "type": "article",
-                                "date": article_date_obj.strftime('%Y-%m-%d %H:%M:%S'),
-                                "update_date": article_date_obj.strftime('%Y-%m-%d %H:%M:%S'),
-                                "created_at": article_date_obj.strftime('%Y-%m-%d %H:%M:%S'),
-                                "slug": url_slug,
-                                "data": {
-                                    "__typename": "ArticleDataType",
-                                    "teaser": articulo.get("vchBajada") or articulo.get("vchDescripcion"),
-                                    "authors": [],
-                                    "tags": [{'__typename': 'TagType', 'name': query, 'slug': f'/tag/{query.lower()}'}],
-                                    "categories": [{'__typename': 'CategoryReferenceType', 'name': articulo.get('Seccion', 'Desconocida'), 'slug': f"/{articulo.get('Seccion', 'desconocida').lower()}"}],
-                                    "multimedia": [{
-                                        "__typename": 'MultimediaType',
-                                        "type": "image",
-                                        "path": articulo.get("vchRutaCompletaFotografia"),
-                                        "data": {
-                                            "__typename": "MultimediaDataType",
-                                            "title": articulo.get("vchTitulo"),
-                                            "alt": articulo.get("vchTitulo"),
-                                        }
-                                    }]
-                                },
-                                "metadata_seo": {"keywords": query},
-                                "metadata": [{"key": "source", "value": "El Peruano"}],
-                                "has_video": False
-                            }
+                            noticia_para_guardar = desde_elperuano(
+                                articulo, query, BASE_URL,
+                                fecha=article_date_obj.strftime('%Y-%m-%d %H:%M:%S'),
+                            ).a_dict()
                             nuevas_en_esta_pagina += 1
                             noticias_guardadas[article_id_str_prefixed] = noticia_para_guardar
                     else:
@@ -210,6 +190,10 @@ def main():
                     print(f"-> Página completa de artículos antiguos [El Peruano]. Deteniendo búsqueda para '{query}'.")
                     break
 
+                if sin_novedades:
+                    print(f"-> Checkpoint alcanzado [El Peruano] para '{query}': no se piden más páginas.")
+                    break
+
                 time.sleep(1)
 
             except requests.exceptions.RequestException as e:
@@ -224,7 +208,10 @@ def main():
     print(f"Total de noticias NUEVAS de El Peruano (de 2025) agregadas en esta ejecución: {nuevas_noticias_elperuano}")
     print(f"Total de noticias en la base de datos principal ahora: {len(noticias_guardadas)}")
 
-    guardar_noticias(OUTPUT_FILE, noticias_guardadas)
+    guardado = guardar_noticias(OUTPUT_FILE, noticias_guardadas)
+    if guardado:
+        checkpoints.guardar()  # Recién ahora: las noticias de la marca ya están en el almacén
+    print(checkpoints.resumen())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Caché HTTP persistente (SQLite) con revalidación condicional.
+Volver a correr un scraper volvía a pedir todas las páginas de búsqueda (y
+TV Perú, incluso notas que ya tenía). Esta caché, que usa el cliente
+compartido (http_client), guarda en disco las respuestas 200 a los GET:
+
+    respuestas(clave, headers, cuerpo, etag, last_modified, guardado_en, validado_en)
+
+  - Clave: la URL completa con sus parámetros (como la arma requests).
+  - Frescura: quien llama puede pasar frescura=segundos (las páginas de
+    búsqueda usan TTL_BUSQUEDAS); mientras la copia sea más nueva que eso
+    se sirve sin tocar la red.
+  - Revalidación: si no está fresca pero tiene ETag / Last-Modified, se
+    pide con If-None-Match / If-Modified-Since; un 304 sirve la copia.
+    (Sin validadores ni frescura no se guarda: no habría cómo reutilizarla.)
+  - Los cuerpos se guardan comprimidos (zlib) y lo que no se revalida en
+    CADUCIDAD_DIAS se borra al abrir la caché.
+  - Estadísticas de la corrida: peticiones ahorradas (copias frescas),
+    304 y bytes que no hubo que descargar.
+
+Una conexión por hilo (el descargador async usa hilos) y WAL: los scrapers
+en paralelo (scraper_manager) comparten el archivo.
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+CACHE_PATH = os.environ.get("SCRAPER_CACHE_PATH", "news_scrapers/http_cache.db")
+USAR_CACHE = os.environ.get("SCRAPER_CACHE_HTTP", "1") != "0"
+TTL_BUSQUEDAS = int(os.environ.get("SCRAPER_TTL_BUSQUEDAS", "3600"))  # Segundos; 0: siempre revalidar
+CADUCIDAD_DIAS = 30
+
+# Cabeceras que no describen el cuerpo ya decodificado que se guarda
+_NO_GUARDAR = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS respuestas (
+    clave          TEXT PRIMARY KEY,  -- URL completa (con parámetros)
+    headers        TEXT NOT NULL,     -- JSON
+    cuerpo         BLOB NOT NULL,     -- zlib
+    etag           TEXT,
+    last_modified  TEXT,
+    guardado_en    REAL NOT NULL,
+    validado_en    REAL NOT NULL      -- última vez que el servidor la dio por buena
+);
+"""
+
+
+class CacheHTTP:
+    """ Respuestas guardadas + contadores de lo ahorrado en esta corrida. """
+
+    def __init__(self, ruta: str = CACHE_PATH):
+        self.ruta = ruta
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.frescas = 0  # Peticiones que no salieron a la red
+        self.revalidadas = 0  # 304: la red solo confirmó la copia
+        self.bytes_ahorrados = 0
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        conexion = self._conexion()
+        conexion.executescript(_ESQUEMA)
+        conexion.execute("DELETE FROM respuestas WHERE validado_en < ?", (time.time() - CADUCIDAD_DIAS * 86400,))
+
+    def _conexion(self) -> sqlite3.Connection:
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta, timeout=30, isolation_level=None, check_same_thread=False)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            conexion.execute("PRAGMA busy_timeout=30000")
+            self._local.conexion = conexion
+        return conexion
+
+    def leer(self, clave: str):
+        """ Fila guardada de 'clave' (dict) o None. """
+        fila = self._conexion().execute(
+            "SELECT headers, cuerpo, etag, last_modified, validado_en FROM respuestas WHERE clave = ?",
+            (clave,)).fetchone()
+        if fila is None:
+            return None
+        headers, cuerpo, etag, last_modified, validado_en = fila
+        return {"headers": json.loads(headers), "cuerpo": zlib.decompress(cuerpo), "etag": etag,
+                "last_modified": last_modified, "validado_en": validado_en}
+
+    def guardar(self, clave: str, respuesta: requests.Response):
+        ahora = time.time()
+        headers = {k: v for k, v in respuesta.headers.items() if k.lower() not in _NO_GUARDAR}
+        self._conexion().execute(
+            "INSERT OR REPLACE INTO respuestas (clave, headers, cuerpo, etag, last_modified, guardado_en, validado_en) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (clave, json.dumps(headers), zlib.compress(respuesta.content), respuesta.headers.get("ETag"),
+             respuesta.headers.get("Last-Modified"), ahora, ahora))
+
+    def revalidada(self, clave: str, guardada: dict, respuesta_304: requests.Response):
+        """ El servidor respondió 304: la copia sigue vigente (y puede traer un ETag nuevo). """
+        self._conexion().execute(
+            "UPDATE respuestas SET validado_en = ?, etag = COALESCE(?, etag) WHERE clave = ?",
+            (time.time(), respuesta_304.headers.get("ETag"), clave))
+        with self._lock:
+            self.revalidadas += 1
+            self.bytes_ahorrados += len(guardada["cuerpo"])
+
+    def servida_fresca(self, guardada: dict):
+        with self._lock:
+            self.frescas += 1
+            self.bytes_ahorrados += len(guardada["cuerpo"])
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {"cache_frescas": self.frescas, "cache_304": self.revalidadas,
+                    "bytes_ahorrados": self.bytes_ahorrados}
+
+
+def es_fresca(guardada: dict, frescura) -> bool:
+    return bool(frescura) and time.time() - guardada["validado_en"] < frescura
+
+
+def cabeceras_condicionales(guardada: dict) -> dict:
+    """ If-None-Match / If-Modified-Since a partir de los validadores guardados. """
+    cabeceras = {}
+    if guardada["etag"]:
+        cabeceras["If-None-Match"] = guardada["etag"]
+    if guardada["last_modified"]:
+        cabeceras["If-Modified-Since"] = guardada["last_modified"]
+    return cabeceras
+
+
+def como_respuesta(clave: str, guardada: dict, peticion=None) -> requests.Response:
+    """ requests.Response (200) armada con la copia guardada; 'from_cache' vale True. """
+    respuesta = requests.Response()
+    respuesta.status_code = 200
+    respuesta.reason = "OK"
+    respuesta.url = clave
+    respuesta.headers = CaseInsensitiveDict(guardada["headers"])
+    respuesta.encoding = get_encoding_from_headers(respuesta.headers)
+    respuesta._content = guardada["cuerpo"]
+    respuesta.request = peticion
+    respuesta.from_cache = True
+    return respuesta
\ No newline at end of file
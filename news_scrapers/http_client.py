@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Cliente HTTP compartido por todos los scrapers (un requests.Session por proceso).
+Antes La República y El Peruano llamaban a requests.get() suelto (sin sesión
+y, La República, sin timeout): cada página de cada término abría una
+conexión TCP + TLS nueva. Con el cliente compartido:
+
+  - Keep-alive: un pool de conexiones por host (CONEXIONES_POR_HOST), que se
+    reutiliza entre páginas, términos y scrapers del mismo proceso.
+  - Timeouts por defecto (TIMEOUT) si quien llama no pasa uno.
+  - Compresión: gzip/deflate (y brotli, si el paquete está instalado).
+  - Cabeceras comunes (HEADERS: User-Agent, idioma) para todas las fuentes.
+  - Reintentos cortos ante errores de conexión y 502/503/504.
+  - Caché en disco con revalidación condicional (ver http_cache): los GET
+    aceptan frescura=segundos (ej. TTL_BUSQUEDAS en páginas de búsqueda).
+  - Estadísticas (peticiones, conexiones abiertas, segundos, lo ahorrado
+    por la caché) para ver cuánto se reutiliza: ver scraper_manager.
+
+Uso:
+    from news_scrapers.http_client import obtener_cliente
+    respuesta = obtener_cliente().get(url, params=params, frescura=TTL_BUSQUEDAS)
+"""
+
+import os
+import time
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from news_scrapers.http_cache import (CacheHTTP, USAR_CACHE, es_fresca, cabeceras_condicionales,
+                                      como_respuesta)
+
+try:
+    import brotli  # noqa: F401  (urllib3 descomprime 'br' solo si está instalado)
+    CODIFICACIONES = "gzip, deflate, br"
+except ImportError:
+    CODIFICACIONES = "gzip, deflate"
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/141.0.0.0 Safari/537.36"
+)
+HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept-Language": "es-PE,es;q=0.9,en;q=0.8",
+    "Accept-Encoding": CODIFICACIONES,
+}
+
+TIMEOUT = (10, 30)  # (conexión, lectura) en segundos
+CONEXIONES_POR_HOST = int(os.environ.get("SCRAPER_CONEXIONES_POR_HOST", "10"))
+HOSTS_EN_POOL = 20  # Pools (uno por host) que se mantienen abiertos
+
+
+class ClienteHTTP(requests.Session):
+    """ requests.Session con pools por host, timeout por defecto, caché y estadísticas. """
+
+    def __init__(self, headers: dict = None, timeout=TIMEOUT, por_host: int = CONEXIONES_POR_HOST,
+                 cache: CacheHTTP = None):
+        super().__init__()
+        self.cache = cache
+        self.headers.update(headers or HEADERS)
+        self.timeout = timeout
+        reintentos = Retry(total=2, connect=2, read=1, backoff_factor=0.5,
+                           status_forcelist=(502, 503, 504), allowed_methods=("GET", "HEAD"),
+                           raise_on_status=False)
+        self._adaptador = HTTPAdapter(pool_connections=HOSTS_EN_POOL, pool_maxsize=por_host,
+                                      max_retries=reintentos)
+        self.mount("http://", self._adaptador)
+        self.mount("https://", self._adaptador)
+        self._lock_estadisticas = threading.Lock()
+        self._peticiones = 0
+        self._segundos = 0.0
+
+    def request(self, method, url, frescura=None, **kwargs):
+        """ Como Session.request; los GET pasan por la caché (si hay) y 'frescura' es su TTL en segundos. """
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        if self.cache is None or method.upper() != "GET" or kwargs.get("stream"):
+            return self._enviar(method, url, **kwargs)
+
+        peticion = requests.Request("GET", url, params=kwargs.get("params")).prepare()
+        clave = peticion.url
+        guardada = self.cache.leer(clave)
+        if guardada is not None and es_fresca(guardada, frescura):
+            self.cache.servida_fresca(guardada)
+            return como_respuesta(clave, guardada, peticion)
+
+        if guardada is not None:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **cabeceras_condicionales(guardada)}
+        respuesta = self._enviar(method, url, **kwargs)
+        if respuesta.status_code == 304 and guardada is not None:
+            self.cache.revalidada(clave, guardada, respuesta)
+            return como_respuesta(clave, guardada, respuesta.request)
+        if respuesta.status_code == 200 and (frescura or "ETag" in respuesta.headers
+                                             or "Last-Modified" in respuesta.headers):
+            self.cache.guardar(clave, respuesta)
+        return respuesta
+
+    def _enviar(self, method, url, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return super().request(method, url, **kwargs)
+        finally:
+            with self._lock_estadisticas:
+                self._peticiones += 1
+                self._segundos += time.perf_counter() - inicio
+
+    def estadisticas(self) -> dict:
+        """
+        Peticiones que salieron a la red, conexiones TCP abiertas (el resto
+        reutilizó una), segundos de espera y lo que ahorró la caché.
+        """
+        pools = self._adaptador.poolmanager.pools
+        conexiones = sum(pools[clave].num_connections for clave in pools.keys() if clave in pools)
+        with self._lock_estadisticas:
+            estadisticas = {"peticiones": self._peticiones, "conexiones": conexiones,
+                            "segundos": round(self._segundos, 2)}
+        estadisticas.update(self.cache.estadisticas() if self.cache is not None
+                            else {"cache_frescas": 0, "cache_304": 0, "bytes_ahorrados": 0})
+        return estadisticas
+
+
+# --- Cliente único por proceso ---
+_cliente = None
+_lock_cliente = threading.Lock()
+
+
+def obtener_cliente() -> ClienteHTTP:
+    """ Cliente HTTP del proceso (se crea la primera vez que se pide). """
+    global _cliente
+    if _cliente is None:
+        with _lock_cliente:
+            if _cliente is None:
+                _cliente = ClienteHTTP(cache=CacheHTTP() if USAR_CACHE else None)
+    return _cliente
\ No newline at end of file
@@ -4,6 +4,13 @@ import os
 import urllib.parse
 import time
 import datetime
+import sqlite3
+
+from ai_engine.articulo import desde_larepublica
+from ai_engine.news_store import obtener_store, LoteNoticias
+from news_scrapers.http_client import obtener_cliente
+from news_scrapers.http_cache import TTL_BUSQUEDAS
+from news_scrapers.checkpoints import Checkpoints
 
 # --- Configuración ---
 BASE_API_URL = "https://larepublica.pe/api/search/articles"
@@ -77,23 +84,18 @@ PARTIDOS_KEYWORDS = [
 # --- Funciones del Script ---
 
 def cargar_noticias_existentes(archivo):
-    if not os.path.exists(archivo):
-        return {}
-    try:
-        with open(archivo, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        print(f"Advertencia: {archivo} está corrupto. Se creará uno nuevo.")
-        return {}
+    # IDs ya guardados en el almacén SQLite (el JSON antiguo se migra solo la primera vez)
+    return LoteNoticias(obtener_store(), por="id")
 
-def guardar_noticias(archivo, datos):
+def guardar_noticias(archivo, datos) -> bool:
+    # Solo se escriben las noticias nuevas (upsert por _id; los duplicados se colapsan)
     try:
-        os.makedirs(os.path.dirname(archivo), exist_ok=True)
-        with open(archivo, 'w', encoding='utf-8') as f:
-            json.dump(datos, f, indent=4, ensure_ascii=False)
-        print(f"\n¡Éxito! Noticias guardadas y actualizadas en {archivo}")
-    except IOError as e:
-        print(f"\nError al escribir en el archivo {archivo}: {e}")
+        resumen = datos.guardar()
+        print(f"\n¡Éxito! Noticias guardadas en el almacén ({resumen})")
+        return True
+    except (sqlite3.Error, OSError) as e:
+        print(f"\nError al escribir en el almacén de noticias: {e}")
+        return False
 
 def main():
     print("--- Iniciando scraper de La República (Modo Paciente + Filtro de Fecha Corregido) ---")
@@ -102,6 +104,8 @@ def main():
     print(f"Se cargaron {len(noticias_guardadas)} noticias existentes desde {OUTPUT_FILE}.")
     
     nuevas_noticias_contador_total = 0
+    checkpoints = Checkpoints("La República")
+    fecha_minima = START_DATE_LIMIT.strftime('%Y-%m-%d %H:%M:%S')
     
     for query in PARTIDOS_KEYWORDS:
         print(f"\n--- Buscando término: '{query}' (desde {START_DATE_LIMIT.date()}) ---")
@@ -114,7 +118,8 @@ def main():
             print(f"Obteniendo: Página {page_num} para '{query}'...")
 
             try:
-                response = requests.get(full_url)
+                # Conexión reutilizada + timeout por defecto; la página se sirve de la caché si es reciente
+                response = obtener_cliente().get(full_url, frescura=TTL_BUSQUEDAS)
                 response.raise_for_status()
                 data = response.json()
                 articulos_api = data.get('articles', {}).get('data', [])
@@ -122,6 +127,14 @@ def main():
                 if not articulos_api:
                     print(f"No se encontraron más resultados para '{query}'.")
                     break
+
+                # Resultados ordenados por update_date: si la página no trae nada nuevo
+                # (o ya llega al checkpoint del término), las siguientes tampoco.
+                # (Se pregunta ANTES de agregar la página al lote.)
+                sin_novedades = checkpoints.pagina_sin_novedades(
+                    query, [(a.get('_id'), a.get('update_date')) for a in articulos_api
+                            if a.get('_id') and (a.get('update_date') or '') >= fecha_minima],
+                    noticias_guardadas.__contains__, ordenada=True)
                 
                 nuevas_en_esta_pagina = 0
                 for articulo in articulos_api:
@@ -143,13 +156,17 @@ def main():
                     if article_date >= START_DATE_LIMIT:
                         if article_id not in noticias_guardadas:
                             nuevas_en_esta_pagina += 1
-                            noticias_guardadas[article_id] = articulo
+                            noticias_guardadas[article_id] = desde_larepublica(articulo).a_dict()
                     else:
                         pass 
                 
                 nuevas_noticias_contador_total += nuevas_en_esta_pagina
                 print(f"Resultados: {nuevas_en_esta_pagina} noticias nuevas (de 2025) añadidas.")
 
+                if sin_novedades:
+                    print(f"-> Checkpoint alcanzado para '{query}': no se piden más páginas.")
+                    break
+
                 time.sleep(0.5) 
                 
             except requests.exceptions.RequestException as e:
@@ -163,7 +180,10 @@ def main():
     print(f"Total de noticias nuevas (de 2025) agregadas en esta ejecución: {nuevas_noticias_contador_total}")
     print(f"Total de noticias en la base de datos ahora: {len(noticias_guardadas)}")
     
-    guardar_noticias(OUTPUT_FILE, noticias_guardadas)
+    guardado = guardar_noticias(OUTPUT_FILE, noticias_guardadas)
+    if guardado:
+        checkpoints.guardar()  # Recién ahora: las noticias de la marca ya están en el almacén
+    print(checkpoints.resumen())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -7,6 +7,7 @@ Adaptado para la estructura de la página /buscar/
 
 import os
 import json
+import sqlite3
 import time
 import random
 from typing import List, Dict, Set
@@ -16,6 +17,12 @@ import datetime
 import requests
 from bs4 import BeautifulSoup
 
+from ai_engine.articulo import desde_rpp, id_estable
+from ai_engine.news_store import obtener_store, LoteNoticias
+from news_scrapers.async_fetcher import DescargadorAsync
+from news_scrapers.http_client import obtener_cliente, HEADERS
+from news_scrapers.checkpoints import Checkpoints
+
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
@@ -62,14 +69,7 @@ MAX_VIEWMORE_CLICKS = 4
 REQUEST_TIMEOUT = 20
 OUTPUT_FILE = "news_scrapers/noticias_partidos.json"
 
-SESSION_HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/141.0.0.0 Safari/537.36"
-    ),
-    "Accept-Language": "es-PE,es;q=0.9,en;q=0.8",
-}
+SESSION_HEADERS = HEADERS  # Cabeceras comunes del cliente HTTP compartido
 
 # ========== UTILIDADES ==========
 
@@ -105,51 +105,35 @@ def uniq_preserve_order(seq):
 
 # ========== LÓGICA DE CARGA/GUARDADO (MODO DICCIONARIO CORREGIDO) ==========
 
-def load_existing_data(filepath: str) -> Dict[str, Dict]:
-    if not os.path.exists(filepath):
-        print(f"[Info Main] No se encontró {filepath}. Se creará uno nuevo.")
-        return {}
-    url_to_news = {}
+def load_existing_data(filepath: str) -> LoteNoticias:
+    # URLs ya guardadas en el almacén SQLite (el JSON antiguo se migra solo la primera vez)
     try:
-        with open(filepath, "r", encoding="utf-8") as f: data = json.load(f)
-        if isinstance(data, dict):
-            # print("[Info Main] JSON principal cargado (Formato Diccionario).") # Verboso
-            for key, item in data.items():
-                if isinstance(item, dict):
-                    url = item.get("url")
-                    if url: url_to_news[url] = item
-        elif isinstance(data, list):
-            print("[Info Main] JSON principal cargado (Formato Lista Antiguo). Convirtiendo...")
-            for item in data:
-                if isinstance(item, dict):
-                    url = item.get("url")
-                    if url: url_to_news[url] = item
-        else:
-            print(f"[Warn Main] {filepath} contiene tipo inesperado. Empezando vacío.")
-            return {}
-        print(f"[Info Main] Cargadas {len(url_to_news)} noticias existentes (por URL) de {filepath}")
-        return url_to_news
-    except json.JSONDecodeError: print(f"[Warn Main] {filepath} corrupto. Empezando vacío."); return {}
-    except Exception as e: print(f"[Error Main] Cargando {filepath}: {e}"); return {}
-
-def save_updated_data(filepath: str, data_dict_by_url: Dict[str, Dict]):
+        data = LoteNoticias(obtener_store(), por="url")
+        print(f"[Info Main] Cargadas {len(data)} noticias (por URL) del almacén")
+        return data
+    except (sqlite3.Error, OSError) as e:
+        print(f"[Error Main] Abriendo el almacén de noticias: {e}")
+        raise
+
+def save_updated_data(filepath: str, data_dict_by_url: LoteNoticias) -> bool:
+    # Solo se escriben las noticias nuevas (upsert por _id; los duplicados se colapsan).
+    # Si falla, quedan pendientes en el lote para el siguiente guardado.
     try:
-        final_data_dict_by_id = {}
-        for url, item in data_dict_by_url.items():
-             item_id = str(item.get("_id", url))
-             final_data_dict_by_id[item_id] = item
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(final_data_dict_by_id, f, ensure_ascii=False, indent=2)
-        print(f"\n[Info Main] JSON principal guardado: {filepath} | Total: {len(final_data_dict_by_id)}")
-    except Exception as e: print(f"\n[Error Main] Guardando {filepath}: {e}")
+        resumen = data_dict_by_url.guardar()
+        print(f"\n[Info Main] Almacén actualizado: {resumen} | Total: {len(data_dict_by_url)}")
+        return True
+    except Exception as e:
+        print(f"\n[Error Main] Guardando en el almacén: {e}")
+        return False
 
 # ========== 1) EXTRAER URLS DE UNA PÁGINA DE BÚSQUEDA (CORREGIDO) ==========
 
-def collect_article_urls_for_search(driver, term: str, max_clicks: int = 4) -> List[str]:
+def collect_article_urls_for_search(driver, term: str, max_clicks: int = 4,
+                                    checkpoints: Checkpoints = None, conocida=None) -> List[str]:
     """
     Entra a https://rpp.pe/buscar/{term}
-    Hace click en "Ver más" max_clicks veces
+    Hace click en "Ver más" max_clicks veces (o hasta que lo cargado no traiga
+    nada nuevo, si se pasan 'checkpoints' y 'conocida')
     Devuelve todas las URLs de los artículos encontrados.
     """
     slug = quote(term)
@@ -216,6 +200,15 @@ def collect_article_urls_for_search(driver, term: str, max_clicks: int = 4) -> L
     if initial_count == 0:
         print(f"[WARN] {term}: La página cargó pero no se parsearon URLs. Revisar selectores.")
 
+    def sin_novedades(nuevas_urls) -> bool:
+        if checkpoints is None or not nuevas_urls:
+            return False
+        return checkpoints.pagina_sin_novedades(term, [(u, None) for u in uniq_preserve_order(nuevas_urls)], conocida)
+
+    if sin_novedades(urls):
+        print(f"[INFO] {term}: nada nuevo en la primera página (checkpoint). Sin clics en 'Ver más'.")
+        max_clicks = 0
+
     # Clics controlados
     for i in range(max_clicks):
         sleep_jitter()
@@ -245,6 +238,7 @@ def collect_article_urls_for_search(driver, term: str, max_clicks: int = 4) -> L
             current_urls = read_urls_now()
             if len(current_urls) > before_count:
                 print(f"[BUSCAR] {term}: URLs aumentaron a {len(current_urls)}.")
+                nuevas_urls = current_urls[before_count:]
                 urls = current_urls
                 grew = True
                 break
@@ -254,6 +248,10 @@ def collect_article_urls_for_search(driver, term: str, max_clicks: int = 4) -> L
             print(f"[INFO] Clic {i+1} en 'Ver más' no cargó nuevos artículos para '{term}'. Deteniendo.")
             break
 
+        if sin_novedades(nuevas_urls):
+            print(f"[INFO] {term}: lo cargado tras el clic {i+1} no trae nada nuevo (checkpoint). Deteniendo.")
+            break
+
     urls = uniq_preserve_order(urls)
     urls = [u if is_full_url(u) else urljoin(BASE_SITE, u) for u in urls]
     print(f"[BUSCAR] {term}: {len(urls)} URLs únicas finales encontradas tras {max_clicks} clic(s).")
@@ -263,13 +261,16 @@ def collect_article_urls_for_search(driver, term: str, max_clicks: int = 4) -> L
 # ========== 2) PARSEAR CADA ARTÍCULO ==========
 
 def fetch_article(url: str, search_term: str) -> Dict:
-    """ Parsea el artículo y lo devuelve en el formato de diccionario unificado. """
+    """ Descarga y parsea UN artículo (el pipeline principal usa DescargadorAsync + parse_article). """
     try:
-        r = requests.get(url, headers=SESSION_HEADERS, timeout=REQUEST_TIMEOUT)
+        r = obtener_cliente().get(url, timeout=REQUEST_TIMEOUT)
         r.raise_for_status()
     except Exception as e: print(f"[Fetch Error] {url}: {e}"); return None
+    return parse_article(r.text, url, search_term)
 
-    soup = BeautifulSoup(r.text, "html.parser")
+def parse_article(html: str, url: str, search_term: str) -> Dict:
+    """ Parsea el artículo y lo devuelve en el formato de diccionario unificado. """
+    soup = BeautifulSoup(html, "html.parser")
     title_el = soup.select_one("h1.article__title, h1.title"); title = title_el.get_text(strip=True) if title_el else None
     body_el = soup.select_one("div.body, div.article-content"); paragraphs = []
     if body_el:
@@ -283,17 +284,10 @@ def fetch_article(url: str, search_term: str) -> Dict:
 
     if not title or not content: print(f"[Parse Error] {url}: Título o contenido vacíos."); return None
 
-    try: id_part = url.split('-noticia-')[-1].split('?')[0]; article_id = f"rpp_{id_part}" if id_part.isdigit() else f"rpp_{url.split('/')[-1].split('?')[0]}"
-    except Exception: article_id = f"rpp_{hash(url)}"
+    article_id = id_estable(url, "rpp") # Determinista: mismo _id en cada corrida
     fecha_dt = datetime.datetime.now(datetime.timezone.utc); date_iso = fecha_dt.strftime('%Y-%m-%d %H:%M:%S') # Placeholder
 
-    return { "_id": article_id, "title": title, "type": "article", "date": date_iso, "update_date": date_iso,
-             "created_at": date_iso, "slug": url.replace(BASE_SITE, "").lstrip('/'), "url": url,
-             "data": { "__typename": "ArticleDataType", "teaser": teaser, "authors": [],
-                       "tags": [{'__typename':'TagType', 'name': search_term, 'slug': f'/tag/{search_term.lower()}'}],
-                       "categories": [], "multimedia": [] },
-             "metadata_seo": {"keywords": search_term}, "metadata": [{"key": "source", "value": "RPP"}],
-             "has_video": False, "contenido_full": content }
+    return desde_rpp(article_id, title, url, BASE_SITE, teaser, content, search_term, fecha=date_iso).a_dict()
 
 
 # ========== 3) PIPELINE PRINCIPAL ==========
@@ -304,6 +298,7 @@ def main():
 
     existing_data_by_url = load_existing_data(OUTPUT_FILE)
     initial_count = len(existing_data_by_url)
+    checkpoints = Checkpoints("RPP")
     driver = None
 
     try:
@@ -312,6 +307,7 @@ def main():
         for term in KEYWORDS:
             urls_term = collect_article_urls_for_search(
                 driver, term, max_clicks=MAX_VIEWMORE_CLICKS,
+                checkpoints=checkpoints, conocida=existing_data_by_url.__contains__,
             )
             for u in urls_term: all_urls.append((term, u))
 
@@ -325,18 +321,20 @@ def main():
         urls_to_fetch = [(term, url) for term, url in final_urls if url not in existing_data_by_url]
         print(f"[INFO] URLs nuevas a procesar: {len(urls_to_fetch)}")
 
+        # Descarga concurrente (acotada por host) de los artículos nuevos
         new_articles_count = 0
-        for term, url in urls_to_fetch:
-            if url in existing_data_by_url: continue
-            art_dict = fetch_article(url, term)
-            if art_dict:
-                existing_data_by_url[url] = art_dict; new_articles_count += 1
-            if new_articles_count > 0 and new_articles_count % 25 == 0:
-                save_updated_data(OUTPUT_FILE, existing_data_by_url)
-                print(f"[SAVE] {len(existing_data_by_url)} artículos (parcial). {new_articles_count} nuevos.")
-            sleep_jitter(0.1, 0.4)
-
-        save_updated_data(OUTPUT_FILE, existing_data_by_url)
+        with DescargadorAsync(SESSION_HEADERS) as descargador:
+            for (url, term), r in descargador.descargar((url, term) for term, url in urls_to_fetch):
+                art_dict = parse_article(r.text, url, term) if r is not None else None
+                if art_dict:
+                    existing_data_by_url[url] = art_dict; new_articles_count += 1
+                    if new_articles_count % 25 == 0:
+                        save_updated_data(OUTPUT_FILE, existing_data_by_url)
+                        print(f"[SAVE] {len(existing_data_by_url)} artículos (parcial). {new_articles_count} nuevos.")
+
+        if save_updated_data(OUTPUT_FILE, existing_data_by_url):
+            checkpoints.guardar()  # Recién ahora: las noticias de la marca ya están en el almacén
+        print(checkpoints.resumen())
         print(f"[OK] Terminado. {new_articles_count} nuevos añadidos.")
         print(f"Total artículos en {OUTPUT_FILE}: {len(existing_data_by_url)}")
 
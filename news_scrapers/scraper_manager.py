@@ -1,7 +1,11 @@
 # news_scrapers/scraper_manager.py
 
+import os
+import sys
 import time
 import traceback # Para un log de errores más detallado
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # --- Importar TODOS los scrapers estatales ---
 # Importamos sus funciones 'main' con alias claros
@@ -10,64 +14,152 @@ from news_scrapers.elperuano_scraper import main as run_elperuano_scraper
 from news_scrapers.canaln_scrapper import main as run_canaln_scraper
 from news_scrapers.rpp_scrapper import main as run_rpp_scraper
 from news_scrapers.tvperu_scrapper import main as run_tvperu_scraper
+from ai_engine.news_store import DB_PATH, AlmacenStaging, fusionar_staging, obtener_store, usar_store
+from news_scrapers.http_client import obtener_cliente
 # (Se omite peru21_scrapper como solicitaste)
 
-def get_all_news(limit=10): # El 'limit' ya no se usa, pero se mantiene por compatibilidad
+# Lista de todos los scrapers a ejecutar (en serie, en este orden; en paralelo,
+# este orden decide qué fuente se queda con una nota que traen varias)
+SCRAPERS_ESTATALES = [
+    ("La República", "larepublica", run_larepublica_scraper),
+    ("El Peruano", "elperuano", run_elperuano_scraper),
+    ("Canal N", "canaln", run_canaln_scraper),
+    ("RPP", "rpp", run_rpp_scraper),
+    ("TV Perú", "tvperu", run_tvperu_scraper),
+]
+
+# Modo paralelo: cada scraper en su propio proceso, escribiendo en su staging
+EN_PARALELO = os.environ.get("SCRAPERS_EN_PARALELO", "0") == "1"
+STAGING_DIR = os.environ.get("SCRAPERS_STAGING_DIR", "news_scrapers/staging")
+
+
+def _ruta_staging(clave):
+    return os.path.join(STAGING_DIR, f"{clave}.jsonl")
+
+
+def _resumen_http(antes):
+    """
+    Peticiones HTTP del scraper, cuántas conexiones nuevas necesitó (el resto
+    reutilizó una) y lo que ahorró la caché HTTP (ver http_cache).
+    """
+    despues = obtener_cliente().estadisticas()
+    delta = {clave: despues[clave] - antes[clave] for clave in despues}
+    if delta["peticiones"]:
+        print(f"--- 🌐 HTTP: {delta['peticiones']} peticiones con {delta['conexiones']} "
+              f"conexiones nuevas ({delta['segundos']:.2f} s de espera) ---")
+    if delta["cache_frescas"] or delta["cache_304"]:
+        print(f"--- 💾 Caché HTTP: {delta['cache_frescas']} peticiones ahorradas, {delta['cache_304']} "
+              f"revalidadas (304), {delta['bytes_ahorrados'] / 2 ** 20:.2f} MB sin descargar ---")
+
+
+def _ejecutar_scraper(nombre, scraper_func):
+    """ Ejecuta un scraper (sin dejar que su error corte el resto). Devuelve (ok, segundos). """
+    print(f"\n--- 📡 Ejecutando scraper: {nombre} ---")
+
+    start_time_scraper = time.time()
+    http_antes = obtener_cliente().estadisticas()
+    try:
+        # Ejecutamos la función 'main' de cada scraper
+        scraper_func()
+        end_time_scraper = time.time()
+        print(f"--- ✅ Scraper de {nombre} finalizado ---")
+        print(f"--- ⏱️  Tiempo de {nombre}: {end_time_scraper - start_time_scraper:.2f} segundos ---")
+        _resumen_http(http_antes)
+        return True, end_time_scraper - start_time_scraper
+
+    except Exception as e:
+        end_time_scraper = time.time()
+        print(f"\n{'!'*70}")
+        print(f"⚠️ ERROR FATAL al ejecutar scraper de {nombre}: {e}")
+        print(f"⏱️  Tiempo de {nombre} (fallido): {end_time_scraper - start_time_scraper:.2f} segundos.")
+        _resumen_http(http_antes)
+        print("Mostrando detalles del error:")
+        traceback.print_exc() # Imprimir el traceback completo para debug
+        print(f"{'!'*70}\n")
+        return False, end_time_scraper - start_time_scraper
+
+
+def _ejecutar_en_staging(clave):
+    """
+    Worker del modo paralelo (corre en su propio proceso): el scraper consulta
+    el almacén para saber qué ya existe, pero lo nuevo va a su staging.
+    """
+    nombre, _, scraper_func = next(s for s in SCRAPERS_ESTATALES if s[1] == clave)
+    usar_store(AlmacenStaging(obtener_store(), _ruta_staging(clave)))
+    return _ejecutar_scraper(nombre, scraper_func)
+
+
+def _ejecutar_en_paralelo():
+    """ Lanza un proceso por scraper. Devuelve {nombre: (ok, segundos)}. """
+    tiempos = {}
+    # 'spawn': cada proceso arranca limpio (sin conexiones SQLite ni drivers heredados)
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(SCRAPERS_ESTATALES), mp_context=contexto) as pool:
+        futuros = {pool.submit(_ejecutar_en_staging, clave): nombre for nombre, clave, _ in SCRAPERS_ESTATALES}
+        for futuro in as_completed(futuros):
+            nombre = futuros[futuro]
+            try:
+                tiempos[nombre] = futuro.result()
+            except Exception as e:  # El proceso murió (ej. sin memoria con Selenium)
+                print(f"⚠️ ERROR FATAL: el proceso del scraper de {nombre} terminó de forma inesperada: {e}")
+                tiempos[nombre] = (False, None)
+    return tiempos
+
+
+def get_all_news(limit=10, paralelo=None): # El 'limit' ya no se usa, pero se mantiene por compatibilidad
     """
     Ejecuta TODOS los scrapers estatales (La República, El Peruano, Canal N, RPP, TV Perú)
-    uno por uno, para que actualicen el archivo JSON principal 'noticias_partidos.json'.
+    para que actualicen el almacén de noticias (SQLite, ver ai_engine.news_store).
+
+    En serie (por defecto) van uno por uno. Con 'paralelo' (o SCRAPERS_EN_PARALELO=1)
+    cada uno corre en su propio proceso y escribe en su staging (STAGING_DIR); al
+    final un solo paso fusiona todo en el almacén, deduplicando por URL canónica.
+    Así el tiempo total es, más o menos, el del scraper más lento.
 
-    Devuelve una lista vacía, ya que las noticias se gestionan en el JSON.
+    Devuelve una lista vacía, ya que las noticias se gestionan en el almacén.
     """
-    OUTPUT_FILE="news_scrapers/noticias_partidos.json" 
-    # Lista de todos los scrapers a ejecutar en orden
-    scrapers_estatales = [
-        ("La República", run_larepublica_scraper),
-        ("El Peruano", run_elperuano_scraper),
-        ("Canal N", run_canaln_scraper),
-        ("RPP", run_rpp_scraper),
-        ("TV Perú", run_tvperu_scraper),
-    ]
-    
+    OUTPUT_FILE=DB_PATH
+    paralelo = EN_PARALELO if paralelo is None else paralelo
+
     print("\n" + "="*70)
     print("--- INICIANDO ACTUALIZACIÓN GLOBAL DE BASE DE DATOS ---")
-    print(f"Se ejecutarán {len(scrapers_estatales)} scrapers en serie...")
-    print(f"Todas las noticias se guardarán en '{OUTPUT_FILE}'") # Asegúrate de que OUTPUT_FILE esté definido si usas esto, o usa el path directo
+    print(f"Se ejecutarán {len(SCRAPERS_ESTATALES)} scrapers {'en paralelo' if paralelo else 'en serie'}...")
+    print(f"Todas las noticias se guardarán en '{OUTPUT_FILE}'")
     print("="*70)
-    
+
     start_time_global = time.time()
+    resumenes = {}
 
-    for nombre, scraper_func in scrapers_estatales:
-        print(f"\n--- 📡 Ejecutando scraper: {nombre} ---")
-        
-        start_time_scraper = time.time()
-        try:
-            # Ejecutamos la función 'main' de cada scraper
-            scraper_func() 
-            end_time_scraper = time.time()
-            print(f"--- ✅ Scraper de {nombre} finalizado ---")
-            print(f"--- ⏱️  Tiempo de {nombre}: {end_time_scraper - start_time_scraper:.2f} segundos ---")
-            
-        except Exception as e:
-            end_time_scraper = time.time()
-            print(f"\n{'!'*70}")
-            print(f"⚠️ ERROR FATAL al ejecutar scraper de {nombre}: {e}")
-            print(f"⏱️  Tiempo de {nombre} (fallido): {end_time_scraper - start_time_scraper:.2f} segundos.")
-            print("Mostrando detalles del error:")
-            traceback.print_exc() # Imprimir el traceback completo para debug
-            print(f"{'!'*70}\n")
-            # Continuar con el siguiente scraper
-        
-        # Pausa breve entre scrapers para evitar sobrecargas (opcional)
-        # time.sleep(1) 
+    if paralelo:
+        tiempos = _ejecutar_en_paralelo()
+
+        # Paso de fusión: staging de cada fuente -> almacén (en el orden de la lista)
+        print("\n--- 🔀 Fusionando el staging de cada scraper en el almacén ---")
+        start_time_fusion = time.time()
+        por_ruta = fusionar_staging([_ruta_staging(clave) for _, clave, _ in SCRAPERS_ESTATALES])
+        resumenes = {nombre: por_ruta[_ruta_staging(clave)]
+                     for nombre, clave, _ in SCRAPERS_ESTATALES if _ruta_staging(clave) in por_ruta}
+        print(f"--- ⏱️  Tiempo de la fusión: {time.time() - start_time_fusion:.2f} segundos ---")
+    else:
+        tiempos = {nombre: _ejecutar_scraper(nombre, scraper_func) for nombre, _, scraper_func in SCRAPERS_ESTATALES}
 
     end_time_global = time.time()
     print("\n" + "="*70)
     print("--- ACTUALIZACIÓN DE BASE DE DATOS COMPLETADA ---")
-    print(f"⏱️  Tiempo total de ejecución: {end_time_global - start_time_global:.2f} segundos.")
-    print(f"ℹ️  El archivo 'noticias_partidos.json' ha sido actualizado por todos los scrapers.")
+    print(f"{'Scraper':<14} {'Estado':<8} {'Tiempo':>10}" + (f" {'Nuevas':>7} {'Dupl.':>6} {'Omit.':>6}" if paralelo else ""))
+    for nombre, _, _ in SCRAPERS_ESTATALES:
+        ok, segundos = tiempos.get(nombre, (False, None))
+        linea = f"{nombre:<14} {'✅ ok' if ok else '⚠️ error':<8} {f'{segundos:.2f}s' if segundos is not None else '-':>10}"
+        if paralelo:
+            r = resumenes.get(nombre, {})
+            linea += f" {r.get('guardados', 0):>7} {r.get('duplicados', 0):>6} {r.get('omitidos', 0):>6}"
+        print(linea)
+    suma = sum(segundos for _, segundos in tiempos.values() if segundos)
+    print(f"⏱️  Tiempo total de ejecución: {end_time_global - start_time_global:.2f} segundos "
+          f"(suma de los scrapers: {suma:.2f} segundos).")
+    print(f"ℹ️  El almacén '{OUTPUT_FILE}' ha sido actualizado por todos los scrapers.")
     print("="*70)
-    
+
     # Devolver lista vacía como se espera en el resto del proyecto (app.py)
     return []
 
@@ -75,11 +167,11 @@ def get_all_news(limit=10): # El 'limit' ya no se usa, pero se mantiene por comp
 if __name__ == "__main__":
     """
     Permite ejecutar el manager directamente para probar:
-    python -m news_scrapers.scraper_manager
+    python -m news_scrapers.scraper_manager [--paralelo]
     """
     print("Ejecutando el manejador de scrapers (actualizando JSON principal)...\n")
     
-    get_all_news() 
+    get_all_news(paralelo=True if "--paralelo" in sys.argv[1:] else None)
     
     print("\n--- Resumen de Ejecución (manager) ---")
     print("✅ Todos los scrapers han sido ejecutados.")
@@ -8,6 +8,7 @@ Selectores de contenido mejorados.
 
 import os
 import json
+import sqlite3
 import time
 import re
 from typing import List, Dict, Set, Optional
@@ -18,6 +19,13 @@ import random
 import requests
 from bs4 import BeautifulSoup
 
+from ai_engine.articulo import desde_tvperu, id_estable
+from ai_engine.news_store import obtener_store, LoteNoticias
+from news_scrapers.async_fetcher import DescargadorAsync
+from news_scrapers.http_client import obtener_cliente, HEADERS
+from news_scrapers.http_cache import TTL_BUSQUEDAS
+from news_scrapers.checkpoints import Checkpoints
+
 # ========== CONFIGURACIÓN ==========
 BASE_SITE = "https://www.tvperu.gob.pe"
 BASE_SEARCH_URL = "https://www.tvperu.gob.pe/search/node/{slug}"
@@ -50,11 +58,10 @@ REQUEST_TIMEOUT = 20
 OUTPUT_FILE = "news_scrapers/noticias_partidos.json"
 MAX_PAGINAS_POR_BUSQUEDA = 5
 
+# Cabeceras comunes del cliente HTTP compartido + las propias de TV Perú
 SESSION_HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    **HEADERS,
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-    'Accept-Language': 'es-ES,es;q=0.9',
-    'Connection': 'keep-alive',
     'Referer': 'https://www.tvperu.gob.pe/'
 }
 
@@ -72,53 +79,26 @@ def limpiar_texto(texto):
 
 # ========== LÓGICA DE CARGA/GUARDADO ==========
 
-def load_existing_data(filepath: str) -> Dict[str, Dict]:
-    # (Sin cambios respecto a la versión anterior)
-    if not os.path.exists(filepath):
-        print(f"[Info Main] No se encontró {filepath}. Creando.")
-        return {}
-    url_to_news = {}
+def load_existing_data(filepath: str) -> LoteNoticias:
+    # URLs ya guardadas en el almacén SQLite (el JSON antiguo se migra solo la primera vez)
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if isinstance(data, dict):
-            for key, item in data.items():
-                if isinstance(item, dict):
-                    url = item.get("url")
-                    if url:
-                        url_to_news[url] = item
-        elif isinstance(data, list):
-            print("[Info Main] JSON era lista. Convirtiendo...")
-            for item in data:
-                if isinstance(item, dict):
-                    url = item.get("url")
-                    if url:
-                        url_to_news[url] = item
-        else:
-            print(f"[Warn Main] {filepath} tipo inesperado.")
-            return {}
-        print(f"[Info Main] Cargadas {len(url_to_news)} noticias (por URL) de {filepath}")
-        return url_to_news
-    except json.JSONDecodeError:
-        print(f"[Warn Main] {filepath} corrupto.")
-        return {}
-    except Exception as e:
-        print(f"[Error Main] Cargando {filepath}: {e}")
-        return {}
-
-def save_updated_data(filepath: str, data_dict_by_url: Dict[str, Dict]):
-    # (Sin cambios respecto a la versión anterior)
+        data = LoteNoticias(obtener_store(), por="url")
+        print(f"[Info Main] Cargadas {len(data)} noticias (por URL) del almacén")
+        return data
+    except (sqlite3.Error, OSError) as e:
+        print(f"[Error Main] Abriendo el almacén de noticias: {e}")
+        raise
+
+def save_updated_data(filepath: str, data_dict_by_url: LoteNoticias) -> bool:
+    # Solo se escriben las noticias nuevas (upsert por _id; los duplicados se colapsan).
+    # Si falla, quedan pendientes en el lote para el siguiente guardado.
     try:
-        final_data_dict_by_id = {}
-        for url, item in data_dict_by_url.items():
-             item_id = str(item.get("_id", url))
-             final_data_dict_by_id[item_id] = item
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(final_data_dict_by_id, f, ensure_ascii=False, indent=2)
-        print(f"\n[Info Main] JSON guardado: {filepath} | Total: {len(final_data_dict_by_id)}")
+        resumen = data_dict_by_url.guardar()
+        print(f"\n[Info Main] Almacén actualizado: {resumen} | Total: {len(data_dict_by_url)}")
+        return True
     except Exception as e:
-        print(f"\n[Error Main] Guardando {filepath}: {e}")
+        print(f"\n[Error Main] Guardando en el almacén: {e}")
+        return False
 
 # ========== SCRAPER TV PERÚ ==========
 
@@ -129,8 +109,9 @@ class TVPeruScraper:
         self.keywords = keywords
         self.output_file = output_file
         self.max_paginas_por_busqueda = max_paginas
-        self.session = requests.Session()
-        self.session.headers.update(SESSION_HEADERS)
+        self.session = obtener_cliente()  # Compartido: pools por host y keep-alive
+        self.descargador = None  # DescargadorAsync de la corrida (ver run)
+        self.checkpoints = Checkpoints("TV Perú")
         self.existing_data_by_url = {}
 
     def _extraer_numero_paginas(self, soup):
@@ -152,7 +133,8 @@ class TVPeruScraper:
         print(f"\n--- [TV Perú] Pag.{numero_pagina + 1} ({termino_busqueda}) ---")
         print(f"🔗 {url_pagina}")
         try:
-            response = self.session.get(url_pagina, timeout=REQUEST_TIMEOUT)
+            response = self.session.get(url_pagina, headers=SESSION_HEADERS, timeout=REQUEST_TIMEOUT,
+                                        frescura=TTL_BUSQUEDAS)
             response.raise_for_status()
             soup = BeautifulSoup(response.content, 'html.parser')
 
@@ -200,9 +182,16 @@ class TVPeruScraper:
             return None
 
         try:
-            response = self.session.get(url, timeout=REQUEST_TIMEOUT)
+            response = self.session.get(url, headers=SESSION_HEADERS, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
+        except requests.exceptions.RequestException as e:
+            print(f"      ❌ Error red: {e}")
+            return None
+        return self._parsear_noticia(response.content, url, titulo_busqueda, termino_busqueda)
+
+    def _parsear_noticia(self, html, url, titulo_busqueda, termino_busqueda):
+        try:
+            soup = BeautifulSoup(html, 'html.parser')
 
             title_el = soup.select_one("h1.title, h1[property='dc:title'], h1#page-title")
             title = limpiar_texto(title_el.get_text()) if title_el else titulo_busqueda
@@ -269,31 +258,17 @@ class TVPeruScraper:
                 print(f"      ⚠️ Contenido insuficiente (T:{bool(title)}, C:{len(content)} chars)")
                 return None
 
-            try:
-                match = re.search(r'/node/(\d+)', url)
-                article_id = f"tvperu_{match.group(1)}" if match else f"tvperu_hash_{hash(url)}"
-            except Exception:
-                article_id = f"tvperu_hash_{hash(url)}"
+            article_id = id_estable(url, "tvperu")  # Determinista: mismo _id en cada corrida
 
             fecha_dt = datetime.datetime.now(datetime.timezone.utc)
             date_iso = fecha_dt.strftime('%Y-%m-%d %H:%M:%S')
 
-            noticia_formateada = {
-                 "_id": article_id, "title": title, "type": "article", "date": date_iso, "update_date": date_iso,
-                 "created_at": date_iso, "slug": url.replace(self.base_url, "").lstrip('/'), "url": url,
-                 "data": { "__typename": "ArticleDataType", "teaser": teaser, "authors": [],
-                           "tags": [{'__typename':'TagType', 'name': termino_busqueda, 'slug': f'/tag/{termino_busqueda.lower()}'}],
-                           "categories": [], "multimedia": [] },
-                 "metadata_seo": {"keywords": termino_busqueda},
-                 "metadata": [{"key": "source", "value": "TV Peru"}],
-                 "has_video": False, "contenido_full": content
-            }
+            noticia_formateada = desde_tvperu(article_id, title, url, self.base_url, teaser, content,
+                                              termino_busqueda, fecha=date_iso,
+                                              fecha_publicacion=fecha_str).a_dict()
             print(f"      ✅ OK: {title[:60]}...")
             return noticia_formateada
 
-        except requests.exceptions.RequestException as e:
-            print(f"      ❌ Error red: {e}")
-            return None
         except Exception as e:
             print(f"      ❌ Error extrayendo: {e}")
             # import traceback # Descomentar para debug detallado
@@ -307,7 +282,8 @@ class TVPeruScraper:
         print(f"📍 URL: {url_semilla}"); print(f"📄 Máx Pág: {self.max_paginas_por_busqueda}\n")
         total_paginas = 1
         try:
-            response = self.session.get(url_semilla, timeout=REQUEST_TIMEOUT); response.raise_for_status()
+            response = self.session.get(url_semilla, headers=SESSION_HEADERS, timeout=REQUEST_TIMEOUT,
+                                        frescura=TTL_BUSQUEDAS); response.raise_for_status()
             soup = BeautifulSoup(response.content, 'html.parser'); total_paginas_disponibles = self._extraer_numero_paginas(soup)
             total_paginas = min(total_paginas_disponibles, self.max_paginas_por_busqueda)
             print(f"   📊 Págs disp: {total_paginas_disponibles} | A procesar: {total_paginas}\n")
@@ -317,15 +293,21 @@ class TVPeruScraper:
             url_pagina = self._construir_url_pagina(url_semilla, num_pagina)
             enlaces_pagina = self._extraer_enlaces_de_pagina(url_pagina, num_pagina, keyword)
             todos_enlaces_info.extend(enlaces_pagina)
+            # Búsqueda por relevancia (no por fecha): se corta solo si la página no trae nada nuevo
+            if enlaces_pagina and self.checkpoints.pagina_sin_novedades(
+                    keyword, [(e['url'], None) for e in enlaces_pagina], self.existing_data_by_url.__contains__):
+                print(f"   📌 Pág.{num_pagina + 1} sin noticias nuevas (checkpoint). No se piden más páginas.")
+                break
             if num_pagina < total_paginas - 1: sleep_jitter()
         print(f"\n   🔗 Total enlaces únicos para '{keyword}': {len(todos_enlaces_info)}")
         nuevas_noticias_keyword = 0
-        for i, enlace_info in enumerate(todos_enlaces_info, 1):
-            url = enlace_info['url']
-            if url not in self.existing_data_by_url:
-                noticia_dict = self._extraer_contenido_noticia(url, enlace_info['titulo_busqueda'], keyword)
-                if noticia_dict: self.existing_data_by_url[url] = noticia_dict; nuevas_noticias_keyword += 1
-                if i < len(todos_enlaces_info): sleep_jitter(0.5, 1.0)
+        pendientes = {e['url']: e for e in todos_enlaces_info if e['url'] not in self.existing_data_by_url}
+        # Descarga concurrente (acotada por host) de las noticias nuevas; cada HTML va al mismo parser
+        for (url, titulo_busqueda), response in self.descargador.descargar(
+                (url, e['titulo_busqueda']) for url, e in pendientes.items()):
+            print(f"   -> 📰 Procesando: {url}")
+            noticia_dict = self._parsear_noticia(response.content, url, titulo_busqueda, keyword) if response is not None else None
+            if noticia_dict: self.existing_data_by_url[url] = noticia_dict; nuevas_noticias_keyword += 1
         print(f"\n   ✅ Nuevas noticias añadidas para '{keyword}': {nuevas_noticias_keyword}\n")
         return nuevas_noticias_keyword
 
@@ -334,19 +316,25 @@ class TVPeruScraper:
         print("\n" + "🌟"*35); print(" "*10 + "TV PERÚ - MODO ACTUALIZACIÓN"); print("🌟"*35 + "\n")
         self.existing_data_by_url = load_existing_data(self.output_file)
         total_nuevas_agregadas = 0
-        for keyword in self.keywords:
-            nuevas = self.scrape_keyword(keyword)
-            total_nuevas_agregadas += nuevas
-            if nuevas > 0:
-                 print(f"\n💾 Guardando progreso ({len(self.existing_data_by_url)} noticias)...")
-                 save_updated_data(self.output_file, self.existing_data_by_url)
-                 print("-" * 70)
-            if keyword != self.keywords[-1]:
-                print(f"\n⏳ Pausa antes de '{self.keywords[self.keywords.index(keyword) + 1]}'... (5s)")
-                time.sleep(5); print("-" * 70)
+        sin_guardar = False  # Hay noticias en el lote que todavía no llegaron al almacén
+        with DescargadorAsync(SESSION_HEADERS) as self.descargador:
+            for keyword in self.keywords:
+                nuevas = self.scrape_keyword(keyword)
+                total_nuevas_agregadas += nuevas
+                if nuevas > 0 or sin_guardar:
+                     print(f"\n💾 Guardando progreso ({len(self.existing_data_by_url)} noticias)...")
+                     sin_guardar = not save_updated_data(self.output_file, self.existing_data_by_url)
+                     print("-" * 70)
+                if not sin_guardar:
+                    self.checkpoints.guardar()  # (después de guardar las noticias del término)
+                if keyword != self.keywords[-1]:
+                    print(f"\n⏳ Pausa antes de '{self.keywords[self.keywords.index(keyword) + 1]}'... (5s)")
+                    time.sleep(5); print("-" * 70)
         print(f"\n{'='*70}"); print(f"✅ SCRAPING TV PERÚ COMPLETADO"); print(f"{'='*70}")
         print(f"Noticias NUEVAS totales añadidas: {total_nuevas_agregadas}")
-        save_updated_data(self.output_file, self.existing_data_by_url)
+        if save_updated_data(self.output_file, self.existing_data_by_url):
+            self.checkpoints.guardar()
+        print(self.checkpoints.resumen())
 
 # ============================================================================
 # PUNTO DE ENTRADA
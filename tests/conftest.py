@@ -0,0 +1,7 @@
+import os
+import sys
+
+# --- Para importar ai_engine / news_scrapers desde la raíz del proyecto ---
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
@@ -0,0 +1,43 @@
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from ai_engine import corpus_index
+from ai_engine.ai_utils import limpiar_texto_rapido
+from ai_engine.articulo import Articulo
+from ai_engine.corpus_index import IndiceCorpus
+
+
+def _articulo(id_, titulo, fecha="2025-01-01 10:00:00"):
+    return Articulo(id=id_, titulo=titulo, teaser="", contenido="", url=f"https://rpp.pe/{id_}",
+                    fuente="RPP", fecha=fecha)
+
+
+@pytest.fixture
+def vectorizer(monkeypatch):
+    monkeypatch.setattr(corpus_index, "DIAS_CALIENTES", 0)
+    textos = ["congreso aprueba reforma electoral", "ministro de economia renuncia hoy",
+              "seleccion peruana gana el partido", "lluvias intensas en la sierra sur"]
+    return TfidfVectorizer().fit([limpiar_texto_rapido(t) for t in textos])
+
+
+def _ids(indice, vectorizer, texto):
+    vector = vectorizer.transform([limpiar_texto_rapido(texto)])
+    return [a.get("_id") for a, _ in indice.buscar(vector, top_k=5)]
+
+
+def test_clave_repetida_queda_solo_la_ultima(vectorizer):
+    # El JSON antiguo (lista) puede traer dos veces la misma nota: vale la última
+    indice = IndiceCorpus.construir(vectorizer, [_articulo("a1", "Congreso aprueba reforma electoral"),
+                                                 _articulo("a2", "Lluvias intensas en la sierra sur"),
+                                                 _articulo("a1", "Ministro de economia renuncia hoy")])
+    assert len(indice) == 2
+    assert _ids(indice, vectorizer, "congreso aprueba reforma electoral") == []
+
+    # La nota se vuelve a editar: no debe quedar ninguna copia vieja viva
+    indice = indice.aplicar_cambios([_articulo("a1", "Seleccion peruana gana el partido",
+                                               fecha="2025-01-02 10:00:00")])
+    for consulta in ("congreso aprueba reforma electoral", "ministro de economia renuncia hoy"):
+        assert _ids(indice, vectorizer, consulta) == []
+        assert _ids(indice.compactar(), vectorizer, consulta) == []
+    assert _ids(indice.compactar(), vectorizer, "seleccion peruana gana el partido") == ["a1"]
+    assert len(indice.compactar()) == 2
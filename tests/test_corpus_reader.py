@@ -0,0 +1,48 @@
+import pytest
+
+from ai_engine import corpus_snapshot, news_store
+from ai_engine.articulo import Articulo
+from ai_engine.corpus_reader import cargar_corpus
+from ai_engine.corpus_snapshot import iterar_snapshot
+
+
+def _articulo(i):
+    return Articulo(id=f"x{i}", titulo=f"Noticia {i}", teaser="teaser", contenido=f"cuerpo de la noticia {i}",
+                    url=f"https://rpp.pe/n{i}", fuente="RPP", fecha=f"2025-01-{i + 1:02d} 10:00:00")
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """ Almacén SQLite vacío en una carpeta temporal (los snapshots también van ahí). """
+    monkeypatch.chdir(tmp_path)
+    store = news_store.NewsStore(str(tmp_path / "noticias.db"), ruta_json=None)
+    monkeypatch.setattr(news_store, "_store", store)
+    return store
+
+
+def test_lectura_de_metadatos_deja_un_snapshot_vigente(store, monkeypatch):
+    store.guardar([_articulo(i) for i in range(3)])
+    assert len(cargar_corpus(con_contenido=False)) == 3
+
+    # Los scrapers guardan algo nuevo: la siguiente lectura sin cuerpos regenera el snapshot
+    store.guardar([_articulo(3)])
+    corpus = cargar_corpus(con_contenido=False)
+    assert len(corpus) == 4
+    assert len(list(iterar_snapshot(store.version(), corpus_snapshot.SNAPSHOT_METADATOS_PATH,
+                                    con_contenido=False))) == 4
+
+    # Arranque en frío siguiente: sale del snapshot, sin recorrer el almacén
+    def sin_almacen(*args, **kwargs):
+        raise AssertionError("se leyó el almacén")
+    monkeypatch.setattr(store, "articulos", sin_almacen)
+    corpus = cargar_corpus(con_contenido=False)
+    assert [a.id for a in corpus] == ["x0", "x1", "x2", "x3"]
+    assert corpus[3].contenido == "cuerpo de la noticia 3"  # (cuerpo perezoso, por _id)
+
+
+def test_snapshot_de_metadatos_no_sirve_para_leer_cuerpos(store):
+    store.guardar([_articulo(0)])
+    cargar_corpus(con_contenido=False)
+    with pytest.raises(corpus_snapshot.SnapshotInvalido):
+        iterar_snapshot(store.version(), corpus_snapshot.SNAPSHOT_METADATOS_PATH)
+    assert cargar_corpus()[0].contenido == "cuerpo de la noticia 0"
@@ -0,0 +1,19 @@
+from ai_engine.articulo import Articulo
+from ai_engine.news_store import NewsStore
+
+
+def test_version_cambia_solo_al_escribir(tmp_path):
+    store = NewsStore(str(tmp_path / "noticias.db"), ruta_json=None)
+    inicial = store.version()
+    assert store.version() == inicial
+
+    store.guardar([Articulo(id="a1", titulo="Noticia", url="https://rpp.pe/a1", fuente="RPP")])
+    despues_de_guardar = store.version()
+    assert despues_de_guardar != inicial
+
+    store.reemplazar(["a1"], [])
+    assert store.version() not in (inicial, despues_de_guardar)
+
+    # Una base recreada desde cero no repite las versiones de la anterior
+    (tmp_path / "otra").mkdir()
+    assert NewsStore(str(tmp_path / "otra" / "noticias.db"), ruta_json=None).version() != inicial
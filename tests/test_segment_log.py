@@ -0,0 +1,67 @@
+import pytest
+
+from ai_engine import segment_log
+from ai_engine.articulo import Articulo
+from ai_engine.segment_log import RegistroSegmentos
+
+NOTA = ("el congreso de la republica aprobo esta tarde en segunda votacion la reforma electoral "
+        "que modifica las reglas de las elecciones primarias y el financiamiento de los partidos politicos")
+
+
+def _articulo(id_, fuente, contenido):
+    return Articulo(id=id_, titulo="", teaser="", contenido=contenido, url=f"https://{fuente.lower()}.pe/{id_}",
+                    fuente=fuente, fecha="2025-01-01 10:00:00")
+
+
+@pytest.fixture
+def registro(tmp_path):
+    return RegistroSegmentos(str(tmp_path / "noticias_log"), ruta_json=None)
+
+
+def test_compactar_solo_compara_lo_nuevo(registro, monkeypatch):
+    otras = [_articulo(f"o{i}", "RPP", f"noticia numero {i} " + " ".join(f"palabra{i}x{j}" for j in range(20)))
+             for i in range(20)]
+    registro.guardar([_articulo("lr1", "LR", NOTA)] + otras)
+    registro.compactar()
+
+    # La misma nota de agencia llega de otro medio: se colapsa contra el snapshot...
+    firmadas = []
+    firma_registro = segment_log._firma_registro
+    monkeypatch.setattr(segment_log, "_firma_registro", lambda r: firmadas.append(r["_id"]) or firma_registro(r))
+    registro.guardar([_articulo("canaln1", "Canal N", NOTA + " hoy"), _articulo("nueva", "RPP", "otra cosa")])
+    resumen = registro.compactar()
+
+    # ...sin volver a firmar el snapshot completo (solo lo nuevo y el candidato del LSH)
+    assert sorted(firmadas) == ["canaln1", "lr1", "nueva"]
+    assert resumen["articulos"] == 23
+    assert registro.obtener("canaln1").duplicado_de == "lr1"
+    assert {f["fuente"] for f in registro.obtener("lr1").fuentes} == {"LR", "Canal N"}
+    assert len(list(registro.articulos())) == 22
+
+    # La siguiente compactación parte del LSH guardado (y el canónico sigue ahí)
+    registro.guardar([_articulo("tvperu1", "TV Perú", "ultima hora " + NOTA)])
+    registro.compactar()
+    assert registro.obtener("tvperu1").duplicado_de == "lr1"
+    assert len(registro.obtener("lr1").fuentes) == 3
+
+
+def test_compactar_en_segundo_plano_no_retiene_la_salida(registro, monkeypatch):
+    hilos = []
+    monkeypatch.setattr(segment_log.threading, "Thread", lambda **kwargs: hilos.append(kwargs) or
+                        type("Hilo", (), {"start": lambda self: None})())
+    registro.compactar_en_segundo_plano()
+    assert hilos[0]["daemon"] is True
+
+
+def test_ve_los_segmentos_de_otro_proceso_aunque_la_carpeta_no_cambie_de_fecha(registro):
+    registro.guardar([_articulo("a1", "LR", NOTA)])
+    assert registro.existe("a1")
+    sello = registro._sello(registro._manifiesto())[0]
+
+    # Otro scraper publica un segmento en el mismo tick del reloj del sistema de archivos
+    otro = RegistroSegmentos(registro.ruta, ruta_json=None)
+    otro.guardar([_articulo("b1", "RPP", "otra cosa")])
+    segment_log.os.utime(registro.ruta, ns=(sello, sello))
+
+    assert registro.existe("b1")
+    assert registro.existe(url="https://rpp.pe/b1")
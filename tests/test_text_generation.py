@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from ai_engine import corpus_index, text_generation
+from ai_engine.ai_utils import limpiar_texto_rapido
+from ai_engine.articulo import Articulo
+from ai_engine.result_cache import CacheResultados
+
+
+def _articulo(id_, titulo, fecha="2025-01-01 10:00:00"):
+    return Articulo(id=id_, titulo=titulo, teaser="", contenido="", url=f"https://rpp.pe/{id_}",
+                    fuente="RPP", fecha=fecha)
+
+
+@pytest.fixture
+def motor(monkeypatch):
+    """ Modelo de prueba, índice vacío y caché de resultados nueva. """
+    textos = ["congreso aprueba reforma electoral", "ministro de economia renuncia hoy",
+              "seleccion peruana gana el partido", "lluvias intensas en la sierra sur"]
+    vectorizer = TfidfVectorizer().fit([limpiar_texto_rapido(t) for t in textos])
+    modelo = SimpleNamespace(version=1, vectorizer=vectorizer)
+    monkeypatch.setattr(text_generation, "obtener_registro", lambda: SimpleNamespace(obtener=lambda: modelo))
+    monkeypatch.setattr(text_generation, "cache_resultados", CacheResultados())
+    monkeypatch.setattr(corpus_index, "_indice_actual", None)
+    monkeypatch.setattr(corpus_index, "DIAS_CALIENTES", 0)
+    return modelo
+
+
+def test_cambio_en_la_db_no_sirve_el_resultado_viejo(motor):
+    afirmacion = "El congreso aprueba la reforma electoral"
+    db_news = [_articulo("a1", "Congreso aprueba reforma electoral"),
+               _articulo("a2", "Lluvias intensas en la sierra sur")]
+
+    _, evidencias = text_generation.generar_respuesta(afirmacion, db_news)
+    assert [e.get("_id") for e in evidencias] == ["a1"]
+    assert text_generation.generar_respuesta(afirmacion, db_news)[1] == evidencias  # (desde la caché)
+
+    # La nota se edita: ahora habla de otra cosa; y aparece otra que sí coincide
+    db_news = [_articulo("a1", "Seleccion peruana gana el partido", fecha="2025-01-02 10:00:00"),
+               _articulo("a2", "Lluvias intensas en la sierra sur"),
+               _articulo("a3", "Congreso aprueba reforma electoral")]
+    _, evidencias = text_generation.generar_respuesta(afirmacion, db_news)
+    assert [e.get("_id") for e in evidencias] == ["a3"]
@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, redirect, url_for
+from flask import Flask, render_template, request, redirect, url_for, jsonify
 from flask_caching import Cache
 import os
 import sys
@@ -12,6 +12,10 @@ if project_root not in sys.path:
 
 from ai_engine.text_generation import generar_respuesta
 from ai_engine.context_manager import ContextManager
+from ai_engine.model_loader import obtener_registro
+from ai_engine.retraining import iniciar_reentrenamiento, estado_reentrenamiento
+from ai_engine.result_cache import cache_resultados
+from ai_engine.corpus_reader import cargar_corpus
 # Ya no importamos 'get_all_news' directamente aquí
 
 # --- Configuración del servidor Flask ---
@@ -19,6 +23,7 @@ app = Flask(__name__, template_folder="templates", static_folder="static")
 cache = Cache(app, config={'CACHE_TYPE': 'SimpleCache'})
 context_manager = None
 DATABASE_PATH = "news_scrapers/noticias_partidos.json" # Un solo lugar para la ruta
+TOP_K_EVIDENCIAS = int(os.environ.get("TOP_K_EVIDENCIAS", 3)) # Enlaces de evidencia a mostrar
 
 def init_app(ctx_manager: ContextManager):
     global context_manager
@@ -27,30 +32,12 @@ def init_app(ctx_manager: ContextManager):
 # --- LÓGICA DE CACHÉ DE LA BASE DE DATOS ---
 
 def _load_json_database(archivo=DATABASE_PATH):
-    """ Carga la base de datos JSON principal (ahora es 'dict'). """
-    if not os.path.exists(archivo):
-        print(f"Advertencia: No se encontró el archivo de base de datos {archivo}")
-        return [] # Devolver lista vacía
-    try:
-        with open(archivo, 'r', encoding='utf-8') as f:
-            data_dict = json.load(f)
-        
-        # Asegurarse de que los datos sean una lista de artículos (los valores del dict)
-        if isinstance(data_dict, dict):
-            return list(data_dict.values())
-        elif isinstance(data_dict, list):
-             # Si por alguna razón se guardó como lista, usarla
-            return data_dict
-        else:
-            print(f"Error: {archivo} tiene un formato desconocido.")
-            return []
-            
-    except json.JSONDecodeError:
-        print(f"Error: El archivo {archivo} está corrupto o vacío.")
-        return []
-    except Exception as e:
-        print(f"Error cargando {archivo}: {e}")
-        return []
+    """
+    Lista de Articulo del corpus, con el lector compartido en streaming
+    (ai_engine.corpus_reader): del snapshot binario si está vigente. Sin los
+    cuerpos: al indexar se piden al almacén por bloques (articulo.textos).
+    """
+    return cargar_corpus(archivo, con_contenido=False)
 
 @cache.cached(timeout=3600, key_prefix='db_news') # Cache por 1 hora
 def get_cached_db_news():
@@ -93,14 +80,12 @@ def resultado():
 
     # Ejecutar pipeline de IA
     try:
-        # 1. Obtener noticias cacheadas
-        db_news = get_cached_db_news()
-        
-        # 2. Generar respuesta
-        # (Asumiendo que text_generation.py devuelve (dict, list))
-        resultado_dict, evidencias = generar_respuesta(afirmacion, db_news)
+        # 1. Generar respuesta
+        # (Las noticias cacheadas se cargan solo si el resultado no está ya
+        #  en la caché de verificaciones: por eso se pasa la función)
+        resultado_dict, evidencias = generar_respuesta(afirmacion, get_cached_db_news, top_k=TOP_K_EVIDENCIAS)
         
-        # 3. Guardar en contexto
+        # 2. Guardar en contexto
         context_manager.add_message(resultado_dict.get('veredicto_texto', 'Error'), role="system")
 
     except Exception as e:
@@ -133,12 +118,44 @@ def recargar_noticias():
     """
     try:
         cache.delete('db_news')
+        cache_resultados.invalidar()
         mensaje = "✅ Caché de la base de datos JSON limpiado. La próxima consulta recargará el JSON."
     except Exception as e:
         mensaje = f"⚠️ Error al limpiar caché: {str(e)}"
     return render_template("index.html", mensaje=mensaje)
 
 
+@app.route("/estado_modelo")
+def estado_modelo():
+    """ Versión del modelo en memoria y métricas de carga (para producción). """
+    return jsonify(obtener_registro().estado())
+
+
+@app.route("/estado_cache")
+def estado_cache():
+    """ Aciertos/fallos de la caché de resultados de verificación. """
+    return jsonify(cache_resultados.estadisticas())
+
+
+@app.route("/reentrenar")
+def reentrenar():
+    """
+    Lanza el reentrenamiento del modelo TF-IDF en segundo plano.
+    Se sigue sirviendo con el modelo actual hasta que el nuevo esté listo.
+    """
+    if iniciar_reentrenamiento():
+        cache.delete('db_news')
+        mensaje = "🧠 Reentrenamiento iniciado en segundo plano. El modelo se actualizará sin cortes."
+    else:
+        mensaje = "⏳ Ya hay un reentrenamiento en curso."
+    return render_template("index.html", mensaje=mensaje)
+
+
+@app.route("/estado_reentrenamiento")
+def estado_reentrenamiento_route():
+    return jsonify(estado_reentrenamiento())
+
+
 @app.route("/limpiar_contexto")
 def limpiar_contexto():
     if not context_manager: